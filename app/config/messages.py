@@ -37,6 +37,11 @@ class AccessLogMessages:
     ERROR_PERSON_NOT_FOUND = "Persona no encontrada"
     ERROR_USER_NOT_FOUND = "Usuario no encontrado"
     ERROR_VISITOR_NOT_FOUND = "Visitante no encontrado"
+    ERROR_IMPORT_INVALID_FORMAT = "Formato de importación inválido. Debe ser 'csv' o 'ndjson'"
+    ERROR_IMPORT_INVALID_ROW = "Fila {row} inválida: {error}"
+    ERROR_IMPORT_UNKNOWN_PERSONS = "Hay {count} personas inexistentes en el archivo (p. ej. {sample})"
+    ERROR_IMPORT_JOB_NOT_FOUND = "Importación no encontrada"
+    SUCCESS_IMPORT_COMPLETED = "Importación completada"
 
 class IncidentMessages:
     # Success messages
@@ -47,6 +52,18 @@ class IncidentMessages:
     # Error messages
     ERROR_INCIDENT_NOT_FOUND = "Incidente no encontrado"
 
+class PersonMessages:
+    # Error messages
+    ERROR_INVALID_IDS = "La lista de ids debe tener entre 1 y {max} enteros separados por comas"
+    ERROR_INVALID_PERSON_KEYS = "Las personas deben indicarse como tipo:id separados por comas (máximo {max}), p. ej. employee:1,visitor:7"
+
+class ReportMessages:
+    # Error messages
+    ERROR_INVALID_REPORT_TYPE = "Tipo de informe inválido. Debe ser 'daily', 'weekly' o 'monthly'"
+    ERROR_INVALID_REPORT_RANGE = "El rango del informe debe indicar 'from' y 'to', con 'from' anterior o igual a 'to' y como máximo {max} días"
+    ERROR_INVALID_MONTH = "Mes inválido. Debe tener el formato AAAA-MM"
+    ERROR_INVALID_TIMESHEET_FORMAT = "Formato de planilla inválido. Debe ser 'csv' o 'pdf'"
+
 class SystemMessages:
     # Internal system messages (in English)
     HEALTH_CHECK_STATUS = "healthy"
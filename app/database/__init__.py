@@ -1,3 +1,3 @@
-from app.database.connection import engine, get_db, Base
+from app.database.connection import engine, get_db, get_read_db, Base
 
-__all__ = ["engine", "get_db", "Base"]
+__all__ = ["engine", "get_db", "get_read_db", "Base"]
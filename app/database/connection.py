@@ -1,20 +1,94 @@
+from fastapi import Request
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
+import time
 from dotenv import load_dotenv
 
+from app.database.profiling import QueryProfiler
+
 load_dotenv()
 
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL").replace("postgres://", "postgresql://")
+# Réplica de lectura (opcional): listados GET e informes. Sin ella todo va al primario
+SQLALCHEMY_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL", "").replace("postgres://", "postgresql://")
+# Segundos que un cliente lee del primario después de escribir (read-your-writes)
+READ_PRIMARY_AFTER_WRITE_SECONDS = float(os.getenv("READ_PRIMARY_AFTER_WRITE_SECONDS", 5))
+READ_PRIMARY_HEADER = "x-read-primary"
+READ_PRIMARY_COOKIE = "read_primary_until"
 
 engine = create_engine(SQLALCHEMY_DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+replica_engine = create_engine(SQLALCHEMY_REPLICA_URL) if SQLALCHEMY_REPLICA_URL else engine
+ReplicaSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+
+# Perfilado de consultas (opcional): huellas SQL, consultas lentas y detección de N+1
+query_profiler = None
+if os.getenv("SQL_PROFILING", "false").lower() == "true":
+    query_profiler = QueryProfiler(
+        slow_query_ms=float(os.getenv("SLOW_QUERY_MS", 200)),
+        n_plus_one_threshold=int(os.getenv("N_PLUS_ONE_THRESHOLD", 10))
+    )
+    query_profiler.instrument(engine)
+    if replica_engine is not engine:
+        query_profiler.instrument(replica_engine)
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+def reads_from_primary(request: Request) -> bool:
+    """
+    Read-your-writes: la petición lee del primario si lo pide con la cabecera
+    X-Read-Primary o si el mismo cliente escribió hace menos de
+    READ_PRIMARY_AFTER_WRITE_SECONDS (cookie puesta por ReadYourWritesMiddleware).
+    """
+    if request.headers.get(READ_PRIMARY_HEADER, "").lower() in ("1", "true", "yes"):
+        return True
+    try:
+        return float(request.cookies.get(READ_PRIMARY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+def get_read_db(request: Request):
+    """Sesión para endpoints de solo lectura: réplica si está configurada, si no el primario."""
+    db = SessionLocal() if reads_from_primary(request) else ReplicaSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+class ReadYourWritesMiddleware:
+    """
+    Después de una escritura correcta (POST, PUT, PATCH o DELETE) marca al cliente con
+    una cookie para que sus lecturas de los próximos segundos vayan al primario y no
+    vean la réplica atrasada. Solo se añade cuando hay réplica configurada.
+    """
+
+    WRITE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+
+    def __init__(self, app, seconds: float = READ_PRIMARY_AFTER_WRITE_SECONDS):
+        self.app = app
+        self.seconds = seconds
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in self.WRITE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                cookie = (
+                    f"{READ_PRIMARY_COOKIE}={time.time() + self.seconds:.3f}; "
+                    f"Max-Age={int(self.seconds) + 1}; Path=/; HttpOnly; SameSite=Lax"
+                )
+                message = {**message, "headers": [*message.get("headers", []), (b"set-cookie", cookie.encode())]}
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,151 @@
+from collections import Counter, deque
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+import logging
+import re
+import statistics
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+_PLACEHOLDERS = re.compile(r"%\(\w+\)s|%s|:\w+|\?")
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_NUMBERS = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+# Consultas por huella en la petición en curso (compartido con el threadpool)
+_request_fingerprints: ContextVar[Optional[Counter]] = ContextVar("request_fingerprints", default=None)
+
+
+def fingerprint(statement: str) -> str:
+    """
+    Normaliza una sentencia SQL para agrupar las que solo difieren en parámetros:
+    literales y marcadores pasan a ?, y las listas IN (?, ?, ...) a IN (?).
+    """
+    normalized = _STRINGS.sub("?", statement)
+    normalized = _PLACEHOLDERS.sub("?", normalized)
+    normalized = _NUMBERS.sub("?", normalized)
+    normalized = _IN_LISTS.sub("(?)", normalized)
+    return _WHITESPACE.sub(" ", normalized).strip()
+
+
+class _FingerprintStats:
+    __slots__ = ("count", "total", "max", "samples")
+
+    def __init__(self, sample_size: int):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=sample_size)
+
+
+class QueryProfiler:
+    """
+    Estadísticas de consultas SQL por huella normalizada, registro de consultas
+    lentas y detección de N+1 (la misma huella repetida en una petición).
+    """
+
+    def __init__(self, slow_query_ms: float = 200, n_plus_one_threshold: int = 10,
+                 sample_size: int = 500, max_fingerprints: int = 2000):
+        self.slow_query_seconds = slow_query_ms / 1000
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.sample_size = sample_size
+        self.max_fingerprints = max_fingerprints
+        self.n_plus_one = deque(maxlen=100)
+        self._stats: Dict[str, _FingerprintStats] = {}
+        self._lock = threading.Lock()
+
+    def instrument(self, engine: Engine):
+        @event.listens_for(engine, "before_cursor_execute")
+        def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            context._profile_start = time.perf_counter()
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            self.record(statement, parameters, time.perf_counter() - context._profile_start)
+
+    def record(self, statement: str, parameters, elapsed: float):
+        key = fingerprint(statement)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                if len(self._stats) >= self.max_fingerprints:
+                    key = "(otras consultas)"
+                    stats = self._stats.get(key)
+                if stats is None:
+                    stats = self._stats[key] = _FingerprintStats(self.sample_size)
+            stats.count += 1
+            stats.total += elapsed
+            stats.max = max(stats.max, elapsed)
+            stats.samples.append(elapsed)
+
+        request_counter = _request_fingerprints.get()
+        if request_counter is not None:
+            request_counter[key] += 1
+
+        if elapsed >= self.slow_query_seconds:
+            logger.warning(f"Consulta lenta ({elapsed * 1000:.1f} ms): {statement} | parámetros: {parameters!r}")
+
+    def finish_request(self, route: str, counter: Counter):
+        for key, count in counter.items():
+            if count >= self.n_plus_one_threshold:
+                logger.warning(f"Posible N+1 en {route}: {count} consultas similares: {key}")
+                self.n_plus_one.append({
+                    "route": route,
+                    "fingerprint": key,
+                    "count": count,
+                    "detected_at": time.time(),
+                })
+
+    def top(self, limit: int = 20, order_by: str = "total") -> List[dict]:
+        with self._lock:
+            items = [(key, stats.count, stats.total, stats.max, list(stats.samples))
+                     for key, stats in self._stats.items()]
+        rows = []
+        for key, count, total, max_time, samples in items:
+            cuts = statistics.quantiles(samples, n=100) if len(samples) > 1 else samples * 99
+            rows.append({
+                "fingerprint": key,
+                "count": count,
+                "total_ms": round(total * 1000, 3),
+                "mean_ms": round(total / count * 1000, 3),
+                "p50_ms": round(cuts[49] * 1000, 3),
+                "p95_ms": round(cuts[94] * 1000, 3),
+                "p99_ms": round(cuts[98] * 1000, 3),
+                "max_ms": round(max_time * 1000, 3),
+            })
+        sort_key = {"total": "total_ms", "count": "count", "p95": "p95_ms", "max": "max_ms"}.get(order_by, "total_ms")
+        rows.sort(key=lambda row: row[sort_key], reverse=True)
+        return rows[:limit]
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self.n_plus_one.clear()
+
+
+class QueryProfilerMiddleware:
+    """Agrupa las consultas de cada petición para detectar patrones N+1."""
+
+    def __init__(self, app, profiler: QueryProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        counter = Counter()
+        token = _request_fingerprints.set(counter)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_fingerprints.reset(token)
+            route = getattr(scope.get("route"), "path_format", None) or scope["path"]
+            self.profiler.finish_request(f"{scope['method']} {route}", counter)
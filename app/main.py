@@ -1,11 +1,17 @@
-from fastapi import FastAPI, BackgroundTasks
+from fastapi import FastAPI, BackgroundTasks, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from app.database import Base, engine
+from app.database.connection import query_profiler, SessionLocal, replica_engine, ReadYourWritesMiddleware
+from app.database.profiling import QueryProfilerMiddleware
 from app.config.messages import SystemMessages
-from app.routers import users_router, visitors_router, access_logs_router, incidents_router
+from app.routers import users_router, visitors_router, access_logs_router, incidents_router, reports_router, people_router
 from app.routers.qr_codes import router as qr_codes_router
 from app.services.scheduler_service import init_scheduler
+from app.services.metrics_service import MetricsMiddleware, instrument_engine, render_metrics
+from app.services.qr_token_service import signing_enabled, qr_revocations
+from app.services.presence_service import presence
+from app.services.incident_writer_service import incident_writer
 import logging
 
 # Configurar logging
@@ -34,12 +40,27 @@ app.add_middleware(
     expose_headers=["*"]
 )
 
+# Métricas de rendimiento (latencia por ruta, consultas SQL por petición, escaneos)
+app.add_middleware(MetricsMiddleware)
+instrument_engine(engine)
+
+# Réplica de lectura: los clientes que acaban de escribir leen unos segundos del primario
+if replica_engine is not engine:
+    instrument_engine(replica_engine)
+    app.add_middleware(ReadYourWritesMiddleware)
+
+# Detección de N+1 por petición (solo con SQL_PROFILING=true)
+if query_profiler:
+    app.add_middleware(QueryProfilerMiddleware, profiler=query_profiler)
+
 # Add routers
 app.include_router(users_router)
 app.include_router(visitors_router)
 app.include_router(access_logs_router)
 app.include_router(incidents_router)
 app.include_router(qr_codes_router)
+app.include_router(reports_router)
+app.include_router(people_router)
 
 # Inicializar el programador de tareas
 scheduler = init_scheduler()
@@ -47,6 +68,19 @@ scheduler = init_scheduler()
 @app.on_event("startup")
 async def startup_event():
     """Evento que se ejecuta al iniciar la aplicación"""
+    db = SessionLocal()
+    try:
+        # Último acceso de cada persona (duplicados, anti-passback e inferencia de sentido)
+        presence.load(db)
+        if signing_enabled():
+            # Cargar los códigos QR revocados antes de aceptar tokens firmados
+            qr_revocations.load(db)
+    finally:
+        db.close()
+
+    # Registro en segundo plano de los incidentes de escaneos rechazados
+    incident_writer.start()
+
     try:
         # Iniciar el programador
         scheduler.start()
@@ -57,6 +91,9 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     """Evento que se ejecuta al detener la aplicación"""
+    # Escribir los incidentes pendientes antes de salir
+    incident_writer.stop()
+
     try:
         # Detener el programador
         scheduler.shutdown()
@@ -96,6 +133,32 @@ async def send_report_manually(background_tasks: BackgroundTasks):
             content={"message": f"Error al enviar el informe: {error_msg}"}
         )
 
+@app.get("/admin/slow-queries", tags=["Admin"])
+def get_slow_queries(limit: int = 20, order_by: str = "total"):
+    """Consultas SQL con mayor costo (total, count, p95 o max) y patrones N+1 recientes"""
+    if not query_profiler:
+        raise HTTPException(
+            status_code=404,
+            detail="El perfilado de consultas está desactivado (SQL_PROFILING=true para activarlo)"
+        )
+    return {
+        "slow_query_ms": query_profiler.slow_query_seconds * 1000,
+        "top": query_profiler.top(limit, order_by),
+        "n_plus_one": list(query_profiler.n_plus_one)[-limit:]
+    }
+
+@app.delete("/admin/slow-queries", tags=["Admin"])
+def reset_slow_queries():
+    """Reinicia las estadísticas del perfilado de consultas"""
+    if query_profiler:
+        query_profiler.reset()
+    return {"message": "Estadísticas de consultas reiniciadas"}
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Métricas en formato de exposición de Prometheus"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 @app.get("/health")
 async def health_check():
     return {
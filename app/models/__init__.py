@@ -3,5 +3,11 @@ from app.models.visitor import Visitor
 from app.models.access_log import AccessLog
 from app.models.incident import Incident
 from app.models.qr_code import QRCode
+from app.models.import_job import ImportJob
+from app.models.qr_code_change import QRCodeChange
+from app.models.qr_code_archive import QRCodeArchive
+from app.models.table_version import TableVersion
+from app.models.scheduled_job_run import ScheduledJobRun
+from app.models.daily_access_summary import DailyAccessSummary
 
-__all__ = ["User", "Visitor", "AccessLog", "Incident", "QRCode"]
+__all__ = ["User", "Visitor", "AccessLog", "Incident", "QRCode", "ImportJob", "QRCodeChange", "QRCodeArchive", "TableVersion", "ScheduledJobRun", "DailyAccessSummary"]
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Date, func
+from sqlalchemy import Column, Integer, String, DateTime, Date, Index, func
 from app.database.connection import Base
 
 class AccessLog(Base):
@@ -10,3 +10,24 @@ class AccessLog(Base):
     access_type = Column(String(10), nullable=False)
     access_time = Column(DateTime(timezone=True), default=func.now(), nullable=False)
     workday_date = Column(Date, nullable=False)
+    # Sede (edificio) y portería donde se registró el acceso; NULL en registros anteriores
+    site_id = Column(String(50), nullable=True)
+    gate_id = Column(String(50), nullable=True)
+    # Id del evento asignado por la portería: los reintentos del mismo escaneo no se duplican
+    event_id = Column(String(64), nullable=True)
+
+    __table_args__ = (
+        # Filtros de /access-logs/detailed: por persona y por fecha (exacta o rango),
+        # ambos ordenados por access_time
+        Index("ix_access_logs_person_access_time", "person_type", "person_id", "access_time"),
+        Index("ix_access_logs_workday_date_access_time", "workday_date", "access_time"),
+        # Listados ordenados por access_time DESC sin filtros (paginación "lo más reciente")
+        Index("ix_access_logs_access_time", "access_time"),
+        # Informes y ocupación por sede: mismo patrón que el índice por jornada, acotado a una sede
+        Index("ix_access_logs_site_workday_date_access_time", "site_id", "workday_date", "access_time"),
+        # Escaneos idempotentes: INSERT ... ON CONFLICT (event_id) DO NOTHING (NULL no entra en conflicto)
+        Index("ux_access_logs_event_id", "event_id", unique=True),
+        # Rangos amplios de access_time en informes: la tabla solo crece en orden de
+        # tiempo, así que un índice BRIN cubre semanas o meses ocupando muy poco
+        Index("ix_access_logs_access_time_brin", "access_time", postgresql_using="brin").ddl_if(dialect="postgresql"),
+    )
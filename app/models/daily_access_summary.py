@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Date, DateTime, Integer, JSON
+from app.database.connection import Base
+
+class DailyAccessSummary(Base):
+    """
+    Conteos de accesos de una jornada cerrada, calculados una sola vez. Los informes
+    diarios, semanales y mensuales suman estos resúmenes en lugar de recorrer access_logs.
+
+    counts: {sede: {tipo de persona: {tipo de acceso: cantidad}}}; los accesos sin sede
+    van bajo "unassigned". NULL cuando la jornada recibió accesos tardíos y hay que
+    volver a contarla.
+
+    version aumenta con cada invalidación: un resumen solo se guarda si la versión no
+    cambió desde que se empezó a contar, así un conteo hecho antes de un lote tardío
+    no pisa su invalidación.
+    """
+    __tablename__ = "daily_access_summaries"
+
+    workday_date = Column(Date, primary_key=True)
+    counts = Column(JSON(none_as_null=True))
+    computed_at = Column(DateTime(timezone=True))
+    version = Column(Integer, nullable=False, default=0, server_default="0")
@@ -1,12 +1,18 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, func
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index, func
 from app.database.connection import Base
 
 class Incident(Base):
     __tablename__ = "incidents"
 
     id = Column(Integer, primary_key=True, index=True)
-    person_type = Column(String(10), nullable=False)
+    # NULL en los incidentes sin persona identificada (códigos desconocidos, alertas globales)
+    person_type = Column(String(10))
     person_id = Column(Integer)
     incident_type = Column(String(50), nullable=False)
     description = Column(Text, nullable=False)
     reported_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        # Filtro por rango de fechas de GET /incidents/ (los escaneos rechazados generan mucho volumen)
+        Index("ix_incidents_reported_at", "reported_at"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -15,6 +15,15 @@ class QRCode(Base):
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     expires_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # Búsqueda de los escaneos: solo códigos activos. El barrido programado
+        # desactiva los vencidos, así que el índice se mantiene pequeño
+        Index("ix_qr_codes_active_code", "code",
+              postgresql_where=is_active.is_(True), sqlite_where=is_active.is_(True)),
+        # Barrido de códigos vencidos
+        Index("ix_qr_codes_expires_at", "expires_at"),
+    )
     
     # Relationships
     user = relationship("User", back_populates="qr_codes")
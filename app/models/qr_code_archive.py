@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, DateTime, func
+from app.database.connection import Base
+
+class QRCodeArchive(Base):
+    """
+    Códigos QR vencidos que el barrido programado saca de qr_codes. Conserva el id
+    original para poder relacionarlos con el registro de cambios.
+    """
+    __tablename__ = "qr_codes_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    code = Column(String, nullable=False)
+    user_id = Column(Integer, nullable=True)
+    visitor_id = Column(Integer, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=True)
+    expires_at = Column(DateTime(timezone=True), nullable=True)
+    archived_at = Column(DateTime(timezone=True), default=func.now(), nullable=False)
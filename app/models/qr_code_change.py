@@ -0,0 +1,65 @@
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, event, insert, select, func
+from sqlalchemy.orm import Session, object_session
+from datetime import datetime
+from typing import List
+from app.database.connection import Base
+from app.models.qr_code import QRCode
+
+class QRCodeChange(Base):
+    """
+    Registro de cambios de qr_codes. El id autoincremental es la versión que usan
+    los agentes de portería para sincronizar por deltas (GET /qr-codes/changes).
+
+    Los ids se asignan al insertar y no en orden de confirmación: una transacción
+    lenta puede confirmar un id menor que la versión que un lector ya alcanzó. Por
+    eso los lectores vuelven a leer el estado de los códigos cambiados en una ventana
+    reciente (latest_changes_since).
+    """
+    __tablename__ = "qr_code_changes"
+
+    id = Column(Integer, primary_key=True, index=True)
+    qr_code_id = Column(Integer, nullable=False, index=True)
+    code = Column(String, nullable=False)
+    person_type = Column(String(10), nullable=False)
+    person_id = Column(Integer, nullable=False)
+    is_active = Column(Boolean, nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=True)
+    changed_at = Column(DateTime(timezone=True), default=func.now(), nullable=False)
+
+
+def latest_changes_since(db: Session, cutoff: datetime) -> List[QRCodeChange]:
+    """
+    Último cambio (estado actual) de cada código con algún cambio desde cutoff. Como
+    devuelve estados y no eventos, volver a aplicarlo es idempotente y no puede
+    reemplazar un estado nuevo por uno viejo.
+    """
+    recent = db.query(QRCodeChange.qr_code_id).filter(QRCodeChange.changed_at >= cutoff).distinct().subquery()
+    latest = db.query(func.max(QRCodeChange.id)).filter(
+        QRCodeChange.qr_code_id.in_(select(recent.c.qr_code_id))
+    ).group_by(QRCodeChange.qr_code_id).subquery()
+    return db.query(QRCodeChange).filter(QRCodeChange.id.in_(select(latest))).order_by(QRCodeChange.id).all()
+
+
+def qr_change_values(qr_code: QRCode) -> dict:
+    return {
+        "qr_code_id": qr_code.id,
+        "code": qr_code.code,
+        "person_type": "employee" if qr_code.user_id else "visitor",
+        "person_id": qr_code.user_id if qr_code.user_id else qr_code.visitor_id,
+        "is_active": bool(qr_code.is_active),
+        "expires_at": qr_code.expires_at,
+    }
+
+
+# Cada alta o modificación de un QRCode por el ORM deja su estado en el registro de
+# cambios, dentro de la misma transacción. Las actualizaciones masivas (query.update)
+# no disparan estos eventos y deben insertar sus propios cambios
+@event.listens_for(QRCode, "after_insert")
+def _record_qr_insert(mapper, connection, target):
+    connection.execute(insert(QRCodeChange.__table__).values(**qr_change_values(target)))
+
+
+@event.listens_for(QRCode, "after_update")
+def _record_qr_update(mapper, connection, target):
+    if object_session(target).is_modified(target, include_collections=False):
+        connection.execute(insert(QRCodeChange.__table__).values(**qr_change_values(target)))
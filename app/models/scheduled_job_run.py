@@ -0,0 +1,17 @@
+from sqlalchemy import Column, String, DateTime, Float
+from app.database.connection import Base
+
+class ScheduledJobRun(Base):
+    """
+    Última ejecución de cada tarea programada. Con varios workers, el que obtiene el
+    bloqueo de la tarea consulta esta tabla para no repetir una ejecución que otro
+    worker ya hizo para el mismo disparo.
+    """
+    __tablename__ = "scheduled_job_runs"
+
+    job_id = Column(String(100), primary_key=True)
+    started_at = Column(DateTime(timezone=True), nullable=False)
+    finished_at = Column(DateTime(timezone=True))
+    duration_seconds = Column(Float)
+    status = Column(String(20), nullable=False)
+    worker = Column(String(100))
@@ -0,0 +1,87 @@
+from sqlalchemy import Column, Integer, String, DateTime, event, insert, update, select, func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import Optional, Tuple
+from app.database.connection import Base
+from app.models.user import User
+from app.models.visitor import Visitor
+
+class TableVersion(Base):
+    """
+    Versión de cada tabla del directorio (usuarios y visitantes). Se incrementa en cada
+    alta, modificación o baja y sirve de validador HTTP (ETag/Last-Modified) de los listados.
+    """
+    __tablename__ = "table_versions"
+
+    table_name = Column(String(50), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), default=func.now(), nullable=False)
+
+
+VERSIONED_MODELS = (User, Visitor)
+
+# INSERT ... ON CONFLICT según el motor
+_CONFLICT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+@event.listens_for(TableVersion.__table__, "after_create")
+def _seed_table_versions(target, connection, **kw):
+    # Filas iniciales: el primer cambio de cada tabla solo tiene que actualizar su fila
+    connection.execute(insert(target), [
+        {"table_name": model.__tablename__, "version": 0} for model in VERSIONED_MODELS
+    ])
+
+
+def get_table_version(db: Session, table_name: str) -> Tuple[int, Optional[datetime]]:
+    """Versión y fecha del último cambio de una tabla ((0, None) si nunca cambió)."""
+    row = db.execute(
+        select(TableVersion.version, TableVersion.updated_at).where(TableVersion.table_name == table_name)
+    ).first()
+    return (row[0], row[1]) if row else (0, None)
+
+
+def _bump_table_version(connection, table_name: str):
+    table = TableVersion.__table__
+    conflict_insert = _CONFLICT_INSERTS.get(connection.dialect.name)
+    if conflict_insert is not None:
+        # Upsert atómico: dos primeras escrituras concurrentes no chocan en la clave primaria
+        statement = conflict_insert(table).values(table_name=table_name, version=1, updated_at=func.now())
+        connection.execute(statement.on_conflict_do_update(
+            index_elements=["table_name"],
+            set_={"version": table.c.version + 1, "updated_at": func.now()}
+        ))
+        return
+
+    # Otros motores: las filas iniciales se crean con la tabla
+    result = connection.execute(
+        update(table)
+        .where(table.c.table_name == table_name)
+        .values(version=table.c.version + 1, updated_at=func.now())
+    )
+    if result.rowcount == 0:
+        connection.execute(insert(table).values(table_name=table_name, version=1))
+
+
+# Un incremento por tabla y flush (no por fila), dentro de la misma transacción que el
+# cambio. Igual que el registro de cambios de QR, las operaciones masivas
+# (query.update / query.delete) no pasan por aquí y deben incrementar la versión ellas mismas
+@event.listens_for(Session, "after_flush")
+def _record_table_versions(session, flush_context):
+    tables = set()
+    for instance in session.new:
+        if isinstance(instance, VERSIONED_MODELS):
+            tables.add(instance.__tablename__)
+    for instance in session.deleted:
+        if isinstance(instance, VERSIONED_MODELS):
+            tables.add(instance.__tablename__)
+    for instance in session.dirty:
+        if isinstance(instance, VERSIONED_MODELS) and session.is_modified(instance, include_collections=False):
+            tables.add(instance.__tablename__)
+    if tables:
+        connection = session.connection()
+        for table_name in sorted(tables):
+            _bump_table_version(connection, table_name)
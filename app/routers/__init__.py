@@ -2,10 +2,14 @@ from app.routers.users import router as users_router
 from app.routers.visitors import router as visitors_router
 from app.routers.access_logs import router as access_logs_router
 from app.routers.incidents import router as incidents_router
+from app.routers.reports import router as reports_router
+from app.routers.people import router as people_router
 
 __all__ = [
     "users_router",
     "visitors_router",
     "access_logs_router",
-    "incidents_router"
+    "incidents_router",
+    "reports_router",
+    "people_router"
 ]
@@ -1,12 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import text
+from sqlalchemy import select, func, and_
 from typing import List, Dict
 from datetime import date
+from itertools import chain, islice
+import asyncio
+import csv
+import heapq
+import io
 
 from app import models, schemas
-from app.database import get_db
+from app.database import get_db, get_read_db
+from app.database.connection import SessionLocal, ReplicaSessionLocal, reads_from_primary
 from app.config.messages import AccessLogMessages
+from app.services.serialization_service import schema_columns, json_response
+from app.services.presence_service import presence
+from app.services.live_feed_service import live_feed, event_data, next_event
+from app.services.person_service import get_person_details
+from app.services.access_log_service import insert_access_logs
+from app.services.report_service import invalidate_daily_summaries
+from app.services.archive_service import archive_boundary, iter_archived_access_logs, iter_archived_parts, sort_time
+from app.services.bulk_import_service import import_access_logs, find_missing_persons, FORMATS
 
 router = APIRouter(
     prefix="/access-logs",
@@ -40,8 +55,16 @@ def create_access_log(access_log: schemas.AccessLogCreate, db: Session = Depends
 
         db_access_log = models.AccessLog(**access_log.model_dump())
         db.add(db_access_log)
+        invalidate_daily_summaries(db, [db_access_log.workday_date])
         db.commit()
         db.refresh(db_access_log)
+        presence.record(db_access_log.person_type, db_access_log.person_id,
+                        db_access_log.access_type, db_access_log.access_time)
+        live_feed.publish_access_logs(db, [(
+            db_access_log.id, db_access_log.person_type, db_access_log.person_id,
+            db_access_log.access_type, db_access_log.access_time, db_access_log.workday_date,
+            db_access_log.site_id, db_access_log.gate_id
+        )])
         return db_access_log
     except HTTPException:
         # Re-raise HTTP exceptions
@@ -58,81 +81,387 @@ def create_access_log(access_log: schemas.AccessLogCreate, db: Session = Depends
             detail=f"Error al crear el registro de acceso: {error_message}"
         )
 
+@router.post("/batch", response_model=schemas.AccessLogBatchResult)
+def create_access_logs_batch(access_logs: List[schemas.AccessLogBatchItem], db: Session = Depends(get_db)):
+    """
+    Insert a batch of access logs recorded offline (e.g. by a gate agent) in a single
+    multi-row INSERT. Persons are validated set-wise; entries whose person no longer
+    exists are skipped and reported by index instead of failing the whole batch.
+    Items with an event_id that is already registered are ignored, so re-uploading
+    a batch is safe.
+    """
+    persons = {'employee': set(), 'visitor': set()}
+    for access_log in access_logs:
+        persons[access_log.person_type].add(access_log.person_id)
+    missing = find_missing_persons(db, persons)
+
+    rows, rejected = [], []
+    for index, access_log in enumerate(access_logs):
+        if (access_log.person_type, access_log.person_id) in missing:
+            rejected.append(index)
+        else:
+            rows.append(access_log.model_dump())
+
+    inserted = []
+    if rows:
+        ids = insert_access_logs(db, rows)
+        db.commit()
+        inserted = [(id_, row) for id_, row in zip(ids, rows) if id_ is not None]
+        for _, row in inserted:
+            presence.record(row["person_type"], row["person_id"], row["access_type"], row["access_time"])
+        live_feed.publish_access_logs(db, [
+            (id_, *(row[column] for column in ARCHIVE_COLUMNS[1:]))
+            for id_, row in inserted
+        ])
+    return {"inserted": len(inserted), "rejected": rejected, "duplicates": len(rows) - len(inserted)}
+
 @router.get("/", response_model=List[schemas.AccessLog])
 def get_access_logs(
     skip: int = 0,
     limit: int = 100,
     workday_date: date = None,
-    db: Session = Depends(get_db)
+    site_id: str = None,
+    db: Session = Depends(get_read_db)
 ):
-    query = db.query(models.AccessLog)
+    # Select plain columns and serialize them directly, skipping ORM objects
+    # and response_model re-validation
+    columns = schema_columns(models.AccessLog, schemas.AccessLog)
+    query = db.query(*columns)
+    if site_id:
+        query = query.filter(models.AccessLog.site_id == site_id)
     if workday_date:
         query = query.filter(models.AccessLog.workday_date == workday_date)
-    access_logs = query.offset(skip).limit(limit).all()
-    return access_logs
+        boundary = archive_boundary()
+        if boundary and workday_date < boundary:
+            # Archived workday: Parquet rows first, then any late rows still in the table
+            archived = (
+                # The archive does not keep event_id
+                dict(zip(ARCHIVE_COLUMNS, row), event_id=None)
+                for row in iter_archived_access_logs(date_from=workday_date, date_to=workday_date, site_id=site_id)
+            )
+            hot = (row._asdict() for row in query)
+            return json_response(list(islice(chain(archived, hot), skip, skip + limit)))
+    rows = query.offset(skip).limit(limit).all()
+    return json_response([row._asdict() for row in rows])
+
+# Base SELECT for the detailed listing, built once at import time. Filters and
+# pagination are added as bound parameters, so user input is never interpolated
+# into the SQL and SQLAlchemy reuses the compiled statement for each filter
+# combination. psycopg2 does not prepare statements server-side: PostgreSQL still
+# plans every execution.
+_acl = models.AccessLog.__table__
+_us = models.User.__table__
+_vis = models.Visitor.__table__
+
+DETAILED_ACCESS_LOGS_QUERY = (
+    select(
+        _acl.c.id,
+        _acl.c.person_type,
+        _acl.c.person_id,
+        _acl.c.access_type.label("action_type"),
+        _acl.c.access_time.label("timestamp"),
+        _acl.c.workday_date,
+        _acl.c.site_id,
+        _acl.c.gate_id,
+        func.coalesce(_us.c.first_name, _vis.c.first_name).label("first_name"),
+        func.coalesce(_us.c.last_name, _vis.c.last_name).label("last_name"),
+        func.coalesce(_us.c.document_number, _vis.c.document_number).label("document_number"),
+        func.coalesce(_us.c.email, _vis.c.email).label("email"),
+    )
+    .select_from(
+        _acl
+        .outerjoin(_us, and_(_acl.c.person_type == "employee", _acl.c.person_id == _us.c.id))
+        .outerjoin(_vis, and_(_acl.c.person_type == "visitor", _acl.c.person_id == _vis.c.id))
+    )
+)
+
+ARCHIVE_COLUMNS = ("id", "person_type", "person_id", "access_type", "access_time", "workday_date", "site_id", "gate_id")
+
+def _detailed_item(id_, person_type, person_id, action_type, timestamp, workday_date, site_id, gate_id, person_details):
+    return {
+        "id": id_,
+        "person_type": person_type,
+        "person_id": person_id,
+        "action_type": action_type,
+        "timestamp": timestamp,
+        "workday_date": workday_date,
+        "site_id": site_id,
+        "gate_id": gate_id,
+        "person_details": person_details
+    }
+
+def _merge_archived_detailed(db, query, skip, limit, date_from, date_to, person_type, person_id, access_type, site_id):
+    """
+    Page of the detailed listing for a date range that reaches archived months: the
+    newest skip+limit rows of each source are merged by access_time.
+    """
+    window = skip + limit
+    hot = [
+        _detailed_item(id_, person_type_, person_id_, action_type, timestamp, workday_date_, site_id_, gate_id, {
+            "first_name": first_name,
+            "last_name": last_name,
+            "document_number": document_number,
+            "email": email
+        })
+        for (id_, person_type_, person_id_, action_type, timestamp, workday_date_, site_id_, gate_id,
+             first_name, last_name, document_number, email)
+        in db.execute(query.order_by(_acl.c.access_time.desc()).limit(window)).tuples()
+    ]
+    archived = heapq.nlargest(
+        window,
+        iter_archived_access_logs(date_from, date_to, person_type, person_id, access_type, site_id),
+        key=lambda row: row[4]
+    )
+    persons = get_person_details(db, ((row[1], row[2]) for row in archived))
+    empty = {"first_name": None, "last_name": None, "document_number": None, "email": None}
+    archived = [_detailed_item(*row, persons.get((row[1], row[2]), empty)) for row in archived]
+
+    merged = heapq.merge(hot, archived, key=lambda item: sort_time(item["timestamp"]), reverse=True)
+    return list(islice(merged, skip, window))
 
 @router.get("/detailed", response_model=List[schemas.AccessLogDetailed])
 def get_detailed_access_logs(
     skip: int = 0,
     limit: int = 100,
     workday_date: date = None,
-    db: Session = Depends(get_db)
+    date_from: date = None,
+    date_to: date = None,
+    person_type: str = None,
+    person_id: int = None,
+    access_type: str = None,
+    site_id: str = None,
+    db: Session = Depends(get_read_db)
 ):
     """
     Get access logs with detailed person information (employee or visitor).
     This endpoint performs a LEFT JOIN to retrieve user or visitor details along with access logs.
+    Results can be narrowed by workday date (exact or range), person, access type and site.
     """
-    # Build the base query
-    query = """
-        SELECT 
-            acl.id, 
-            acl.person_type, 
-            acl.person_id, 
-            acl.access_type as action_type, 
-            acl.access_time as timestamp, 
-            acl.workday_date,
-            COALESCE(us.first_name, vis.first_name) AS first_name,
-            COALESCE(us.last_name, vis.last_name) AS last_name,
-            COALESCE(us.document_number, vis.document_number) AS document_number,
-            COALESCE(us.email, vis.email) AS email
-        FROM access_logs acl
-        LEFT JOIN users us ON acl.person_type = 'employee' AND acl.person_id = us.id
-        LEFT JOIN visitors vis ON acl.person_type = 'visitor' AND acl.person_id = vis.id
-    """
-    
-    # Add filter for workday_date if provided
+    if person_type is not None and person_type not in ['employee', 'visitor']:
+        raise HTTPException(
+            status_code=400,
+            detail=AccessLogMessages.ERROR_INVALID_PERSON_TYPE
+        )
+    if access_type is not None and access_type not in ['entry', 'exit']:
+        raise HTTPException(
+            status_code=400,
+            detail=AccessLogMessages.ERROR_INVALID_ACCESS_TYPE
+        )
+
+    query = DETAILED_ACCESS_LOGS_QUERY
     if workday_date:
-        query += f" WHERE acl.workday_date = '{workday_date}'"
-    
+        query = query.where(_acl.c.workday_date == workday_date)
+    if date_from:
+        query = query.where(_acl.c.workday_date >= date_from)
+    if date_to:
+        query = query.where(_acl.c.workday_date <= date_to)
+    if person_type:
+        query = query.where(_acl.c.person_type == person_type)
+    if person_id is not None:
+        query = query.where(_acl.c.person_id == person_id)
+    if access_type:
+        query = query.where(_acl.c.access_type == access_type)
+    if site_id:
+        query = query.where(_acl.c.site_id == site_id)
+
+    range_from = workday_date or date_from
+    boundary = archive_boundary()
+    if boundary and range_from and range_from < boundary:
+        return json_response(_merge_archived_detailed(
+            db, query, skip, limit, range_from, workday_date or date_to, person_type, person_id, access_type, site_id
+        ))
+
     # Add pagination
-    query += f" ORDER BY acl.access_time DESC LIMIT {limit} OFFSET {skip}"
-    
+    query = query.order_by(_acl.c.access_time.desc()).limit(limit).offset(skip)
+
     # Execute the query
-    result = db.execute(text(query))
+    result = db.execute(query)
     
-    # Convert the result to a list of dictionaries
-    detailed_logs = []
-    for row in result:
-        log = {
-            "id": row.id,
-            "person_type": row.person_type,
-            "person_id": row.person_id,
-            "action_type": row.action_type,
-            "timestamp": row.timestamp,
-            "workday_date": row.workday_date,
+    # Serialize the rows straight to JSON bytes (no response_model validation)
+    detailed_logs = [
+        {
+            "id": id_,
+            "person_type": person_type,
+            "person_id": person_id,
+            "action_type": action_type,
+            "timestamp": timestamp,
+            "workday_date": workday_date_,
+            "site_id": site_id_,
+            "gate_id": gate_id,
             "person_details": {
-                "first_name": row.first_name,
-                "last_name": row.last_name,
-                "document_number": row.document_number,
-                "email": row.email
+                "first_name": first_name,
+                "last_name": last_name,
+                "document_number": document_number,
+                "email": email
             }
         }
-        detailed_logs.append(log)
+        for (id_, person_type, person_id, action_type, timestamp, workday_date_, site_id_, gate_id,
+             first_name, last_name, document_number, email) in result.tuples()
+    ]
     
-    return detailed_logs
+    return json_response(detailed_logs)
+
+@router.get("/stream")
+async def stream_access_logs(request: Request, site_id: str = None):
+    """
+    Live feed of access events as server-sent events, in the same format as
+    /access-logs/detailed. Replaces polling the detailed listing: events are pushed
+    by the scan and access-log endpoints without touching the database.
+    With site_id only that site's events are sent.
+    """
+    subscriber = live_feed.subscribe(site_id)
+
+    async def events():
+        try:
+            yield b"retry: 3000\n\n"
+            while not await request.is_disconnected():
+                event = await next_event(subscriber, timeout=15)
+                # Comment line as keepalive so proxies do not close an idle stream
+                yield event if event is not None else b": keepalive\n\n"
+        finally:
+            live_feed.unsubscribe(subscriber)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.websocket("/ws")
+async def access_logs_websocket(websocket: WebSocket, site_id: str = None):
+    """
+    Live feed of access events over WebSocket (one JSON message per event).
+    Waits for events and client messages at the same time, so a client that
+    disconnects while no events arrive is unsubscribed right away.
+    """
+    await websocket.accept()
+    subscriber = live_feed.subscribe(site_id)
+    receive = asyncio.ensure_future(websocket.receive())
+    next_message = asyncio.ensure_future(subscriber.queue.get())
+    try:
+        while True:
+            await asyncio.wait({receive, next_message}, return_when=asyncio.FIRST_COMPLETED)
+            if receive.done():
+                if receive.result()["type"] == "websocket.disconnect":
+                    break
+                # Messages from the client are ignored
+                receive = asyncio.ensure_future(websocket.receive())
+            if next_message.done():
+                await websocket.send_text(event_data(next_message.result()).decode())
+                next_message = asyncio.ensure_future(subscriber.queue.get())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receive.cancel()
+        next_message.cancel()
+        live_feed.unsubscribe(subscriber)
+
+def export_query(date_from: date = None, date_to: date = None, person_type: str = None,
+                 person_id: int = None, site_id: str = None):
+    """Table rows of the CSV export, in chronological order."""
+    query = select(*(getattr(models.AccessLog, column) for column in ARCHIVE_COLUMNS))
+    if date_from:
+        query = query.where(models.AccessLog.workday_date >= date_from)
+    if date_to:
+        query = query.where(models.AccessLog.workday_date <= date_to)
+    if person_type:
+        query = query.where(models.AccessLog.person_type == person_type)
+    if person_id is not None:
+        query = query.where(models.AccessLog.person_id == person_id)
+    if site_id:
+        query = query.where(models.AccessLog.site_id == site_id)
+    return query.order_by(models.AccessLog.access_time, models.AccessLog.id)
+
+@router.get("/export")
+def export_access_logs(
+    request: Request,
+    date_from: date = None,
+    date_to: date = None,
+    person_type: str = None,
+    person_id: int = None,
+    site_id: str = None
+):
+    """
+    Export access logs as CSV, streamed in chronological order. Ranges that reach
+    archived months merge the Parquet parts (each already sorted by access_time)
+    with the table rows, which may include late rows of archived months.
+    """
+    if person_type is not None and person_type not in ['employee', 'visitor']:
+        raise HTTPException(
+            status_code=400,
+            detail=AccessLogMessages.ERROR_INVALID_PERSON_TYPE
+        )
+
+    def rows():
+        # The request session is closed once the response starts, so the stream uses its own
+        db = SessionLocal() if reads_from_primary(request) else ReplicaSessionLocal()
+        try:
+            query = export_query(date_from, date_to, person_type, person_id, site_id)
+            hot = db.execute(query.execution_options(yield_per=10000)).tuples()
+
+            boundary = archive_boundary()
+            if not boundary or (date_from is not None and date_from >= boundary):
+                yield from hot
+                return
+            parts = iter_archived_parts(date_from, date_to, person_type, person_id, site_id=site_id)
+            yield from heapq.merge(*parts, hot, key=lambda row: (sort_time(row[4]), row[0]))
+        finally:
+            db.close()
+
+    def csv_lines():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(ARCHIVE_COLUMNS)
+        for count, row in enumerate(rows(), start=1):
+            writer.writerow(row[:4] + (row[4].isoformat(), row[5].isoformat()) + tuple(row[6:]))
+            if count % 1000 == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    return StreamingResponse(
+        csv_lines(),
+        media_type="text/csv",
+        headers={"Content-Disposition": "attachment; filename=access_logs.csv"}
+    )
+
+@router.post("/import", response_model=schemas.ImportJob, tags=["Admin"])
+def import_access_logs_file(
+    format: str = "csv",
+    job_name: str = None,
+    skip_invalid: bool = False,
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db)
+):
+    """
+    Bulk import of historical access logs (CSV with header or NDJSON) through COPY.
+    Person ids are validated set-wise before loading. Re-sending the same file with
+    the same job_name resumes a failed import from the last committed batch.
+    """
+    if format not in FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=AccessLogMessages.ERROR_IMPORT_INVALID_FORMAT
+        )
+    try:
+        return import_access_logs(db, file.file, format, job_name or file.filename, skip_invalid)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/import/{job_name}", response_model=schemas.ImportJob, tags=["Admin"])
+def get_import_job(job_name: str, db: Session = Depends(get_db)):
+    # Polled while the import runs: read from the primary, not the (lagging) replica
+    job = db.query(models.ImportJob).filter(models.ImportJob.name == job_name).first()
+    if not job:
+        raise HTTPException(
+            status_code=404,
+            detail=AccessLogMessages.ERROR_IMPORT_JOB_NOT_FOUND
+        )
+    return job
 
 @router.get("/{access_log_id}", response_model=schemas.AccessLog)
-def get_access_log(access_log_id: int, db: Session = Depends(get_db)):
+def get_access_log(access_log_id: int, db: Session = Depends(get_read_db)):
     access_log = db.query(models.AccessLog).filter(models.AccessLog.id == access_log_id).first()
     if not access_log:
         raise HTTPException(
@@ -151,9 +480,12 @@ def update_access_log(access_log_id: int, access_log: schemas.AccessLogUpdate, d
         )
 
     update_data = access_log.model_dump(exclude_unset=True)
+    previous_workday_date = db_access_log.workday_date
     for field, value in update_data.items():
         setattr(db_access_log, field, value)
 
+    # The old and the new workday lose their stored summaries
+    invalidate_daily_summaries(db, {previous_workday_date, db_access_log.workday_date})
     db.commit()
     db.refresh(db_access_log)
     return db_access_log
@@ -168,6 +500,7 @@ def delete_access_log(access_log_id: int, db: Session = Depends(get_db)):
         )
     
     db.delete(db_access_log)
+    invalidate_daily_summaries(db, [db_access_log.workday_date])
     db.commit()
     
     return {"message": AccessLogMessages.SUCCESS_ACCESS_LOG_DELETED}
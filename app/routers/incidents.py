@@ -1,10 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import List, Dict
+from datetime import datetime
 
 from app import models, schemas
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.config.messages import IncidentMessages
+from app.services.anomaly_service import anomaly_detector
 
 router = APIRouter(
     prefix="/incidents",
@@ -31,6 +33,7 @@ def create_incident(incident: schemas.IncidentCreate, db: Session = Depends(get_
         db.add(db_incident)
         db.commit()
         db.refresh(db_incident)
+        anomaly_detector.observe_incident(db_incident.incident_type, db_incident.person_type, db_incident.person_id)
         return db_incident
     except Exception as e:
         db.rollback()
@@ -42,18 +45,25 @@ def get_incidents(
     limit: int = 100,
     incident_type: str = None,
     person_type: str = None,
-    db: Session = Depends(get_db)
+    reported_from: datetime = None,
+    reported_to: datetime = None,
+    db: Session = Depends(get_read_db)
 ):
     query = db.query(models.Incident)
     if incident_type:
         query = query.filter(models.Incident.incident_type == incident_type)
     if person_type:
         query = query.filter(models.Incident.person_type == person_type)
+    # reported_at range (uses ix_incidents_reported_at)
+    if reported_from:
+        query = query.filter(models.Incident.reported_at >= reported_from)
+    if reported_to:
+        query = query.filter(models.Incident.reported_at < reported_to)
     incidents = query.offset(skip).limit(limit).all()
     return incidents
 
 @router.get("/{incident_id}", response_model=schemas.Incident)
-def get_incident(incident_id: int, db: Session = Depends(get_db)):
+def get_incident(incident_id: int, db: Session = Depends(get_read_db)):
     incident = db.query(models.Incident).filter(models.Incident.id == incident_id).first()
     if not incident:
         raise HTTPException(
@@ -0,0 +1,53 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import List
+
+from app import schemas
+from app.database import get_read_db
+from app.config.messages import PersonMessages
+from app.services.person_service import get_person_details
+from app.services.serialization_service import json_response, MAX_BATCH_IDS
+
+router = APIRouter(
+    prefix="/people",
+    tags=["people"],
+    responses={404: {"description": "Not found"}},
+)
+
+def _parse_person_keys(keys: str):
+    """Parse "employee:1,visitor:7" into unique (person_type, person_id) pairs."""
+    pairs = {}
+    for item in keys.split(","):
+        if not item.strip():
+            continue
+        person_type, _, person_id = item.strip().partition(":")
+        if person_type not in ('employee', 'visitor'):
+            raise ValueError(item)
+        pairs[(person_type, int(person_id))] = None
+    if not pairs or len(pairs) > MAX_BATCH_IDS:
+        raise ValueError(keys)
+    return list(pairs)
+
+@router.get("/resolve", response_model=List[schemas.ResolvedPerson])
+def resolve_people(
+    keys: str = Query(..., description="Comma-separated person_type:person_id pairs, e.g. employee:1,visitor:7"),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Resolve a mixed list of employees and visitors (e.g. the people of a page of access
+    logs) in one request, with one IN query per person type. Unknown people are omitted.
+    """
+    try:
+        pairs = _parse_person_keys(keys)
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail=PersonMessages.ERROR_INVALID_PERSON_KEYS.format(max=MAX_BATCH_IDS)
+        )
+
+    details = get_person_details(db, pairs)
+    return json_response([
+        {"person_type": person_type, "person_id": person_id, **details[(person_type, person_id)]}
+        for person_type, person_id in pairs
+        if (person_type, person_id) in details
+    ])
@@ -1,15 +1,28 @@
 import io
 from datetime import datetime, timedelta, timezone
-from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status, UploadFile, File
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from app.database.connection import get_db
+from app.database.connection import get_db, get_read_db
 from app.models.qr_code import QRCode
 from app.models.user import User
 from app.models.visitor import Visitor
-from app.models.access_log import AccessLog
-from app.schemas.qr_code import QRCodeCreate, QRCodeResponse, QRCodeScan
+from app.models.qr_code_change import QRCodeChange, latest_changes_since
+from app.schemas.qr_code import QRCodeCreate, QRCodeResponse, QRCodeScan, QRCodeChanges
+from app.services.serialization_service import json_response, parse_id_list, MAX_BATCH_IDS
+from app.config.messages import PersonMessages
+from app.services.metrics_service import record_scan
+from app.services.presence_service import presence, DUPLICATE, PASSBACK
+from app.services.live_feed_service import live_feed
+from app.services.access_log_service import insert_access_logs
+from app.services.anomaly_service import anomaly_detector
+from app.services.incident_writer_service import incident_writer
+from app.services.qr_token_service import (
+    signing_enabled, is_signed_token, sign_qr_token, verify_qr_token, qr_revocations,
+    QR_CHANGES_REPLAY_SECONDS
+)
+import time
 import uuid
 # Importaremos PIL y otras bibliotecas solo cuando sean necesarias
 
@@ -20,6 +33,108 @@ router = APIRouter(
 )
 
 
+def _qr_code_response(qr_code: QRCode) -> QRCodeResponse:
+    """Add the signed token to the response when QR signing is configured."""
+    response = QRCodeResponse.model_validate(qr_code)
+    if signing_enabled():
+        response.token = sign_qr_token(qr_code)
+    return response
+
+
+def _scan_rejected(outcome: str, status_code: int, detail: str, code: Optional[str] = None,
+                   person_type: Optional[str] = None, person_id: Optional[int] = None) -> HTTPException:
+    """
+    Count a rejected scan (metrics and anomaly detectors), queue its incident and build
+    the error response. The incident is written in the background, off the scan path.
+    """
+    record_scan(outcome)
+    anomaly_detector.observe_scan(outcome, code, person_type, person_id)
+    incident_writer.submit(
+        person_type,
+        person_id,
+        "denied_access" if outcome == "passback" else "invalid_qr",
+        f"Escaneo rechazado ({outcome}): {detail}" + (f" [código {code[:64]}]" if code else "")
+    )
+    return HTTPException(status_code=status_code, detail=detail)
+
+
+def _check_signed_token(token: str):
+    """Validate a signed QR token in memory: signature, revocation and expiry."""
+    try:
+        signed = verify_qr_token(token)
+    except ValueError:
+        raise _scan_rejected("unknown", status.HTTP_404_NOT_FOUND, "Invalid QR code", token)
+
+    if signed.qr_id in qr_revocations:
+        raise _scan_rejected("inactive", status.HTTP_400_BAD_REQUEST, "QR code is not active",
+                             token, signed.person_type, signed.person_id)
+
+    if signed.expires_at and signed.expires_at < time.time():
+        raise _scan_rejected("expired", status.HTTP_400_BAD_REQUEST, "QR code has expired",
+                             token, signed.person_type, signed.person_id)
+
+    return signed.person_type, signed.person_id
+
+
+def _find_qr_code(db: Session, code: str) -> Optional[QRCode]:
+    # Active codes are served by the small partial index ix_qr_codes_active_code;
+    # the full lookup only runs for rejected scans, to pick the error message
+    qr_code = db.query(QRCode).filter(QRCode.code == code, QRCode.is_active == True).first()
+    if qr_code is None:
+        qr_code = db.query(QRCode).filter(QRCode.code == code).first()
+    return qr_code
+
+
+def _duplicate_scan(access_type: str):
+    record_scan("duplicate")
+    return {"message": f"Duplicate {access_type} scan ignored", "access_type": access_type, "duplicate": True}
+
+
+def _register_access(db: Session, person_type: str, person_id: int, access_type: Optional[str],
+                     site_id: Optional[str] = None, gate_id: Optional[str] = None, event_id: Optional[str] = None):
+    # Debounce, anti-passback and access_type inference use the in-memory presence state
+    now = datetime.now(timezone.utc)
+    previous = presence.last_event(person_type, person_id)
+    access_type, outcome = presence.admit(person_type, person_id, access_type, now, event_id)
+    if outcome == DUPLICATE:
+        return _duplicate_scan(access_type)
+    if outcome == PASSBACK:
+        raise _scan_rejected("passback", status.HTTP_409_CONFLICT,
+                             f"Anti-passback: the last access registered was already an {access_type}",
+                             person_type=person_type, person_id=person_id)
+
+    row = {
+        "person_type": person_type,
+        "person_id": person_id,
+        "access_type": access_type,
+        "access_time": now,
+        "workday_date": now.date(),
+        "site_id": site_id,
+        "gate_id": gate_id,
+        "event_id": event_id
+    }
+    # Single INSERT ... ON CONFLICT (event_id) DO NOTHING: a retried event_id inserts nothing
+    try:
+        (access_log_id,) = insert_access_logs(db, [row])
+        db.commit()
+    except Exception:
+        # The access was not stored: undo admit() so the next scan is not taken as a duplicate
+        db.rollback()
+        presence.restore(person_type, person_id, previous, now, event_id)
+        raise
+    if access_log_id is None:
+        # Already registered (e.g. the first attempt reached another worker)
+        presence.restore(person_type, person_id, previous, now)
+        return _duplicate_scan(access_type)
+
+    record_scan("accepted")
+    live_feed.publish_access_logs(db, [
+        (access_log_id, person_type, person_id, access_type, now, row["workday_date"], site_id, gate_id)
+    ])
+
+    return {"message": f"Access {access_type} registered successfully", "access_type": access_type}
+
+
 @router.post("/generate/user/{user_id}", response_model=QRCodeResponse)
 def generate_qr_code_for_user(
     user_id: int,
@@ -52,7 +167,7 @@ def generate_qr_code_for_user(
     db.commit()
     db.refresh(qr_code)
     
-    return qr_code
+    return _qr_code_response(qr_code)
 
 
 @router.post("/generate/visitor/{visitor_id}", response_model=QRCodeResponse)
@@ -87,7 +202,114 @@ def generate_qr_code_for_visitor(
     db.commit()
     db.refresh(qr_code)
     
-    return qr_code
+    return _qr_code_response(qr_code)
+
+
+@router.get("/", response_model=List[QRCodeResponse])
+def get_qr_codes(
+    ids: str = Query(..., description="Comma-separated QR code ids"),
+    db: Session = Depends(get_read_db),
+):
+    """Get several QR codes by id in one request (a single IN query)."""
+    try:
+        id_list = parse_id_list(ids)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=PersonMessages.ERROR_INVALID_IDS.format(max=MAX_BATCH_IDS),
+        )
+    qr_codes = db.query(QRCode).filter(QRCode.id.in_(id_list)).order_by(QRCode.id).all()
+    return [_qr_code_response(qr_code) for qr_code in qr_codes]
+
+
+@router.get("/changes", response_model=QRCodeChanges)
+def get_qr_code_changes(
+    since: int = 0,
+    limit: int = 1000,
+    db: Session = Depends(get_read_db),
+):
+    """
+    Delta feed of QR code activations, deactivations and expiries since a version.
+    Gate agents keep the returned version and poll with it; when has_more is true
+    they should call again right away with the new version.
+    """
+    changes = (
+        db.query(QRCodeChange)
+        .filter(QRCodeChange.id > since)
+        .order_by(QRCodeChange.id)
+        .limit(limit + 1)
+        .all()
+    )
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    version = changes[-1].id if changes else since
+
+    # Ids are not assigned in commit order: a slow transaction can commit a change below
+    # a version the agent already has. Resend the current state of recently changed codes
+    replayed = []
+    if since:
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=QR_CHANGES_REPLAY_SECONDS)
+        replayed = latest_changes_since(db, cutoff)
+
+    # Only the latest state of each code matters to the replica
+    latest = {}
+    for change in sorted(changes + replayed, key=lambda change: change.id):
+        latest[change.qr_code_id] = change
+
+    # Codes that reached expires_at since the requested version without any row change
+    expired = []
+    if since and not has_more:
+        since_time = db.query(QRCodeChange.changed_at).filter(QRCodeChange.id == since).scalar()
+        if since_time:
+            expired = [
+                code for (code,) in db.query(QRCode.code).filter(
+                    QRCode.is_active == True,
+                    QRCode.expires_at > since_time,
+                    QRCode.expires_at <= datetime.now(timezone.utc),
+                )
+            ]
+
+    return json_response({
+        "version": version,
+        "has_more": has_more,
+        "changes": [
+            {
+                "version": change.id,
+                "qr_code_id": change.qr_code_id,
+                "code": change.code,
+                "person_type": change.person_type,
+                "person_id": change.person_id,
+                "is_active": change.is_active,
+                "expires_at": change.expires_at,
+                "change_type": "activation" if change.is_active else "deactivation",
+            }
+            for change in latest.values()
+        ],
+        "expired": expired,
+    })
+
+
+@router.post("/{qr_code_id}/deactivate", response_model=QRCodeResponse)
+def deactivate_qr_code(
+    qr_code_id: int,
+    db: Session = Depends(get_db),
+):
+    """Deactivate (revoke) a QR code before it expires."""
+    qr_code = db.query(QRCode).filter(QRCode.id == qr_code_id).first()
+    if not qr_code:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"QR code with id {qr_code_id} not found",
+        )
+
+    qr_code.is_active = False
+    db.commit()
+    db.refresh(qr_code)
+
+    # Other workers pick the revocation up from the change log on their next refresh
+    qr_revocations.revoke(qr_code.id, qr_code.expires_at)
+
+    return _qr_code_response(qr_code)
 
 
 @router.get("/image/{qr_code_id}")
@@ -96,6 +318,7 @@ def get_qr_code_image(
     db: Session = Depends(get_db),
 ):
     """Get QR code image for a given QR code ID."""
+    # Fetched right after generating the code, so it reads from the primary (not the replica)
     # Importar qrcode solo cuando sea necesario
     import qrcode
     
@@ -127,7 +350,8 @@ def get_qr_code_image(
         box_size=10,
         border=4,
     )
-    qr.add_data(qr_code.code)
+    # With signing configured the image carries the signed token instead of the uuid
+    qr.add_data(sign_qr_token(qr_code) if signing_enabled() else qr_code.code)
     qr.make(fit=True)
     
     img = qr.make_image(fill_color="black", back_color="white")
@@ -146,49 +370,41 @@ def scan_qr_code(
     db: Session = Depends(get_db),
 ):
     """Scan a QR code and register access."""
+    # Signed tokens are validated without a database lookup
+    if is_signed_token(qr_scan.code):
+        person_type, person_id = _check_signed_token(qr_scan.code)
+        return _register_access(db, person_type, person_id, qr_scan.access_type,
+                                qr_scan.site_id, qr_scan.gate_id, qr_scan.event_id)
+
     # Find QR code in database
-    qr_code = db.query(QRCode).filter(QRCode.code == qr_scan.code).first()
+    qr_code = _find_qr_code(db, qr_scan.code)
     if not qr_code:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Invalid QR code",
-        )
-    
-    # Check if QR code is active and not expired
-    if not qr_code.is_active:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="QR code is not active",
-        )
-    
-    if qr_code.expires_at and qr_code.expires_at < datetime.now(timezone.utc):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="QR code has expired",
-        )
+        raise _scan_rejected("unknown", status.HTTP_404_NOT_FOUND, "Invalid QR code", qr_scan.code)
     
     # Determine if this is for a user or visitor
     person_type = "employee" if qr_code.user_id else "visitor"
     person_id = qr_code.user_id if qr_code.user_id else qr_code.visitor_id
     
-    # Create access log
-    access_log = AccessLog(
-        person_type=person_type,
-        person_id=person_id,
-        access_type=qr_scan.access_type,
-        access_time=datetime.now(timezone.utc),
-        workday_date=datetime.now(timezone.utc).date()
-    )
+    # Check if QR code is expired (expired codes are deactivated by the sweeper) or inactive
+    if qr_code.expires_at and qr_code.expires_at < datetime.now(timezone.utc):
+        raise _scan_rejected("expired", status.HTTP_400_BAD_REQUEST, "QR code has expired",
+                             qr_scan.code, person_type, person_id)
     
-    db.add(access_log)
-    db.commit()
+    if not qr_code.is_active:
+        raise _scan_rejected("inactive", status.HTTP_400_BAD_REQUEST, "QR code is not active",
+                             qr_scan.code, person_type, person_id)
     
-    return {"message": f"Access {qr_scan.access_type} registered successfully"}
+    # Create access log
+    return _register_access(db, person_type, person_id, qr_scan.access_type,
+                            qr_scan.site_id, qr_scan.gate_id, qr_scan.event_id)
 
 
 @router.post("/scan-image", status_code=status.HTTP_200_OK)
 async def scan_qr_code_image(
-    access_type: str,
+    access_type: Optional[str] = None,
+    site_id: Optional[str] = None,
+    gate_id: Optional[str] = None,
+    event_id: Optional[str] = None,
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
 ):
@@ -197,7 +413,7 @@ async def scan_qr_code_image(
     from pyzbar.pyzbar import decode
     
     # Validate access type
-    if access_type not in ["entry", "exit"]:
+    if access_type is not None and access_type not in ["entry", "exit"]:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Access type must be 'entry' or 'exit'",
@@ -211,49 +427,32 @@ async def scan_qr_code_image(
     # Decode QR code
     decoded_objects = decode(image)
     if not decoded_objects:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="No QR code found in the image",
-        )
+        raise _scan_rejected("unknown", status.HTTP_400_BAD_REQUEST, "No QR code found in the image")
     
     # Get the QR code data
     qr_data = decoded_objects[0].data.decode("utf-8")
     
+    if is_signed_token(qr_data):
+        person_type, person_id = _check_signed_token(qr_data)
+        return _register_access(db, person_type, person_id, access_type, site_id, gate_id, event_id)
+    
     # Find QR code in database
-    qr_code = db.query(QRCode).filter(QRCode.code == qr_data).first()
+    qr_code = _find_qr_code(db, qr_data)
     if not qr_code:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Invalid QR code",
-        )
-    
-    # Check if QR code is active and not expired
-    if not qr_code.is_active:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="QR code is not active",
-        )
-    
-    if qr_code.expires_at and qr_code.expires_at < datetime.now(timezone.utc):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="QR code has expired",
-        )
+        raise _scan_rejected("unknown", status.HTTP_404_NOT_FOUND, "Invalid QR code", qr_data)
     
     # Determine if this is for a user or visitor
     person_type = "employee" if qr_code.user_id else "visitor"
     person_id = qr_code.user_id if qr_code.user_id else qr_code.visitor_id
     
-    # Create access log
-    access_log = AccessLog(
-        person_type=person_type,
-        person_id=person_id,
-        access_type=access_type,
-        access_time=datetime.now(timezone.utc),
-        workday_date=datetime.now(timezone.utc).date()
-    )
+    # Check if QR code is expired (expired codes are deactivated by the sweeper) or inactive
+    if qr_code.expires_at and qr_code.expires_at < datetime.now(timezone.utc):
+        raise _scan_rejected("expired", status.HTTP_400_BAD_REQUEST, "QR code has expired",
+                             qr_data, person_type, person_id)
     
-    db.add(access_log)
-    db.commit()
+    if not qr_code.is_active:
+        raise _scan_rejected("inactive", status.HTTP_400_BAD_REQUEST, "QR code is not active",
+                             qr_data, person_type, person_id)
     
-    return {"message": f"Access {access_type} registered successfully"}
+    # Create access log
+    return _register_access(db, person_type, person_id, access_type, site_id, gate_id, event_id)
@@ -0,0 +1,111 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from datetime import date, datetime
+
+from app import schemas
+from app.database import get_read_db
+from app.database.connection import SessionLocal, ReplicaSessionLocal, reads_from_primary
+from app.config.messages import AccessLogMessages, ReportMessages
+from app.services.report_service import (
+    get_access_heatmap, get_occupancy, get_weekly_access_report, get_period_report, build_access_report,
+    REPORT_TYPES, MAX_REPORT_DAYS
+)
+from app.services.timesheet_service import stream_timesheets_zip, TIMESHEET_FORMATS
+
+router = APIRouter(
+    prefix="/reports",
+    tags=["reports"],
+    responses={404: {"description": "Not found"}},
+)
+
+@router.get("/heatmap", response_model=schemas.AccessHeatmap)
+def get_heatmap(
+    date_from: date = Query(None, alias="from"),
+    date_to: date = Query(None, alias="to"),
+    person_type: str = None,
+    site_id: str = None,
+    db: Session = Depends(get_read_db)
+):
+    """
+    Entries and exits per weekday (Monday first) and local hour, as two 7x24 matrices.
+    Computed with a single GROUP BY over access_logs (plus the Parquet archive when the
+    range reaches archived months), never by loading rows.
+    """
+    if person_type is not None and person_type not in ['employee', 'visitor']:
+        raise HTTPException(
+            status_code=400,
+            detail=AccessLogMessages.ERROR_INVALID_PERSON_TYPE
+        )
+    return get_access_heatmap(db, date_from, date_to, person_type, site_id=site_id)
+
+@router.get("/occupancy", response_model=schemas.Occupancy)
+def get_current_occupancy(site_id: str = None, db: Session = Depends(get_read_db)):
+    """
+    People currently inside each site: those whose last access in the last 24 hours
+    was an entry at that site.
+    """
+    return get_occupancy(db, site_id)
+
+@router.get("/weekly", response_model=schemas.WeeklyAccessReport)
+def get_weekly_report(site_id: str = None, db: Session = Depends(get_read_db)):
+    """
+    Access totals of the last 7 days for one site, or for all sites with a per-site
+    breakdown. Sites are aggregated concurrently and merged.
+    """
+    return get_weekly_access_report(db, site_id)
+
+@router.get("/summary", response_model=schemas.AccessReport)
+def get_summary_report(
+    report_type: str = "weekly",
+    reference: date = None,
+    date_from: date = Query(None, alias="from"),
+    date_to: date = Query(None, alias="to"),
+    site_id: str = None,
+    db: Session = Depends(get_read_db)
+):
+    """
+    Access totals of the last closed day, week (7 days) or calendar month before
+    `reference` (today by default), or of an explicit `from`/`to` range of workdays.
+    Closed days are read from the stored daily summaries, so longer periods cost
+    about the same as shorter ones.
+    """
+    if report_type not in REPORT_TYPES:
+        raise HTTPException(status_code=400, detail=ReportMessages.ERROR_INVALID_REPORT_TYPE)
+    if date_from is not None or date_to is not None:
+        if date_from is None or date_to is None or date_from > date_to or (date_to - date_from).days >= MAX_REPORT_DAYS:
+            raise HTTPException(
+                status_code=400,
+                detail=ReportMessages.ERROR_INVALID_REPORT_RANGE.format(max=MAX_REPORT_DAYS)
+            )
+        return build_access_report(db, date_from, date_to, site_id)
+    return get_period_report(db, report_type, reference, site_id)
+
+@router.get("/timesheets")
+def export_timesheets(request: Request, month: str, format: str = "csv", site_id: str = None):
+    """
+    Monthly timesheets as a ZIP with one CSV or PDF per employee with accesses in the
+    month (`month` as YYYY-MM). Rows are read in one pass ordered by employee, files
+    are rendered by a thread pool and the ZIP is streamed while later files render.
+    """
+    try:
+        month_start = datetime.strptime(month, "%Y-%m").date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail=ReportMessages.ERROR_INVALID_MONTH)
+    if format not in TIMESHEET_FORMATS:
+        raise HTTPException(status_code=400, detail=ReportMessages.ERROR_INVALID_TIMESHEET_FORMAT)
+
+    def chunks():
+        # The request session is closed once the response starts, so the stream uses its own
+        db = SessionLocal() if reads_from_primary(request) else ReplicaSessionLocal()
+        try:
+            yield from stream_timesheets_zip(db, month_start, format, site_id)
+        finally:
+            db.close()
+
+    return StreamingResponse(
+        chunks(),
+        media_type="application/zip",
+        headers={"Content-Disposition": f"attachment; filename=timesheets_{month}.zip"}
+    )
+
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, Path, BackgroundTasks, status
+from fastapi import APIRouter, Depends, HTTPException, Path, BackgroundTasks, Query, Request, Response, status
 from sqlalchemy.orm import Session
 from typing import List, Dict, Union
 from sqlalchemy.exc import IntegrityError
@@ -9,10 +9,15 @@ import io
 import base64
 
 from app import models, schemas
-from app.database import get_db
-from app.config.messages import UserMessages
+from app.database import get_db, get_read_db
+from app.config.messages import UserMessages, PersonMessages
 from app.services.email_service import send_user_registration_email
 from app.routers.qr_codes import generate_qr_code_for_user
+from app.services.serialization_service import (
+    schema_columns, json_response, validator_headers, not_modified, not_modified_response,
+    parse_id_list, MAX_BATCH_IDS
+)
+from app.models.table_version import get_table_version
 
 router = APIRouter(
     prefix="/users",
@@ -100,14 +105,45 @@ def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
             )
 
 @router.get("/", response_model=List[schemas.User])
-def get_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    users = db.query(models.User).offset(skip).limit(limit).all()
-    return users
+def get_users(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    ids: str = Query(None, description="Comma-separated ids to fetch in a single request (skip/limit do not apply)"),
+    db: Session = Depends(get_read_db)
+):
+    id_list = None
+    if ids is not None:
+        try:
+            id_list = parse_id_list(ids)
+        except ValueError:
+            raise HTTPException(
+                status_code=400,
+                detail=PersonMessages.ERROR_INVALID_IDS.format(max=MAX_BATCH_IDS)
+            )
+
+    # Validador de la tabla completa: si el cliente ya tiene la versión actual no se
+    # ejecuta el listado ni se serializa nada
+    version, last_modified = get_table_version(db, models.User.__tablename__)
+    etag = f'W/"users-{version}"'
+    if not_modified(request, etag, last_modified):
+        return not_modified_response(etag, last_modified)
+
+    # Seleccionar solo las columnas del esquema y serializar directamente a JSON
+    columns = schema_columns(models.User, schemas.User)
+    if id_list is not None:
+        # Consulta por lotes: un solo IN sobre la clave primaria (sin OR con el documento)
+        rows = db.query(*columns).filter(models.User.id.in_(id_list)).order_by(models.User.id).all()
+    else:
+        rows = db.query(*columns).offset(skip).limit(limit).all()
+    return json_response([row._asdict() for row in rows], headers=validator_headers(etag, last_modified))
 
 @router.get("/{user_id}", response_model=schemas.User)
 def get_user_by_id(
+    request: Request,
+    response: Response,
     user_id: str = Path(..., description="ID or document number of the user"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     # Try to convert to int for ID search, if fails it's a document number
     try:
@@ -127,6 +163,12 @@ def get_user_by_id(
             status_code=404,
             detail=UserMessages.ERROR_USER_NOT_FOUND
         )
+
+    # Validador del registro (id y updated_at): un 304 no serializa el usuario
+    etag = f'W/"user-{user.id}-{user.updated_at.timestamp() if user.updated_at else 0}"'
+    if not_modified(request, etag, user.updated_at):
+        return not_modified_response(etag, user.updated_at)
+    response.headers.update(validator_headers(etag, user.updated_at))
     return user
 
 @router.put("/{user_id}", response_model=schemas.User)
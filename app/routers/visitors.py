@@ -1,11 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, Path
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, Response
 from sqlalchemy.orm import Session
 from typing import List, Dict
 from sqlalchemy.exc import IntegrityError
 
 from app import models, schemas
-from app.database import get_db
-from app.config.messages import VisitorMessages
+from app.database import get_db, get_read_db
+from app.config.messages import VisitorMessages, PersonMessages
+from app.services.serialization_service import (
+    schema_columns, json_response, validator_headers, not_modified, not_modified_response,
+    parse_id_list, MAX_BATCH_IDS
+)
+from app.models.table_version import get_table_version
 from sqlalchemy import or_
 
 router = APIRouter(
@@ -63,14 +68,45 @@ def create_visitor(visitor: schemas.VisitorCreate, db: Session = Depends(get_db)
         raise HTTPException(status_code=400, detail=error_message)
 
 @router.get("/", response_model=List[schemas.Visitor])
-def get_visitors(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    visitors = db.query(models.Visitor).offset(skip).limit(limit).all()
-    return visitors
+def get_visitors(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    ids: str = Query(None, description="Comma-separated ids to fetch in a single request (skip/limit do not apply)"),
+    db: Session = Depends(get_read_db)
+):
+    id_list = None
+    if ids is not None:
+        try:
+            id_list = parse_id_list(ids)
+        except ValueError:
+            raise HTTPException(
+                status_code=400,
+                detail=PersonMessages.ERROR_INVALID_IDS.format(max=MAX_BATCH_IDS)
+            )
+
+    # Validador de la tabla completa: si el cliente ya tiene la versión actual no se
+    # ejecuta el listado ni se serializa nada
+    version, last_modified = get_table_version(db, models.Visitor.__tablename__)
+    etag = f'W/"visitors-{version}"'
+    if not_modified(request, etag, last_modified):
+        return not_modified_response(etag, last_modified)
+
+    # Seleccionar solo las columnas del esquema y serializar directamente a JSON
+    columns = schema_columns(models.Visitor, schemas.Visitor)
+    if id_list is not None:
+        # Consulta por lotes: un solo IN sobre la clave primaria (sin OR con el documento)
+        rows = db.query(*columns).filter(models.Visitor.id.in_(id_list)).order_by(models.Visitor.id).all()
+    else:
+        rows = db.query(*columns).offset(skip).limit(limit).all()
+    return json_response([row._asdict() for row in rows], headers=validator_headers(etag, last_modified))
 
 @router.get("/{visitor_id}", response_model=schemas.Visitor)
 def get_visitor_by_id(
+    request: Request,
+    response: Response,
     visitor_id: str = Path(..., description="ID or document number of the user"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     try:
         id_num = int(visitor_id)
@@ -88,6 +124,12 @@ def get_visitor_by_id(
             status_code=404,
             detail=VisitorMessages.ERROR_VISITOR_NOT_FOUND
         )
+
+    # Validador del registro (id y updated_at): un 304 no serializa el visitante
+    etag = f'W/"visitor-{visitor.id}-{visitor.updated_at.timestamp() if visitor.updated_at else 0}"'
+    if not_modified(request, etag, visitor.updated_at):
+        return not_modified_response(etag, visitor.updated_at)
+    response.headers.update(validator_headers(etag, visitor.updated_at))
     return visitor
 
 @router.put("/{visitor_id}", response_model=schemas.Visitor)
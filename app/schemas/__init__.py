@@ -1,11 +1,18 @@
 from app.schemas.user import User, UserCreate, UserUpdate, UserLogin
 from app.schemas.visitor import Visitor, VisitorCreate, VisitorUpdate
-from app.schemas.access_log import AccessLog, AccessLogCreate, AccessLogUpdate, AccessLogDetailed, PersonDetails
+from app.schemas.access_log import AccessLog, AccessLogCreate, AccessLogUpdate, AccessLogDetailed, PersonDetails, AccessLogBatchItem, AccessLogBatchResult
 from app.schemas.incident import Incident, IncidentCreate, IncidentUpdate
+from app.schemas.import_job import ImportJob
+from app.schemas.person import ResolvedPerson
+from app.schemas.report import AccessHeatmap, Occupancy, SiteOccupancy, WeeklyAccessReport, AccessReport, SiteAccessStats
 
 __all__ = [
     "User", "UserCreate", "UserUpdate", "UserLogin",
     "Visitor", "VisitorCreate", "VisitorUpdate",
     "AccessLog", "AccessLogCreate", "AccessLogUpdate", "AccessLogDetailed", "PersonDetails",
-    "Incident", "IncidentCreate", "IncidentUpdate"
+    "AccessLogBatchItem", "AccessLogBatchResult",
+    "Incident", "IncidentCreate", "IncidentUpdate",
+    "ImportJob",
+    "ResolvedPerson",
+    "AccessHeatmap", "Occupancy", "SiteOccupancy", "WeeklyAccessReport", "AccessReport", "SiteAccessStats"
 ]
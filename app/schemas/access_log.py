@@ -1,6 +1,6 @@
 from pydantic import BaseModel, validator
 from datetime import datetime, date
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 from app.config.messages import AccessLogMessages
 
 class AccessLogBase(BaseModel):
@@ -8,6 +8,8 @@ class AccessLogBase(BaseModel):
     person_id: int
     access_type: str
     workday_date: date
+    site_id: Optional[str] = None
+    gate_id: Optional[str] = None
 
     @validator('person_type')
     def validate_person_type(cls, v):
@@ -24,6 +26,15 @@ class AccessLogBase(BaseModel):
 class AccessLogCreate(AccessLogBase):
     pass
 
+class AccessLogBatchItem(AccessLogBase):
+    access_time: datetime
+    event_id: Optional[str] = None
+
+class AccessLogBatchResult(BaseModel):
+    inserted: int
+    rejected: List[int]
+    duplicates: int = 0  # items whose event_id was already registered
+
 class AccessLogUpdate(BaseModel):
     access_type: Optional[str] = None
     workday_date: Optional[date] = None
@@ -37,6 +48,7 @@ class AccessLogUpdate(BaseModel):
 class AccessLog(AccessLogBase):
     id: int
     access_time: datetime
+    event_id: Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -54,6 +66,8 @@ class AccessLogDetailed(BaseModel):
     action_type: str
     timestamp: datetime
     workday_date: date
+    site_id: Optional[str] = None
+    gate_id: Optional[str] = None
     person_details: PersonDetails
 
     class Config:
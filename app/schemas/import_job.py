@@ -0,0 +1,18 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional
+
+class ImportJob(BaseModel):
+    id: int
+    name: str
+    status: str
+    total_rows: int
+    rows_processed: int
+    rows_loaded: int
+    rows_skipped: int
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
@@ -10,7 +10,7 @@ class IncidentBase(BaseModel):
 
     @validator('person_type')
     def validate_person_type(cls, v):
-        if v not in ['employee', 'visitor']:
+        if v is not None and v not in ['employee', 'visitor']:
             raise ValueError("Person type must be either 'employee' or 'visitor'")
         return v
 
@@ -42,6 +42,8 @@ class IncidentUpdate(BaseModel):
         return v
 
 class Incident(IncidentBase):
+    # None when no person was identified (e.g. an unknown QR code)
+    person_type: Optional[str] = None
     id: int
     reported_at: datetime
 
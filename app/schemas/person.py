@@ -0,0 +1,5 @@
+from app.schemas.access_log import PersonDetails
+
+class ResolvedPerson(PersonDetails):
+    person_type: str
+    person_id: int
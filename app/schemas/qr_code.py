@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel
 
 
@@ -19,6 +19,7 @@ class QRCodeResponse(QRCodeBase):
     user_id: Optional[int] = None
     visitor_id: Optional[int] = None
     created_at: datetime
+    token: Optional[str] = None  # signed token, only when QR signing is configured
     
     class Config:
         from_attributes = True
@@ -26,4 +27,25 @@ class QRCodeResponse(QRCodeBase):
 
 class QRCodeScan(BaseModel):
     code: str
-    access_type: str  # "entry" or "exit"
+    access_type: Optional[str] = None  # "entry", "exit" or None to infer it from the last access
+    site_id: Optional[str] = None  # building and gate where the scan happened
+    gate_id: Optional[str] = None
+    event_id: Optional[str] = None  # client-generated id: retries of the same scan are not duplicated
+
+
+class QRCodeChange(BaseModel):
+    version: int
+    qr_code_id: int
+    code: str
+    person_type: str
+    person_id: int
+    is_active: bool
+    expires_at: Optional[datetime] = None
+    change_type: str  # "activation" or "deactivation"
+
+
+class QRCodeChanges(BaseModel):
+    version: int
+    has_more: bool
+    changes: List[QRCodeChange]
+    expired: List[str]
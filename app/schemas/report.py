@@ -0,0 +1,43 @@
+from pydantic import BaseModel
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+class AccessHeatmap(BaseModel):
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    person_type: Optional[str] = None
+    site_id: Optional[str] = None
+    timezone: str
+    weekdays: List[str]
+    entries: List[List[int]]  # 7 filas (lunes..domingo) x 24 horas
+    exits: List[List[int]]
+    total_entries: int
+    total_exits: int
+
+class SiteOccupancy(BaseModel):
+    employees: int
+    visitors: int
+    total: int
+
+class Occupancy(BaseModel):
+    since: datetime
+    site_id: Optional[str] = None
+    sites: Dict[str, SiteOccupancy]  # "unassigned" = accesos sin sede
+    total: int
+
+class SiteAccessStats(BaseModel):
+    entries: int
+    exits: int
+    total: int
+
+class AccessReport(BaseModel):
+    report_type: Optional[str] = None  # daily, weekly o monthly
+    period: Dict[str, str]
+    site_id: Optional[str] = None
+    total_stats: SiteAccessStats
+    by_type: Dict[str, SiteAccessStats]
+    by_site: Dict[str, SiteAccessStats]
+    daily_stats: Dict[str, Dict[str, int]]
+
+class WeeklyAccessReport(AccessReport):
+    pass
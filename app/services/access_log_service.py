@@ -0,0 +1,60 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
+from typing import List, Optional
+
+from app.models.access_log import AccessLog
+from app.services.report_service import invalidate_daily_summaries
+
+# INSERT con ON CONFLICT DO NOTHING según el motor
+_CONFLICT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def insert_access_logs(db: Session, rows: List[dict]) -> List[Optional[int]]:
+    """
+    Inserta accesos con INSERT multi-fila sin confirmar la transacción. Las filas con
+    event_id se insertan con ON CONFLICT (event_id) DO NOTHING: un reintento de un
+    evento ya registrado se descarta en la misma sentencia, sin consulta previa. Los
+    accesos de jornadas cerradas invalidan el resumen diario de esas jornadas.
+
+    Args:
+        db: Sesión de base de datos
+        rows: Accesos (columnas de access_logs; event_id opcional)
+
+    Returns:
+        Id de cada fila en el mismo orden, None para los eventos ya registrados
+    """
+    ids: List[Optional[int]] = [None] * len(rows)
+    plain = [index for index, row in enumerate(rows) if not row.get("event_id")]
+    keyed = [index for index, row in enumerate(rows) if row.get("event_id")]
+
+    if plain:
+        inserted = db.scalars(
+            insert(AccessLog).returning(AccessLog.id, sort_by_parameter_order=True),
+            [rows[index] for index in plain]
+        ).all()
+        for index, id_ in zip(plain, inserted):
+            ids[index] = id_
+
+    if keyed:
+        conflict_insert = _CONFLICT_INSERTS.get(db.get_bind().dialect.name)
+        if conflict_insert is None:
+            # Otros motores: el índice único sigue evitando duplicados, pero como error
+            statement = insert(AccessLog)
+        else:
+            statement = conflict_insert(AccessLog).on_conflict_do_nothing(index_elements=["event_id"])
+        inserted = {
+            event_id: id_
+            for id_, event_id in db.execute(
+                statement.returning(AccessLog.id, AccessLog.event_id), [rows[index] for index in keyed]
+            )
+        }
+        for index in keyed:
+            # pop: si el mismo event_id viene dos veces en el lote, solo la primera cuenta
+            ids[index] = inserted.pop(rows[index]["event_id"], None)
+
+    invalidate_daily_summaries(db, {row["workday_date"] for row in rows})
+    return ids
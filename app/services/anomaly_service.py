@@ -0,0 +1,175 @@
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional
+import logging
+import os
+import threading
+import time
+from dotenv import load_dotenv
+
+from app.database.connection import SessionLocal
+from app.models.incident import Incident
+from app.services.metrics_service import SECURITY_ALERTS
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+# Umbral y ventana (segundos) de cada detector
+INVALID_QR_BURST_THRESHOLD = int(os.getenv("INVALID_QR_BURST_THRESHOLD", 20))
+INVALID_QR_BURST_WINDOW = int(os.getenv("INVALID_QR_BURST_WINDOW", 60))
+QR_FAILURES_THRESHOLD = int(os.getenv("QR_FAILURES_THRESHOLD", 5))
+QR_FAILURES_WINDOW = int(os.getenv("QR_FAILURES_WINDOW", 300))
+PERSON_FAILURES_THRESHOLD = int(os.getenv("PERSON_FAILURES_THRESHOLD", 5))
+PERSON_FAILURES_WINDOW = int(os.getenv("PERSON_FAILURES_WINDOW", 600))
+
+BUCKETS = 10
+MAX_KEYS = 10000
+
+# Resultados de escaneo que cuentan como fallo
+FAILED_OUTCOMES = ("unknown", "inactive", "expired", "passback")
+
+
+class SlidingWindowCounter:
+    """
+    Conteo de eventos en los últimos window segundos, con la ventana dividida en un
+    número fijo de cubetas. Cada evento cuesta O(1): solo se limpian las cubetas que
+    quedaron atrás desde el evento anterior (como mucho BUCKETS).
+    """
+
+    __slots__ = ("width", "counts", "total", "current")
+
+    def __init__(self, window: float, buckets: int = BUCKETS):
+        self.width = window / buckets
+        self.counts = [0] * buckets
+        self.total = 0
+        self.current = 0
+
+    def _advance(self, now: float):
+        bucket = int(now / self.width)
+        if bucket - self.current >= len(self.counts):
+            self.counts = [0] * len(self.counts)
+            self.total = 0
+        else:
+            for index in range(self.current + 1, bucket + 1):
+                slot = index % len(self.counts)
+                self.total -= self.counts[slot]
+                self.counts[slot] = 0
+        self.current = max(self.current, bucket)
+
+    def add(self, now: float) -> int:
+        self._advance(now)
+        self.counts[self.current % len(self.counts)] += 1
+        self.total += 1
+        return self.total
+
+
+class WindowDetector:
+    """
+    Detector por clave (código QR, persona o global): dispara cuando una clave supera
+    el umbral dentro de la ventana, y no vuelve a disparar para esa clave hasta que
+    pase otra ventana. Conserva como mucho MAX_KEYS claves (las menos recientes salen).
+    """
+
+    def __init__(self, name: str, threshold: int, window: float, max_keys: int = MAX_KEYS):
+        self.name = name
+        self.threshold = threshold
+        self.window = window
+        self.max_keys = max_keys
+        self._counters: "OrderedDict[Hashable, SlidingWindowCounter]" = OrderedDict()
+        self._alerted_at: Dict[Hashable, float] = {}
+
+    def observe(self, key: Hashable, now: float) -> Optional[int]:
+        """Cuenta un evento; devuelve el total de la ventana si hay que disparar la alerta."""
+        counter = self._counters.get(key)
+        if counter is None:
+            counter = self._counters[key] = SlidingWindowCounter(self.window)
+            if len(self._counters) > self.max_keys:
+                evicted, _ = self._counters.popitem(last=False)
+                self._alerted_at.pop(evicted, None)
+        else:
+            self._counters.move_to_end(key)
+        count = counter.add(now)
+        if count < self.threshold:
+            return None
+        last_alert = self._alerted_at.get(key)
+        if last_alert is not None and now - last_alert < self.window:
+            return None
+        self._alerted_at[key] = now
+        return count
+
+
+class AnomalyDetector:
+    """
+    Detectores de ventana deslizante sobre los escaneos fallidos y los incidentes:
+    ráfagas globales de códigos inválidos, fallos repetidos de un mismo código y
+    rechazos repetidos de una misma persona. Al cruzar un umbral registra un
+    incidente security_alert.
+    """
+
+    def __init__(self, raise_alert: Optional[Callable[[Optional[str], Optional[int], str], None]] = None):
+        self.invalid_burst = WindowDetector("invalid_qr_burst", INVALID_QR_BURST_THRESHOLD, INVALID_QR_BURST_WINDOW)
+        self.per_qr = WindowDetector("qr_code_failures", QR_FAILURES_THRESHOLD, QR_FAILURES_WINDOW)
+        self.per_person = WindowDetector("person_failures", PERSON_FAILURES_THRESHOLD, PERSON_FAILURES_WINDOW)
+        self.raise_alert = raise_alert or record_security_alert
+        self._lock = threading.Lock()
+
+    def observe_scan(self, outcome: str, code: Optional[str] = None,
+                     person_type: Optional[str] = None, person_id: Optional[int] = None):
+        """Consume el resultado de un escaneo (solo cuentan los fallidos)."""
+        if outcome not in FAILED_OUTCOMES:
+            return
+        now = time.monotonic()
+        alerts = []
+        with self._lock:
+            if outcome == "unknown":
+                count = self.invalid_burst.observe("global", now)
+                if count:
+                    alerts.append((None, None, f"Ráfaga de códigos QR inválidos: {count} en {INVALID_QR_BURST_WINDOW} s"))
+            if code:
+                count = self.per_qr.observe(code, now)
+                if count:
+                    alerts.append((person_type, person_id,
+                                   f"Código QR rechazado {count} veces en {QR_FAILURES_WINDOW} s (último: {outcome})"))
+            if person_type and person_id is not None:
+                count = self.per_person.observe((person_type, person_id), now)
+                if count:
+                    alerts.append((person_type, person_id,
+                                   f"Persona con {count} accesos rechazados o incidentes en {PERSON_FAILURES_WINDOW} s"))
+        for alert_person_type, alert_person_id, description in alerts:
+            self._alert(alert_person_type, alert_person_id, description)
+
+    def observe_incident(self, incident_type: str, person_type: Optional[str], person_id: Optional[int]):
+        """Consume un incidente registrado (las propias alertas no cuentan)."""
+        if incident_type == "security_alert" or person_id is None:
+            return
+        with self._lock:
+            count = self.per_person.observe((person_type, person_id), time.monotonic())
+        if count:
+            self._alert(person_type, person_id,
+                        f"Persona con {count} accesos rechazados o incidentes en {PERSON_FAILURES_WINDOW} s")
+
+    def _alert(self, person_type: Optional[str], person_id: Optional[int], description: str):
+        logger.warning(f"Alerta de seguridad: {description}")
+        SECURITY_ALERTS.inc()
+        try:
+            self.raise_alert(person_type, person_id, description)
+        except Exception as e:
+            logger.error(f"Error al registrar la alerta de seguridad: {str(e)}")
+
+
+def record_security_alert(person_type: Optional[str], person_id: Optional[int], description: str):
+    """Registra un incidente security_alert en su propia sesión."""
+    db = SessionLocal()
+    try:
+        db.add(Incident(
+            person_type=person_type,
+            person_id=person_id,
+            incident_type="security_alert",
+            description=description
+        ))
+        db.commit()
+    finally:
+        db.close()
+
+
+anomaly_detector = AnomalyDetector()
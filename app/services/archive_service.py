@@ -0,0 +1,360 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import select, delete, func
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+import logging
+import os
+import uuid
+from dotenv import load_dotenv
+
+from app.models.access_log import AccessLog
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+# Directorio del archivo histórico (un subdirectorio month=AAAA-MM por mes, en Parquet)
+ACCESS_LOG_ARCHIVE_DIR = os.getenv("ACCESS_LOG_ARCHIVE_DIR", "archive/access_logs")
+# Antigüedad mínima para archivar (0 = archivado desactivado). Solo se archivan meses completos
+ACCESS_LOG_ARCHIVE_AFTER_DAYS = int(os.getenv("ACCESS_LOG_ARCHIVE_AFTER_DAYS", 0))
+ARCHIVE_BATCH_SIZE = 50000
+# Ids por DELETE al borrar lo archivado (SQLite admite hasta 32766 parámetros por sentencia)
+ARCHIVE_DELETE_IDS = 10000
+
+COLUMNS = ("id", "person_type", "person_id", "access_type", "access_time", "workday_date", "site_id", "gate_id")
+
+# Importaremos pyarrow solo cuando sea necesario (solo hace falta si hay archivo histórico)
+
+
+def _schema():
+    import pyarrow as pa
+    return pa.schema([
+        ("id", pa.int64()),
+        ("person_type", pa.string()),
+        ("person_id", pa.int64()),
+        ("access_type", pa.string()),
+        ("access_time", pa.timestamp("us", tz="UTC")),
+        ("workday_date", pa.date32()),
+        # Meses archivados antes de existir las sedes no tienen estas columnas: se leen como nulas
+        ("site_id", pa.string()),
+        ("gate_id", pa.string()),
+    ])
+
+
+def sort_time(value: datetime) -> datetime:
+    """access_time comparable entre la base (sin zona horaria en SQLite) y Parquet (UTC)."""
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _month_start(value: date) -> date:
+    return value.replace(day=1)
+
+
+def _next_month(value: date) -> date:
+    return (value.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+def _month_dir(month: date, archive_dir: str) -> str:
+    return os.path.join(archive_dir, f"month={month:%Y-%m}")
+
+
+def archived_months(archive_dir: str = ACCESS_LOG_ARCHIVE_DIR) -> List[date]:
+    """Meses con archivos en el histórico, en orden."""
+    if not os.path.isdir(archive_dir):
+        return []
+    months = []
+    for name in os.listdir(archive_dir):
+        if name.startswith("month=") and any(f.endswith(".parquet") for f in os.listdir(os.path.join(archive_dir, name))):
+            months.append(datetime.strptime(name[len("month="):], "%Y-%m").date())
+    return sorted(months)
+
+
+def archive_boundary(archive_dir: str = ACCESS_LOG_ARCHIVE_DIR) -> Optional[date]:
+    """
+    Primer día que ya no está archivado: las jornadas anteriores están en Parquet y las
+    posteriores en access_logs. None si no hay archivo histórico.
+    """
+    months = archived_months(archive_dir)
+    return _next_month(months[-1]) if months else None
+
+
+def _deleted_marker(part: str) -> str:
+    directory, name = os.path.split(part)
+    # Los nombres que empiezan por "_" no forman parte del dataset
+    return os.path.join(directory, f"_{name}.deleted")
+
+
+def _pending_parts(month: date, archive_dir: str) -> List[str]:
+    """Archivos del mes cuyas filas no se terminaron de borrar de access_logs."""
+    month_dir = _month_dir(month, archive_dir)
+    if not os.path.isdir(month_dir):
+        return []
+    parts = [
+        os.path.join(month_dir, name) for name in sorted(os.listdir(month_dir))
+        if name.endswith(".parquet") and not name.startswith("_")
+    ]
+    return [part for part in parts if not os.path.exists(_deleted_marker(part))]
+
+
+def _delete_archived(db: Session, month: date, part: str, batch_size: int) -> int:
+    """
+    Borra de access_logs, por bloques, exactamente los ids escritos en un archivo del
+    histórico y deja una marca al terminar. No se borra por rango de ids: una fila con
+    id menor que se confirma después de la lectura (importación o lote tardío) no está
+    en el archivo y se perdería.
+    """
+    import pyarrow.parquet as pq
+
+    deleted = 0
+    month_filter = (AccessLog.workday_date >= month, AccessLog.workday_date < _next_month(month))
+    for batch in pq.ParquetFile(part).iter_batches(batch_size=min(batch_size, ARCHIVE_DELETE_IDS), columns=["id"]):
+        ids = batch.column(0).to_pylist()
+        deleted += db.execute(delete(AccessLog).where(*month_filter, AccessLog.id.in_(ids))).rowcount
+        db.commit()
+    open(_deleted_marker(part), "w").close()
+    return deleted
+
+
+def archive_month(db: Session, month: date, archive_dir: str = ACCESS_LOG_ARCHIVE_DIR,
+                  batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+    """
+    Mueve a Parquet (zstd) las filas de access_logs de un mes.
+
+    El archivo se escribe con otro nombre y se renombra al terminar, y solo después se
+    borran de la base los ids escritos en él. Si el proceso se interrumpe entre ambos
+    pasos, la siguiente ejecución borra primero las filas de los archivos sin marca de
+    borrado, sin duplicarlas.
+
+    Args:
+        db: Sesión de base de datos
+        month: Primer día del mes
+        archive_dir: Directorio del histórico
+        batch_size: Filas por grupo de Parquet y por DELETE
+
+    Returns:
+        Número de filas archivadas
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    for pending in _pending_parts(month, archive_dir):
+        _delete_archived(db, month, pending, batch_size)
+
+    month_dir = _month_dir(month, archive_dir)
+    os.makedirs(month_dir, exist_ok=True)
+    name = f"part-{uuid.uuid4().hex}.parquet"
+    part = os.path.join(month_dir, name)
+    # Los nombres que empiezan por "_" no forman parte del dataset mientras se escriben
+    tmp = os.path.join(month_dir, f"_{name}.tmp")
+
+    schema = _schema()
+    rows = db.execute(
+        select(*(getattr(AccessLog, column) for column in COLUMNS))
+        .where(AccessLog.workday_date >= month, AccessLog.workday_date < _next_month(month))
+        .order_by(AccessLog.access_time, AccessLog.id)
+        .execution_options(yield_per=batch_size)
+    )
+    total = 0
+    writer = None
+    try:
+        for batch in rows.partitions():
+            columns = list(zip(*batch))
+            table = pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)], schema=schema
+            )
+            if writer is None:
+                writer = pq.ParquetWriter(tmp, schema, compression="zstd")
+            writer.write_table(table, row_group_size=batch_size)
+            total += len(batch)
+    finally:
+        rows.close()
+        if writer is not None:
+            writer.close()
+
+    if writer is None:
+        return 0
+    os.replace(tmp, part)
+    _delete_archived(db, month, part, batch_size)
+    logger.info(f"Archivado {month:%Y-%m}: {total} registros de acceso en {part}")
+    return total
+
+
+def archive_access_logs(db: Session, older_than_days: int = ACCESS_LOG_ARCHIVE_AFTER_DAYS,
+                        archive_dir: str = ACCESS_LOG_ARCHIVE_DIR) -> Dict[str, int]:
+    """
+    Archiva los meses completos cuyas jornadas tienen más de older_than_days días.
+
+    Returns:
+        Filas archivadas por mes (AAAA-MM)
+    """
+    cutoff = date.today() - timedelta(days=older_than_days)
+    oldest = db.query(func.min(AccessLog.workday_date)).scalar()
+    archived = {}
+    month = _month_start(oldest) if oldest else None
+    while month is not None and _next_month(month) <= cutoff:
+        archived[f"{month:%Y-%m}"] = archive_month(db, month, archive_dir)
+        month = _next_month(month)
+    return archived
+
+
+def _filter_expression(date_from: Optional[date], date_to: Optional[date], person_type: Optional[str],
+                       person_id: Optional[int], access_type: Optional[str], site_id: Optional[str]):
+    import pyarrow.dataset as ds
+
+    expression = ds.scalar(True)
+    if date_from:
+        expression &= ds.field("workday_date") >= date_from
+    if date_to:
+        expression &= ds.field("workday_date") <= date_to
+    if person_type:
+        expression &= ds.field("person_type") == person_type
+    if person_id is not None:
+        expression &= ds.field("person_id") == person_id
+    if access_type:
+        expression &= ds.field("access_type") == access_type
+    if site_id:
+        expression &= ds.field("site_id") == site_id
+    return expression
+
+
+def _months_in_range(date_from: Optional[date], date_to: Optional[date], archive_dir: str) -> Iterator[date]:
+    for month in archived_months(archive_dir):
+        if date_from and _next_month(month) <= date_from:
+            continue
+        if date_to and month > date_to:
+            break
+        yield month
+
+
+def _iter_dataset(source, expression) -> Iterator[Tuple]:
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(source, format="parquet", schema=_schema())
+    for batch in dataset.to_batches(columns=list(COLUMNS), filter=expression):
+        yield from zip(*(batch.column(column).to_pylist() for column in COLUMNS))
+
+
+def iter_archived_access_logs(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    person_type: Optional[str] = None,
+    person_id: Optional[int] = None,
+    access_type: Optional[str] = None,
+    site_id: Optional[str] = None,
+    archive_dir: str = ACCESS_LOG_ARCHIVE_DIR
+) -> Iterator[Tuple]:
+    """
+    Recorre los registros archivados que cumplen los filtros, mes a mes. Solo se leen
+    los meses del rango, y los filtros se aplican sobre las estadísticas de cada grupo
+    de filas de Parquet.
+
+    Returns:
+        Tuplas (id, person_type, person_id, access_type, access_time, workday_date, site_id, gate_id)
+    """
+    expression = _filter_expression(date_from, date_to, person_type, person_id, access_type, site_id)
+    for month in _months_in_range(date_from, date_to, archive_dir):
+        yield from _iter_dataset(_month_dir(month, archive_dir), expression)
+
+
+def iter_archived_parts(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    person_type: Optional[str] = None,
+    person_id: Optional[int] = None,
+    access_type: Optional[str] = None,
+    site_id: Optional[str] = None,
+    archive_dir: str = ACCESS_LOG_ARCHIVE_DIR
+) -> List[Iterator[Tuple]]:
+    """
+    Igual que iter_archived_access_logs, pero con un iterador por archivo del histórico.
+    Cada archivo se escribe ordenado por (access_time, id), así que los iteradores se
+    pueden mezclar con heapq.merge sin ordenar meses enteros en memoria. Cada archivo
+    se lee por grupos de filas cuando el iterador avanza.
+
+    Returns:
+        Iteradores de tuplas (id, person_type, person_id, access_type, access_time,
+        workday_date, site_id, gate_id), uno por archivo
+    """
+    expression = _filter_expression(date_from, date_to, person_type, person_id, access_type, site_id)
+    parts = []
+    for month in _months_in_range(date_from, date_to, archive_dir):
+        month_dir = _month_dir(month, archive_dir)
+        for name in sorted(os.listdir(month_dir)):
+            # Los archivos que empiezan por "_" se están escribiendo
+            if name.endswith(".parquet") and not name.startswith("_"):
+                parts.append(_iter_dataset(os.path.join(month_dir, name), expression))
+    return parts
+
+
+def archived_hourly_counts(
+    date_from: Optional[date],
+    date_to: Optional[date],
+    person_type: Optional[str],
+    tz_name: str,
+    site_id: Optional[str] = None,
+    archive_dir: str = ACCESS_LOG_ARCHIVE_DIR
+) -> Dict[Tuple[int, int, str], int]:
+    """
+    Conteo de accesos archivados por (día de la semana, hora local, tipo de acceso),
+    agregado en pyarrow sin materializar filas en Python. Lunes = 0.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+
+    months = [
+        month for month in archived_months(archive_dir)
+        if (not date_from or _next_month(month) > date_from) and (not date_to or month <= date_to)
+    ]
+    expression = ds.scalar(True)
+    if date_from:
+        expression &= ds.field("workday_date") >= date_from
+    if date_to:
+        expression &= ds.field("workday_date") <= date_to
+    if person_type:
+        expression &= ds.field("person_type") == person_type
+    if site_id:
+        expression &= ds.field("site_id") == site_id
+
+    counts: Dict[Tuple[int, int, str], int] = {}
+    for month in months:
+        dataset = ds.dataset(_month_dir(month, archive_dir), format="parquet", schema=_schema())
+        table = dataset.to_table(columns=["access_type", "access_time"], filter=expression)
+        if not table.num_rows:
+            continue
+        local_time = table["access_time"].cast(pa.timestamp("us", tz=tz_name))
+        buckets = pa.table({
+            "weekday": pc.day_of_week(local_time),
+            "hour": pc.hour(local_time),
+            "access_type": table["access_type"],
+        }).group_by(["weekday", "hour", "access_type"]).aggregate([("access_type", "count")])
+        for weekday, hour, access_type, count in zip(*(buckets.column(i).to_pylist() for i in range(4))):
+            key = (weekday, hour, access_type)
+            counts[key] = counts.get(key, 0) + count
+    return counts
+
+
+def archived_daily_counts(
+    date_from: date,
+    date_to: date,
+    archive_dir: str = ACCESS_LOG_ARCHIVE_DIR
+) -> List[Tuple[date, Optional[str], str, str, int]]:
+    """
+    Conteo de accesos archivados por (jornada, sede, tipo de persona, tipo de acceso),
+    agregado en pyarrow sin materializar filas en Python.
+    """
+    import pyarrow.dataset as ds
+
+    expression = (ds.field("workday_date") >= date_from) & (ds.field("workday_date") <= date_to)
+    keys = ["workday_date", "site_id", "person_type", "access_type"]
+    counts = []
+    for month in archived_months(archive_dir):
+        if _next_month(month) <= date_from or month > date_to:
+            continue
+        dataset = ds.dataset(_month_dir(month, archive_dir), format="parquet", schema=_schema())
+        table = dataset.to_table(columns=keys, filter=expression)
+        if not table.num_rows:
+            continue
+        grouped = table.group_by(keys).aggregate([("access_type", "count")])
+        counts.extend(zip(*(grouped.column(i).to_pylist() for i in range(5))))
+    return counts
@@ -0,0 +1,242 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import insert, text
+from datetime import date, datetime, timezone
+from typing import BinaryIO, Callable, Dict, Iterator, Optional, Set, Tuple
+import csv
+import io
+import json
+import logging
+
+from app.config.messages import AccessLogMessages
+from app.models.access_log import AccessLog
+from app.models.import_job import ImportJob
+from app.models.user import User
+from app.models.visitor import Visitor
+from app.services.report_service import invalidate_daily_summaries
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ("person_type", "person_id", "access_type", "access_time", "workday_date")
+FORMATS = ("csv", "ndjson")
+BATCH_SIZE = 50000
+PERSON_TRIGGER = "validate_access_log_person_id"
+# Variable de sesión que validate_person_id() consulta para omitir la validación
+SKIP_PERSON_CHECK_SETTING = "app.skip_person_check"
+
+Record = Tuple[str, int, str, datetime, date]
+
+
+def _text_lines(stream: BinaryIO) -> Iterator[str]:
+    """Recorre el archivo desde el principio sin cerrar el stream subyacente."""
+    stream.seek(0)
+    wrapper = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+    try:
+        yield from wrapper
+    finally:
+        # Si el generador se abandona después de cerrar el archivo, detach() falla
+        if not stream.closed:
+            wrapper.detach()
+
+
+def parse_record(raw: Dict, row_number: int) -> Record:
+    """
+    Valida y normaliza una fila de la importación.
+
+    Raises:
+        ValueError: Si la fila no tiene el formato esperado
+    """
+    try:
+        person_type = raw["person_type"]
+        if person_type not in ['employee', 'visitor']:
+            raise ValueError(AccessLogMessages.ERROR_INVALID_PERSON_TYPE)
+        access_type = raw["access_type"]
+        if access_type not in ['entry', 'exit']:
+            raise ValueError(AccessLogMessages.ERROR_INVALID_ACCESS_TYPE)
+        person_id = int(raw["person_id"])
+        access_time = datetime.fromisoformat(str(raw["access_time"]))
+        if access_time.tzinfo is None:
+            access_time = access_time.replace(tzinfo=timezone.utc)
+        workday = raw.get("workday_date")
+        workday_date = date.fromisoformat(str(workday)) if workday else access_time.date()
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError(AccessLogMessages.ERROR_IMPORT_INVALID_ROW.format(row=row_number, error=e))
+    return person_type, person_id, access_type, access_time, workday_date
+
+
+def iter_records(stream: BinaryIO, fmt: str) -> Iterator[Record]:
+    """
+    Lee registros de acceso en CSV (con encabezado) o NDJSON (un objeto por línea).
+    """
+    if fmt == "csv":
+        for row_number, raw in enumerate(csv.DictReader(_text_lines(stream)), start=1):
+            yield parse_record(raw, row_number)
+    elif fmt == "ndjson":
+        row_number = 0
+        for line in _text_lines(stream):
+            if not line.strip():
+                continue
+            row_number += 1
+            try:
+                raw = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(AccessLogMessages.ERROR_IMPORT_INVALID_ROW.format(row=row_number, error=e))
+            yield parse_record(raw, row_number)
+    else:
+        raise ValueError(AccessLogMessages.ERROR_IMPORT_INVALID_FORMAT)
+
+
+def scan_source(stream: BinaryIO, fmt: str) -> Tuple[int, Dict[str, Set[int]]]:
+    """
+    Pasada previa: valida todas las filas y reúne las personas referenciadas.
+
+    Returns:
+        (número de filas, ids distintos por tipo de persona)
+    """
+    total = 0
+    persons = {'employee': set(), 'visitor': set()}
+    for person_type, person_id, _, _, _ in iter_records(stream, fmt):
+        persons[person_type].add(person_id)
+        total += 1
+    return total, persons
+
+
+def find_missing_persons(db: Session, persons: Dict[str, Set[int]], chunk_size: int = 10000) -> Set[Tuple[str, int]]:
+    """
+    Valida los ids de persona por conjuntos (una consulta IN por bloque) en lugar
+    de dejar que el trigger validate_person_id consulte fila a fila.
+    """
+    missing = set()
+    for person_type, model in (('employee', User), ('visitor', Visitor)):
+        ids = sorted(persons[person_type])
+        for start in range(0, len(ids), chunk_size):
+            chunk = ids[start:start + chunk_size]
+            found = {person_id for (person_id,) in db.query(model.id).filter(model.id.in_(chunk))}
+            missing.update((person_type, person_id) for person_id in chunk if person_id not in found)
+    return missing
+
+
+def _person_trigger_exists(db: Session) -> bool:
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    return db.execute(
+        text("SELECT 1 FROM pg_trigger WHERE tgname = :name AND NOT tgisinternal"),
+        {"name": PERSON_TRIGGER}
+    ).first() is not None
+
+
+def _copy_rows(db: Session, rows, bypass_trigger: bool):
+    """Inserta un lote con COPY en PostgreSQL (INSERT multi-fila en otros motores)."""
+    # Las jornadas cerradas que reciben registros pierden su resumen diario
+    invalidate_daily_summaries(db, {row[4] for row in rows})
+    if db.get_bind().dialect.name != "postgresql":
+        db.execute(insert(AccessLog), [dict(zip(COLUMNS, row)) for row in rows])
+        return
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for person_type, person_id, access_type, access_time, workday_date in rows:
+        writer.writerow((person_type, person_id, access_type, access_time.isoformat(), workday_date.isoformat()))
+    buffer.seek(0)
+
+    # Los ids ya se validaron en la pasada previa. SET LOCAL solo afecta a esta
+    # transacción y, a diferencia de ALTER TABLE ... DISABLE TRIGGER, no bloquea los
+    # INSERT de los escaneos ni requiere ser dueño de la tabla
+    if bypass_trigger:
+        db.execute(text("SELECT set_config(:name, 'on', true)"), {"name": SKIP_PERSON_CHECK_SETTING})
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY access_logs ({', '.join(COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+
+
+def import_access_logs(
+    db: Session,
+    stream: BinaryIO,
+    fmt: str,
+    job_name: str,
+    skip_invalid: bool = False,
+    batch_size: int = BATCH_SIZE,
+    on_progress: Optional[Callable[[ImportJob], None]] = None
+) -> ImportJob:
+    """
+    Importa registros de acceso de forma masiva y reanudable.
+
+    Cada lote se carga con COPY y el progreso del job se actualiza en la misma
+    transacción, así que al relanzar una importación fallida con el mismo nombre
+    se continúa exactamente desde la última fila confirmada.
+
+    Args:
+        db: Sesión de base de datos
+        stream: Archivo binario con posibilidad de seek (se lee dos veces)
+        fmt: 'csv' o 'ndjson'
+        job_name: Identificador de la importación (para reanudarla)
+        skip_invalid: Omitir filas de personas inexistentes en lugar de abortar
+        batch_size: Filas por lote/transacción
+        on_progress: Función llamada tras cada lote confirmado
+
+    Returns:
+        El job de importación con el progreso final
+
+    Raises:
+        ValueError: Si el archivo es inválido o referencia personas inexistentes
+    """
+    job = db.query(ImportJob).filter(ImportJob.name == job_name).first()
+    if job and job.status == "completed":
+        return job
+
+    total, persons = scan_source(stream, fmt)
+    missing = find_missing_persons(db, persons)
+    if missing and not skip_invalid:
+        sample = ", ".join(f"{person_type} {person_id}" for person_type, person_id in sorted(missing)[:5])
+        raise ValueError(AccessLogMessages.ERROR_IMPORT_UNKNOWN_PERSONS.format(count=len(missing), sample=sample))
+
+    if job is None:
+        job = ImportJob(name=job_name, status="running", total_rows=total)
+        db.add(job)
+    else:
+        job.status = "running"
+        job.total_rows = total
+        job.error = None
+    db.commit()
+    if job.rows_processed:
+        logger.info(f"Reanudando importación '{job_name}' desde la fila {job.rows_processed}")
+
+    bypass_trigger = _person_trigger_exists(db)
+    processed, loaded, skipped = job.rows_processed, job.rows_loaded, job.rows_skipped
+    batch = []
+
+    def flush():
+        if batch:
+            _copy_rows(db, batch, bypass_trigger)
+        job.rows_processed, job.rows_loaded, job.rows_skipped = processed, loaded, skipped
+        db.commit()
+        batch.clear()
+        logger.info(f"Importación '{job_name}': {processed}/{total} filas ({loaded} cargadas, {skipped} omitidas)")
+        if on_progress:
+            on_progress(job)
+
+    try:
+        for index, record in enumerate(iter_records(stream, fmt)):
+            if index < job.rows_processed:
+                continue
+            processed += 1
+            if (record[0], record[1]) in missing:
+                skipped += 1
+            else:
+                batch.append(record)
+                loaded += 1
+            if processed - job.rows_processed >= batch_size:
+                flush()
+        flush()
+        job.status = "completed"
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        job.status = "failed"
+        job.error = str(e)
+        db.commit()
+        logger.error(f"Error en la importación '{job_name}': {str(e)}")
+        raise
+
+    return job
@@ -0,0 +1,99 @@
+from sqlalchemy import insert
+from datetime import datetime, timezone
+from typing import Optional
+import logging
+import os
+import queue
+import threading
+from dotenv import load_dotenv
+
+from app.database.connection import SessionLocal
+from app.models.incident import Incident
+from app.services.metrics_service import INCIDENTS_QUEUED, INCIDENTS_WRITTEN, INCIDENTS_DROPPED
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+INCIDENT_QUEUE_SIZE = int(os.getenv("INCIDENT_QUEUE_SIZE", 10000))
+INCIDENT_BATCH_SIZE = int(os.getenv("INCIDENT_BATCH_SIZE", 500))
+INCIDENT_FLUSH_SECONDS = float(os.getenv("INCIDENT_FLUSH_SECONDS", 1.0))
+
+
+class IncidentWriter:
+    """
+    Registro asíncrono de incidentes. submit() solo encola (nunca bloquea ni toca la
+    base de datos); un hilo en segundo plano vacía la cola con INSERT multi-fila.
+    Si la cola está llena el incidente se descarta y se contabiliza.
+    """
+
+    def __init__(self, max_size: int = INCIDENT_QUEUE_SIZE, batch_size: int = INCIDENT_BATCH_SIZE,
+                 flush_seconds: float = INCIDENT_FLUSH_SECONDS):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=max_size)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, person_type: Optional[str], person_id: Optional[int], incident_type: str, description: str):
+        try:
+            self._queue.put_nowait({
+                "person_type": person_type,
+                "person_id": person_id,
+                "incident_type": incident_type,
+                "description": description,
+                "reported_at": datetime.now(timezone.utc)
+            })
+            INCIDENTS_QUEUED.inc()
+        except queue.Full:
+            self.dropped += 1
+            INCIDENTS_DROPPED.inc("queue_full")
+            if self.dropped % 1000 == 1:
+                logger.warning(f"Cola de incidentes llena: {self.dropped} incidentes descartados")
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="incident-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Detiene el hilo después de escribir lo que quede en la cola."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _next_batch(self) -> list:
+        try:
+            batch = [self._queue.get(timeout=self.flush_seconds)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not (self._stop.is_set() and self._queue.empty()):
+            batch = self._next_batch()
+            if batch:
+                self.flush(batch)
+
+    def flush(self, batch: list):
+        db = SessionLocal()
+        try:
+            db.execute(insert(Incident), batch)
+            db.commit()
+            INCIDENTS_WRITTEN.inc(amount=len(batch))
+        except Exception as e:
+            db.rollback()
+            INCIDENTS_DROPPED.inc("write_error", amount=len(batch))
+            logger.error(f"Error al registrar {len(batch)} incidentes: {str(e)}")
+        finally:
+            db.close()
+
+
+incident_writer = IncidentWriter()
@@ -0,0 +1,218 @@
+from sqlalchemy import text
+from datetime import datetime, timezone
+from typing import Callable, Optional
+import asyncio
+import logging
+import os
+import socket
+import tempfile
+import time
+import zlib
+from dotenv import load_dotenv
+
+from app.database.connection import engine, SessionLocal
+from app.models.scheduled_job_run import ScheduledJobRun
+from app.services.metrics_service import SCHEDULED_JOBS, SCHEDULED_JOB_DURATION
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo de archivos
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+# Directorio de los archivos de bloqueo cuando la base de datos no es PostgreSQL (modo local)
+JOB_LOCK_DIR = os.getenv("JOB_LOCK_DIR", os.path.join(tempfile.gettempdir(), "cryptodevs-jobs"))
+
+WORKER_NAME = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # SQLite devuelve fechas sin zona horaria
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+class JobLock:
+    """
+    Bloqueo entre workers de una tarea programada. En PostgreSQL usa un advisory lock
+    de sesión (pg_try_advisory_lock) sobre una conexión dedicada; en modo local, un
+    flock sobre un archivo en JOB_LOCK_DIR. acquire() nunca espera: si otro worker
+    tiene el bloqueo, la tarea se omite.
+
+    Como los workers no disparan exactamente al mismo tiempo, una tarea corta podría
+    terminar antes de que otro worker intente el bloqueo. Por eso, con el bloqueo
+    tomado, también se omite si scheduled_job_runs registra un inicio hace menos de
+    min_interval_seconds.
+    """
+
+    def __init__(self, job_id: str, min_interval_seconds: float = 0):
+        self.job_id = job_id
+        self.min_interval_seconds = min_interval_seconds
+        self._connection = None
+        self._file = None
+        self._started = None
+
+    def _lock_key(self) -> int:
+        # Clave estable entre procesos (hash() de Python cambia en cada proceso)
+        return zlib.crc32(f"scheduled_job:{self.job_id}".encode())
+
+    def _try_lock(self) -> bool:
+        if engine.dialect.name == "postgresql":
+            self._connection = engine.connect()
+            acquired = self._connection.execute(
+                text("SELECT pg_try_advisory_lock(:key)"), {"key": self._lock_key()}
+            ).scalar()
+            # El advisory lock es de sesión: no dejar la conexión "idle in transaction"
+            self._connection.commit()
+            if not acquired:
+                self._connection.close()
+                self._connection = None
+            return bool(acquired)
+
+        if fcntl is None:
+            logger.warning(f"Sin bloqueo entre workers para la tarea {self.job_id}: fcntl no disponible")
+            return True
+        os.makedirs(JOB_LOCK_DIR, exist_ok=True)
+        self._file = open(os.path.join(JOB_LOCK_DIR, f"{self.job_id}.lock"), "w")
+        try:
+            fcntl.flock(self._file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            self._file.close()
+            self._file = None
+            return False
+
+    def _unlock(self):
+        if self._connection is not None:
+            try:
+                self._connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self._lock_key()})
+                self._connection.commit()
+            finally:
+                self._connection.close()
+                self._connection = None
+        if self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+
+    def _claim_run(self) -> bool:
+        """Registra el inicio de la ejecución salvo que otro worker acabe de hacerla."""
+        now = datetime.now(timezone.utc)
+        db = SessionLocal()
+        try:
+            run = db.get(ScheduledJobRun, self.job_id)
+            if run is not None and self.min_interval_seconds > 0:
+                elapsed = (now - _as_utc(run.started_at)).total_seconds()
+                if 0 <= elapsed < self.min_interval_seconds:
+                    logger.info(
+                        f"Tarea {self.job_id} omitida: ya la ejecutó {run.worker} hace {elapsed:.0f} s"
+                    )
+                    return False
+            if run is None:
+                run = ScheduledJobRun(job_id=self.job_id)
+                db.add(run)
+            run.started_at = now
+            run.finished_at = None
+            run.duration_seconds = None
+            run.status = "running"
+            run.worker = WORKER_NAME
+            db.commit()
+            return True
+        finally:
+            db.close()
+
+    def _record_run(self, status: str, duration: float):
+        db = SessionLocal()
+        try:
+            run = db.get(ScheduledJobRun, self.job_id)
+            if run is not None:
+                run.finished_at = datetime.now(timezone.utc)
+                run.duration_seconds = duration
+                run.status = status
+                db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error al registrar la ejecución de la tarea {self.job_id}: {str(e)}")
+        finally:
+            db.close()
+
+    def acquire(self) -> bool:
+        """
+        Intenta tomar el bloqueo de la tarea sin esperar.
+
+        Returns:
+            True si este worker debe ejecutar la tarea
+        """
+        try:
+            if not self._try_lock():
+                logger.info(f"Tarea {self.job_id} omitida: otro worker tiene el bloqueo")
+                SCHEDULED_JOBS.inc(self.job_id, "locked")
+                return False
+            if not self._claim_run():
+                self._unlock()
+                SCHEDULED_JOBS.inc(self.job_id, "skipped")
+                return False
+        except Exception as e:
+            self._unlock()
+            logger.error(f"Error al obtener el bloqueo de la tarea {self.job_id}: {str(e)}")
+            SCHEDULED_JOBS.inc(self.job_id, "lock_error")
+            return False
+        logger.info(f"Bloqueo de la tarea {self.job_id} obtenido por {WORKER_NAME}")
+        self._started = time.perf_counter()
+        return True
+
+    def release(self, succeeded: bool = True):
+        """Registra la duración y el resultado de la ejecución y libera el bloqueo."""
+        duration = time.perf_counter() - self._started
+        status = "completed" if succeeded else "failed"
+        try:
+            self._record_run(status, duration)
+        finally:
+            self._unlock()
+        SCHEDULED_JOBS.inc(self.job_id, status)
+        SCHEDULED_JOB_DURATION.observe(duration, self.job_id)
+        logger.info(f"Tarea {self.job_id} {'completada' if succeeded else 'fallida'} en {duration:.2f} s")
+
+
+def run_exclusive(job_id: str, job: Callable[[], None], min_interval_seconds: float = 0):
+    """
+    Ejecuta una tarea síncrona en un solo worker.
+
+    Args:
+        job_id: Identificador de la tarea (clave del bloqueo)
+        job: Función a ejecutar; una excepción marca la ejecución como fallida
+        min_interval_seconds: Ventana en la que no se repite una ejecución ya hecha
+    """
+    lock = JobLock(job_id, min_interval_seconds)
+    if not lock.acquire():
+        return
+    succeeded = False
+    try:
+        job()
+        succeeded = True
+    except Exception as e:
+        logger.error(f"Error en la tarea programada {job_id}: {str(e)}")
+    finally:
+        lock.release(succeeded)
+
+
+async def run_exclusive_async(job_id: str, job: Callable, min_interval_seconds: float = 0):
+    """
+    Igual que run_exclusive para corrutinas. El bloqueo y el registro se hacen en un
+    hilo para no bloquear el event loop.
+    """
+    lock = JobLock(job_id, min_interval_seconds)
+    if not await asyncio.to_thread(lock.acquire):
+        return
+    succeeded = False
+    try:
+        await job()
+        succeeded = True
+    except Exception as e:
+        logger.error(f"Error en la tarea programada {job_id}: {str(e)}")
+    finally:
+        await asyncio.to_thread(lock.release, succeeded)
@@ -0,0 +1,153 @@
+from sqlalchemy.orm import Session
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import asyncio
+import logging
+import os
+import threading
+import time
+import orjson
+from dotenv import load_dotenv
+
+from app.services.person_service import get_person_details
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+# Eventos pendientes por cliente; si un cliente lento llena su buffer se descartan los más antiguos
+LIVE_FEED_BUFFER_SIZE = int(os.getenv("LIVE_FEED_BUFFER_SIZE", 256))
+PERSON_CACHE_SIZE = 10000
+PERSON_CACHE_TTL_SECONDS = 300
+
+AccessLogRow = Tuple[int, str, int, str, datetime, date, Optional[str], Optional[str]]
+
+
+class Subscriber:
+    """Buffer acotado de un cliente del feed (SSE o WebSocket), opcionalmente de una sola sede."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, buffer_size: int, site_id: Optional[str] = None):
+        self.loop = loop
+        self.site_id = site_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=buffer_size)
+        self.dropped = 0
+
+    def put(self, event: bytes):
+        # Se ejecuta en el event loop del cliente
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+
+class LiveFeed:
+    """
+    Difusión en proceso de los accesos registrados. Los endpoints publican desde el
+    threadpool y cada evento se serializa una sola vez para todos los clientes.
+    Los datos de la persona salen de una caché con expiración, así que con clientes
+    conectados cada publicación hace como mucho una consulta IN por tipo de persona.
+    """
+
+    def __init__(self, buffer_size: int = LIVE_FEED_BUFFER_SIZE):
+        self.buffer_size = buffer_size
+        self._subscribers: Set[Subscriber] = set()
+        self._persons: "OrderedDict[Tuple[str, int], Tuple[float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def has_subscribers(self) -> bool:
+        return bool(self._subscribers)
+
+    def subscribe(self, site_id: Optional[str] = None) -> Subscriber:
+        """Registra un cliente (de todas las sedes o de una); debe llamarse desde el event loop."""
+        subscriber = Subscriber(asyncio.get_running_loop(), self.buffer_size, site_id)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+        if subscriber.dropped:
+            logger.info(f"Cliente del feed desconectado; se descartaron {subscriber.dropped} eventos por buffer lleno")
+
+    def _resolve_persons(self, db: Session, keys: Iterable[Tuple[str, int]]) -> Dict[Tuple[str, int], dict]:
+        now = time.monotonic()
+        resolved, missing = {}, []
+        with self._lock:
+            for key in set(keys):
+                cached = self._persons.get(key)
+                if cached and cached[0] > now:
+                    self._persons.move_to_end(key)
+                    resolved[key] = cached[1]
+                else:
+                    missing.append(key)
+
+        if missing:
+            resolved.update(get_person_details(db, missing))
+
+        with self._lock:
+            for key, details in resolved.items():
+                self._persons[key] = (now + PERSON_CACHE_TTL_SECONDS, details)
+                self._persons.move_to_end(key)
+            while len(self._persons) > PERSON_CACHE_SIZE:
+                self._persons.popitem(last=False)
+        return resolved
+
+    def publish_access_logs(self, db: Session, rows: List[AccessLogRow]):
+        """
+        Publica accesos ya confirmados con el mismo formato que GET /access-logs/detailed.
+        No hace nada si no hay clientes conectados.
+        """
+        if not self._subscribers or not rows:
+            return
+        empty = {"first_name": None, "last_name": None, "document_number": None, "email": None}
+        try:
+            persons = self._resolve_persons(db, ((row[1], row[2]) for row in rows))
+        except Exception as e:
+            logger.error(f"Error al resolver personas para el feed en vivo: {str(e)}")
+            persons = {}
+
+        events = [
+            (site_id, b"id: %d\nevent: access\ndata: %s\n\n" % (id_, orjson.dumps({
+                "id": id_,
+                "person_type": person_type,
+                "person_id": person_id,
+                "action_type": access_type,
+                "timestamp": access_time,
+                "workday_date": workday_date,
+                "site_id": site_id,
+                "gate_id": gate_id,
+                "person_details": persons.get((person_type, person_id), empty)
+            })))
+            for id_, person_type, person_id, access_type, access_time, workday_date, site_id, gate_id in rows
+        ]
+
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            for site_id, event in events:
+                if subscriber.site_id is not None and subscriber.site_id != site_id:
+                    continue
+                try:
+                    subscriber.loop.call_soon_threadsafe(subscriber.put, event)
+                except RuntimeError:
+                    # El event loop del cliente ya se cerró
+                    self.unsubscribe(subscriber)
+                    break
+
+
+live_feed = LiveFeed()
+
+
+def event_data(event: bytes) -> bytes:
+    """Extrae el JSON de un evento SSE ya renderizado (para WebSocket)."""
+    return event[event.index(b"data: ") + 6:-2]
+
+
+async def next_event(subscriber: Subscriber, timeout: float) -> Optional[bytes]:
+    try:
+        return await asyncio.wait_for(subscriber.queue.get(), timeout)
+    except asyncio.TimeoutError:
+        return None
@@ -0,0 +1,205 @@
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+JOB_DURATION_BUCKETS = (0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # Por cada combinación de etiquetas: [conteos por bucket (+Inf al final), suma, total]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            values = [(labels, list(state[0]), state[1], state[2]) for labels, state in self._values.items()]
+        for labels, counts, total_sum, total_count in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total_sum)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {total_count}")
+        return lines
+
+
+REGISTRY: List[_Metric] = []
+
+HTTP_REQUESTS = Counter("http_requests_total", "Peticiones HTTP atendidas", ("method", "route", "status"))
+HTTP_LATENCY = Histogram("http_request_duration_seconds", "Latencia de las peticiones HTTP", ("method", "route"))
+HTTP_IN_FLIGHT = Gauge("http_requests_in_flight", "Peticiones HTTP en curso")
+HTTP_RESPONSE_SIZE = Histogram("http_response_size_bytes", "Tamaño del cuerpo de las respuestas HTTP",
+                               ("method", "route"), SIZE_BUCKETS)
+DB_QUERIES_PER_REQUEST = Histogram("db_queries_per_request", "Consultas SQL por petición HTTP",
+                                   ("method", "route"), QUERY_COUNT_BUCKETS)
+DB_TIME_PER_REQUEST = Histogram("db_time_per_request_seconds", "Tiempo en base de datos por petición HTTP",
+                                ("method", "route"))
+DB_QUERIES = Counter("db_queries_total", "Consultas SQL ejecutadas (incluye tareas en segundo plano)")
+QR_SCANS = Counter("qr_scans_total", "Resultados de los escaneos de códigos QR", ("outcome",))
+INCIDENTS_QUEUED = Counter("incidents_queued_total", "Incidentes de escaneos rechazados encolados para su registro")
+INCIDENTS_WRITTEN = Counter("incidents_written_total", "Incidentes escritos por el registro asíncrono")
+INCIDENTS_DROPPED = Counter("incidents_dropped_total", "Incidentes descartados por el registro asíncrono", ("reason",))
+SECURITY_ALERTS = Counter("security_alerts_total", "Alertas de seguridad generadas por los detectores de anomalías")
+SCHEDULED_JOBS = Counter("scheduled_jobs_total", "Ejecuciones de tareas programadas por resultado", ("job", "outcome"))
+SCHEDULED_JOB_DURATION = Histogram("scheduled_job_duration_seconds", "Duración de las tareas programadas",
+                                   ("job",), JOB_DURATION_BUCKETS)
+
+# [consultas, segundos] de la petición en curso. Las dependencias y endpoints síncronos
+# se ejecutan en el threadpool con una copia del contexto, que comparte esta lista
+_request_db_stats: ContextVar[Optional[list]] = ContextVar("request_db_stats", default=None)
+
+
+def record_scan(outcome: str):
+    """Registra el resultado de un escaneo: accepted, duplicate, passback, expired, inactive o unknown."""
+    QR_SCANS.inc(outcome)
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def instrument_engine(engine: Engine):
+    """Cuenta las consultas y el tiempo en base de datos de cada petición."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._metrics_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._metrics_start
+        DB_QUERIES.inc()
+        stats = _request_db_stats.get()
+        if stats is not None:
+            stats[0] += 1
+            stats[1] += elapsed
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que mide latencia, peticiones en curso, tamaño de respuesta
+    y consultas SQL por ruta. La ruta se etiqueta con su plantilla
+    (p. ej. /users/{user_id}) para mantener acotada la cardinalidad.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+        response_size = 0
+        stats = [0, 0.0]
+        token = _request_db_stats.set(stats)
+        HTTP_IN_FLIGHT.inc()
+
+        async def send_wrapper(message):
+            nonlocal status_code, response_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            _request_db_stats.reset(token)
+            route = scope.get("route")
+            route_label = getattr(route, "path_format", None) or getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            HTTP_REQUESTS.inc(method, route_label, str(status_code))
+            HTTP_LATENCY.observe(time.perf_counter() - start, method, route_label)
+            HTTP_RESPONSE_SIZE.observe(response_size, method, route_label)
+            DB_QUERIES_PER_REQUEST.observe(stats[0], method, route_label)
+            DB_TIME_PER_REQUEST.observe(stats[1], method, route_label)
@@ -0,0 +1,39 @@
+from sqlalchemy.orm import Session
+from typing import Dict, Iterable, Tuple
+
+from app.models.user import User
+from app.models.visitor import Visitor
+
+PERSON_MODELS = (('employee', User), ('visitor', Visitor))
+
+
+def get_person_details(db: Session, keys: Iterable[Tuple[str, int]]) -> Dict[Tuple[str, int], dict]:
+    """
+    Obtiene nombre, documento y correo de varias personas con una consulta IN por tipo.
+
+    Args:
+        db: Sesión de base de datos
+        keys: Pares (person_type, person_id)
+
+    Returns:
+        Diccionario {(person_type, person_id): detalles}; las personas inexistentes no aparecen
+    """
+    ids = {'employee': set(), 'visitor': set()}
+    for person_type, person_id in keys:
+        ids[person_type].add(person_id)
+
+    details = {}
+    for person_type, model in PERSON_MODELS:
+        if not ids[person_type]:
+            continue
+        rows = db.query(
+            model.id, model.first_name, model.last_name, model.document_number, model.email
+        ).filter(model.id.in_(ids[person_type]))
+        for person_id, first_name, last_name, document_number, email in rows:
+            details[(person_type, person_id)] = {
+                "first_name": first_name,
+                "last_name": last_name,
+                "document_number": document_number,
+                "email": email
+            }
+    return details
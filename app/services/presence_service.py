@@ -0,0 +1,145 @@
+from sqlalchemy import select, func, and_
+from sqlalchemy.orm import Session
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+import logging
+import os
+import threading
+from dotenv import load_dotenv
+
+from app.models.access_log import AccessLog
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+# Lecturas repetidas del mismo carné en el mismo sentido dentro de esta ventana se descartan
+SCAN_DEBOUNCE_SECONDS = float(os.getenv("SCAN_DEBOUNCE_SECONDS", 10))
+# Anti-passback: rechaza dos entradas (o dos salidas) seguidas dentro de esta ventana (0 = desactivado)
+ANTI_PASSBACK_HOURS = float(os.getenv("ANTI_PASSBACK_HOURS", 0))
+PRESENCE_SEED_HOURS = 24
+# event_id de los últimos escaneos aceptados, para responder a los reintentos sin tocar la base
+RECENT_EVENTS_SIZE = 10000
+
+ACCEPTED = "accepted"
+DUPLICATE = "duplicate"
+PASSBACK = "passback"
+
+
+def _aware(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+class PresenceTracker:
+    """
+    Último evento (entrada o salida) de cada persona, en memoria. Permite descartar
+    lecturas duplicadas, aplicar anti-passback e inferir el sentido del acceso sin
+    consultar access_logs. Cada worker mantiene su propio estado.
+    """
+
+    def __init__(self, debounce_seconds: float = SCAN_DEBOUNCE_SECONDS, anti_passback_hours: float = ANTI_PASSBACK_HOURS):
+        self.debounce = timedelta(seconds=debounce_seconds)
+        self.anti_passback = timedelta(hours=anti_passback_hours)
+        self._last: Dict[Tuple[str, int], Tuple[str, datetime]] = {}
+        self._events: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._last)
+
+    def load(self, db: Session, hours: float = PRESENCE_SEED_HOURS):
+        """Carga el último evento de cada persona con accesos en las últimas horas."""
+        since = datetime.now(timezone.utc) - timedelta(hours=hours)
+        latest = select(
+            AccessLog.person_type,
+            AccessLog.person_id,
+            func.max(AccessLog.access_time).label("access_time")
+        ).where(AccessLog.access_time >= since).group_by(AccessLog.person_type, AccessLog.person_id).subquery()
+        rows = db.execute(
+            select(AccessLog.person_type, AccessLog.person_id, AccessLog.access_type, AccessLog.access_time)
+            .join(latest, and_(
+                AccessLog.person_type == latest.c.person_type,
+                AccessLog.person_id == latest.c.person_id,
+                AccessLog.access_time == latest.c.access_time
+            ))
+        ).all()
+        with self._lock:
+            self._last = {
+                (person_type, person_id): (access_type, _aware(access_time))
+                for person_type, person_id, access_type, access_time in rows
+            }
+        logger.info(f"Estado de presencia cargado: {len(rows)} personas")
+
+    def last_event(self, person_type: str, person_id: int) -> Optional[Tuple[str, datetime]]:
+        return self._last.get((person_type, person_id))
+
+    def admit(self, person_type: str, person_id: int, access_type: Optional[str], now: datetime,
+              event_id: Optional[str] = None) -> Tuple[str, str]:
+        """
+        Decide qué hacer con un escaneo y, si se acepta, lo registra como último
+        evento en la misma operación (dos lecturas simultáneas no pasan ambas).
+
+        Args:
+            person_type: 'employee' o 'visitor'
+            person_id: Id de la persona
+            access_type: 'entry', 'exit' o None para inferirlo del último evento
+            now: Momento del escaneo
+            event_id: Id del evento enviado por la portería; un reintento de un evento
+                ya aceptado es un duplicado aunque haya pasado la ventana de debounce
+
+        Returns:
+            (sentido del acceso, resultado: accepted, duplicate o passback)
+        """
+        key = (person_type, person_id)
+        with self._lock:
+            if event_id is not None and event_id in self._events:
+                return self._events[event_id], DUPLICATE
+            last = self._last.get(key)
+            if access_type is None:
+                # Con el sentido inferido, una relectura inmediata repetiría el último evento
+                if last is not None and now - last[1] < self.debounce:
+                    return last[0], DUPLICATE
+                access_type = "exit" if last and last[0] == "entry" else "entry"
+            if last is not None and last[0] == access_type:
+                elapsed = now - last[1]
+                if elapsed < self.debounce:
+                    return access_type, DUPLICATE
+                if elapsed < self.anti_passback:
+                    return access_type, PASSBACK
+            self._last[key] = (access_type, now)
+            if event_id is not None:
+                self._events[event_id] = access_type
+                if len(self._events) > RECENT_EVENTS_SIZE:
+                    self._events.popitem(last=False)
+        return access_type, ACCEPTED
+
+    def restore(self, person_type: str, person_id: int, previous: Optional[Tuple[str, datetime]], now: datetime,
+                event_id: Optional[str] = None):
+        """
+        Deshace un admit() cuyo acceso no llegó a guardarse (p. ej. el event_id ya estaba
+        registrado por otro worker), salvo que otro escaneo posterior ya lo haya reemplazado.
+        Con event_id (el INSERT falló), el evento se olvida para que el reintento se acepte.
+        """
+        key = (person_type, person_id)
+        with self._lock:
+            if event_id is not None:
+                self._events.pop(event_id, None)
+            current = self._last.get(key)
+            if current is not None and current[1] == now:
+                if previous is None:
+                    del self._last[key]
+                else:
+                    self._last[key] = previous
+
+    def record(self, person_type: str, person_id: int, access_type: str, access_time: datetime):
+        """Registra un acceso confirmado (se ignora si es anterior al último conocido)."""
+        access_time = _aware(access_time)
+        key = (person_type, person_id)
+        with self._lock:
+            last = self._last.get(key)
+            if last is None or access_time >= last[1]:
+                self._last[key] = (access_type, access_time)
+
+
+presence = PresenceTracker()
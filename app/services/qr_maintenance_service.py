@@ -0,0 +1,103 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import select, insert, delete, update, case, func, literal
+from datetime import datetime, timedelta, timezone
+from typing import List, Tuple
+import logging
+import os
+from dotenv import load_dotenv
+
+from app.models.qr_code import QRCode
+from app.models.qr_code_archive import QRCodeArchive
+from app.models.qr_code_change import QRCodeChange
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+QR_SWEEP_INTERVAL_MINUTES = int(os.getenv("QR_SWEEP_INTERVAL_MINUTES", 60))
+QR_SWEEP_CHUNK_SIZE = int(os.getenv("QR_SWEEP_CHUNK_SIZE", 5000))
+QR_ARCHIVE_AFTER_HOURS = int(os.getenv("QR_ARCHIVE_AFTER_HOURS", 24))
+
+
+def _next_chunk(db: Session, condition, chunk_size: int) -> List[int]:
+    return [qr_id for (qr_id,) in db.execute(
+        select(QRCode.id).where(*condition).order_by(QRCode.id).limit(chunk_size)
+    )]
+
+
+def deactivate_expired_qr_codes(db: Session, now: datetime, chunk_size: int = QR_SWEEP_CHUNK_SIZE) -> int:
+    """
+    Desactiva por bloques los códigos vencidos que siguen activos. Como query.update
+    no dispara los eventos del ORM, cada bloque inserta también sus cambios en
+    qr_code_changes para los agentes de portería y las revocaciones.
+
+    Returns:
+        Número de códigos desactivados
+    """
+    total = 0
+    condition = (QRCode.is_active == True, QRCode.expires_at < now)
+    while True:
+        ids = _next_chunk(db, condition, chunk_size)
+        if not ids:
+            return total
+        db.execute(update(QRCode).where(QRCode.id.in_(ids)).values(is_active=False))
+        db.execute(insert(QRCodeChange).from_select(
+            ["qr_code_id", "code", "person_type", "person_id", "is_active", "expires_at"],
+            select(
+                QRCode.id,
+                QRCode.code,
+                case((QRCode.user_id.isnot(None), "employee"), else_="visitor"),
+                func.coalesce(QRCode.user_id, QRCode.visitor_id),
+                literal(False),
+                QRCode.expires_at,
+            ).where(QRCode.id.in_(ids))
+        ))
+        db.commit()
+        total += len(ids)
+
+
+def archive_expired_qr_codes(db: Session, cutoff: datetime, chunk_size: int = QR_SWEEP_CHUNK_SIZE) -> int:
+    """
+    Mueve por bloques a qr_codes_archive los códigos inactivos vencidos antes de cutoff.
+
+    Returns:
+        Número de códigos archivados
+    """
+    total = 0
+    condition = (QRCode.is_active == False, QRCode.expires_at < cutoff)
+    columns = ["id", "code", "user_id", "visitor_id", "created_at", "expires_at"]
+    while True:
+        ids = _next_chunk(db, condition, chunk_size)
+        if not ids:
+            return total
+        db.execute(insert(QRCodeArchive).from_select(
+            columns,
+            select(*(getattr(QRCode, column) for column in columns)).where(QRCode.id.in_(ids))
+        ))
+        db.execute(delete(QRCode).where(QRCode.id.in_(ids)))
+        db.commit()
+        total += len(ids)
+
+
+def sweep_expired_qr_codes(
+    db: Session,
+    chunk_size: int = QR_SWEEP_CHUNK_SIZE,
+    archive_after: timedelta = timedelta(hours=QR_ARCHIVE_AFTER_HOURS)
+) -> Tuple[int, int]:
+    """
+    Desactiva los códigos QR vencidos y archiva los que llevan más de archive_after
+    vencidos (hasta entonces un escaneo sigue respondiendo que el código expiró
+    en lugar de que no existe).
+
+    Args:
+        db: Sesión de base de datos
+        chunk_size: Códigos por sentencia/transacción
+        archive_after: Tiempo que un código vencido permanece en qr_codes
+
+    Returns:
+        (códigos desactivados, códigos archivados)
+    """
+    now = datetime.now(timezone.utc)
+    deactivated = deactivate_expired_qr_codes(db, now, chunk_size)
+    archived = archive_expired_qr_codes(db, now - archive_after, chunk_size)
+    return deactivated, archived
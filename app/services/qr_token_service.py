@@ -0,0 +1,164 @@
+from sqlalchemy import or_, func
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta, timezone
+from typing import Dict, NamedTuple, Optional
+import base64
+import hashlib
+import hmac
+import logging
+import os
+import threading
+import time
+from dotenv import load_dotenv
+
+from app.models.qr_code import QRCode
+from app.models.qr_code_change import QRCodeChange, latest_changes_since
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+QR_SIGNING_KEY = os.getenv("QR_SIGNING_KEY", "")
+QR_REVOCATION_REFRESH_SECONDS = int(os.getenv("QR_REVOCATION_REFRESH_SECONDS", 5))
+# Ventana en la que los lectores del registro de cambios vuelven a leer los códigos
+# cambiados: cubre las transacciones que confirman un id menor después de otro mayor
+QR_CHANGES_REPLAY_SECONDS = int(os.getenv("QR_CHANGES_REPLAY_SECONDS", 300))
+
+TOKEN_PREFIX = "v1"
+SIGNATURE_BYTES = 16
+PERSON_TYPE_CODES = {"employee": "e", "visitor": "v"}
+PERSON_TYPES = {code: person_type for person_type, code in PERSON_TYPE_CODES.items()}
+
+
+class SignedQRToken(NamedTuple):
+    person_type: str
+    person_id: int
+    qr_id: int
+    expires_at: Optional[int]  # epoch en segundos, None si no expira
+
+
+def signing_enabled() -> bool:
+    return bool(QR_SIGNING_KEY)
+
+
+def is_signed_token(code: str) -> bool:
+    """Los códigos uuid no contienen puntos, los tokens firmados sí."""
+    return code.startswith(TOKEN_PREFIX + ".")
+
+
+def _epoch(value: Optional[datetime]) -> Optional[int]:
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+def _signature(payload: str) -> str:
+    digest = hmac.new(QR_SIGNING_KEY.encode(), payload.encode(), hashlib.sha256).digest()[:SIGNATURE_BYTES]
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+
+def sign_qr_token(qr_code: QRCode) -> str:
+    """
+    Genera el token firmado (HMAC-SHA256) de un código QR.
+
+    Formato: v1.<e|v>.<person_id>.<qr_id>.<expires_at epoch, 0 si no expira>.<firma>
+
+    Args:
+        qr_code: Código QR ya persistido (necesita su id)
+
+    Returns:
+        Token que puede validarse sin consultar la base de datos
+    """
+    person_type = "employee" if qr_code.user_id else "visitor"
+    person_id = qr_code.user_id if qr_code.user_id else qr_code.visitor_id
+    payload = ".".join((
+        TOKEN_PREFIX,
+        PERSON_TYPE_CODES[person_type],
+        str(person_id),
+        str(qr_code.id),
+        str(_epoch(qr_code.expires_at) or 0),
+    ))
+    return f"{payload}.{_signature(payload)}"
+
+
+def verify_qr_token(token: str) -> SignedQRToken:
+    """
+    Comprueba la firma de un token y devuelve su contenido. No revisa la expiración
+    ni las revocaciones.
+
+    Raises:
+        ValueError: Si la firma está desactivada, el token está mal formado o la firma no coincide
+    """
+    if not signing_enabled():
+        raise ValueError("La firma de códigos QR no está configurada")
+    payload, _, signature = token.rpartition(".")
+    if not hmac.compare_digest(signature, _signature(payload)):
+        raise ValueError("Firma de código QR inválida")
+    try:
+        _, person_type, person_id, qr_id, expires_at = payload.split(".")
+        return SignedQRToken(PERSON_TYPES[person_type], int(person_id), int(qr_id), int(expires_at) or None)
+    except (KeyError, ValueError):
+        raise ValueError("Token de código QR mal formado")
+
+
+class RevocationSet:
+    """
+    Ids de códigos QR desactivados antes de expirar. Se carga al iniciar y se
+    mantiene al día leyendo el registro de cambios (qr_code_changes) desde la última
+    versión aplicada; las entradas se descartan cuando el código expira.
+    """
+
+    def __init__(self):
+        self._revoked: Dict[int, Optional[int]] = {}
+        self._version = 0
+        self._lock = threading.Lock()
+
+    def __contains__(self, qr_id: int) -> bool:
+        return qr_id in self._revoked
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+    def revoke(self, qr_id: int, expires_at: Optional[datetime]):
+        with self._lock:
+            self._revoked[qr_id] = _epoch(expires_at)
+
+    def load(self, db: Session):
+        now = datetime.now(timezone.utc)
+        version = db.query(func.max(QRCodeChange.id)).scalar() or 0
+        rows = db.query(QRCode.id, QRCode.expires_at).filter(
+            QRCode.is_active == False,
+            or_(QRCode.expires_at.is_(None), QRCode.expires_at > now)
+        ).all()
+        with self._lock:
+            self._revoked = {qr_id: _epoch(expires_at) for qr_id, expires_at in rows}
+            self._version = version
+        logger.info(f"Revocaciones de QR cargadas: {len(rows)}")
+
+    def refresh(self, db: Session):
+        changes = db.query(
+            QRCodeChange.id, QRCodeChange.qr_code_id, QRCodeChange.is_active, QRCodeChange.expires_at
+        ).filter(QRCodeChange.id > self._version).order_by(QRCodeChange.id).all()
+        # Estado actual de los códigos cambiados hace poco: recupera los cambios con un id
+        # menor que la versión aplicada que se confirmaron después de leerla
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=QR_CHANGES_REPLAY_SECONDS)
+        replayed = [
+            (change.id, change.qr_code_id, change.is_active, change.expires_at)
+            for change in latest_changes_since(db, cutoff)
+        ]
+        now = time.time()
+        with self._lock:
+            for version, qr_id, is_active, expires_at in sorted(changes + replayed):
+                if is_active:
+                    self._revoked.pop(qr_id, None)
+                else:
+                    self._revoked[qr_id] = _epoch(expires_at)
+                self._version = max(self._version, version)
+            for qr_id, expires_at in list(self._revoked.items()):
+                if expires_at is not None and expires_at < now:
+                    del self._revoked[qr_id]
+
+
+qr_revocations = RevocationSet()
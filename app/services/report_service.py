@@ -1,80 +1,413 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
-from datetime import datetime, timedelta, timezone
-from typing import List, Dict, Any
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy import func, and_, extract, cast, insert, null, update, Integer
+from sqlalchemy.dialects import postgresql, sqlite
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Dict, Any, Iterable, Optional, Tuple, Union
+from zoneinfo import ZoneInfo
 import io
+import os
 from app.models.access_log import AccessLog
+from app.services.archive_service import archive_boundary, archived_hourly_counts, archived_daily_counts
+from app.models.daily_access_summary import DailyAccessSummary
 from app.models.user import User
 from app.models.visitor import Visitor
 
-def get_weekly_access_report(db: Session) -> Dict[str, Any]:
+# Zona horaria de las jornadas para los informes por hora (access_time se guarda en UTC)
+REPORT_TIMEZONE = os.getenv("REPORT_TIMEZONE", "America/Bogota")
+# Consultas de conteo en paralelo de los informes, cada una sobre un tramo de jornadas
+# (REPORT_SITE_WORKERS es el nombre anterior de la variable)
+REPORT_COUNT_WORKERS = int(os.getenv("REPORT_COUNT_WORKERS", os.getenv("REPORT_SITE_WORKERS", 4)))
+# Ventana de accesos considerada para la ocupación actual
+OCCUPANCY_HOURS = 24
+RAW_DATA_LIMIT = 50
+# Clave de los registros sin sede en los desgloses por sede
+UNASSIGNED_SITE = "unassigned"
+# Jornadas cerradas hacia atrás que el job diario resume si aún no tienen resumen
+REPORT_BACKFILL_DAYS = int(os.getenv("REPORT_BACKFILL_DAYS", 62))
+# Rango máximo de los informes por rango explícito (un resumen por jornada)
+MAX_REPORT_DAYS = 366
+
+REPORT_TYPES = ("daily", "weekly", "monthly")
+REPORT_TITLES = {
+    "daily": "Resumen Diario de Accesos",
+    "weekly": "Informe Semanal de Accesos",
+    "monthly": "Informe Mensual de Accesos",
+}
+
+# INSERT con ON CONFLICT según el motor (resúmenes diarios)
+_CONFLICT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+def _local_weekday_hour(db: Session, tz_name: str):
     """
-    Genera un informe semanal de accesos.
-    
+    Expresiones SQL de día de la semana (lunes = 0) y hora local de access_time.
+    SQLite no tiene zonas horarias: se aplica el desplazamiento actual de la zona.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        local_time = func.timezone(tz_name, AccessLog.access_time)
+        return cast(extract("isodow", local_time), Integer) - 1, cast(extract("hour", local_time), Integer)
+
+    offset = int(datetime.now(ZoneInfo(tz_name)).utcoffset().total_seconds() // 60)
+    local_time = func.datetime(AccessLog.access_time, f"{offset:+d} minutes")
+    weekday = (cast(func.strftime("%w", local_time), Integer) + 6) % 7
+    return weekday, cast(func.strftime("%H", local_time), Integer)
+
+def get_access_heatmap(
+    db: Session,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    person_type: Optional[str] = None,
+    tz_name: str = REPORT_TIMEZONE,
+    site_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Genera la matriz 7x24 de entradas y salidas por día de la semana y hora local.
+
+    Los conteos salen de una sola agregación GROUP BY (día, hora, tipo de acceso) en la
+    base de datos, más la misma agregación sobre el histórico en Parquet si el rango
+    llega a meses archivados.
+
     Args:
         db: Sesión de base de datos
-        
+        date_from: Primera jornada incluida (workday_date)
+        date_to: Última jornada incluida
+        person_type: 'employee', 'visitor' o None para ambos
+        tz_name: Zona horaria de las horas del informe
+        site_id: Sede o None para todas
+
     Returns:
-        Diccionario con datos del informe
+        Diccionario con las matrices de entradas y salidas (filas = lunes..domingo)
     """
-    # Calcular fecha de inicio (hace 7 días)
-    end_date = datetime.now(timezone.utc)
-    start_date = end_date - timedelta(days=7)
-    
-    # Obtener registros de acceso de la última semana
-    access_logs = db.query(AccessLog).filter(
-        and_(
-            AccessLog.access_time >= start_date,
-            AccessLog.access_time <= end_date
+    weekday, hour = _local_weekday_hour(db, tz_name)
+    query = db.query(weekday, hour, AccessLog.access_type, func.count()).group_by(weekday, hour, AccessLog.access_type)
+    if date_from:
+        query = query.filter(AccessLog.workday_date >= date_from)
+    if date_to:
+        query = query.filter(AccessLog.workday_date <= date_to)
+    if person_type:
+        query = query.filter(AccessLog.person_type == person_type)
+    if site_id:
+        query = query.filter(AccessLog.site_id == site_id)
+
+    matrices = {"entry": [[0] * 24 for _ in range(7)], "exit": [[0] * 24 for _ in range(7)]}
+    for day, hour_, access_type, count in query:
+        matrices[access_type][day][hour_] += count
+
+    boundary = archive_boundary()
+    if boundary and (date_from is None or date_from < boundary):
+        for (day, hour_, access_type), count in archived_hourly_counts(date_from, date_to, person_type, tz_name, site_id).items():
+            matrices[access_type][day][hour_] += count
+
+    return {
+        "date_from": date_from,
+        "date_to": date_to,
+        "person_type": person_type,
+        "site_id": site_id,
+        "timezone": tz_name,
+        "weekdays": WEEKDAYS,
+        "entries": matrices["entry"],
+        "exits": matrices["exit"],
+        "total_entries": sum(map(sum, matrices["entry"])),
+        "total_exits": sum(map(sum, matrices["exit"]))
+    }
+
+def _today() -> date:
+    # workday_date se asigna con la fecha UTC del acceso: las jornadas anteriores están cerradas
+    return datetime.now(timezone.utc).date()
+
+def _day_counts(bind: Union[Engine, Connection], days: List[date]) -> List[Tuple[date, Optional[str], str, str, int]]:
+    """
+    Conteos de accesos de unas jornadas (en orden) por (jornada, sede, tipo de persona,
+    tipo de acceso), con una búsqueda por rango en el índice de jornada. Usa su propia sesión, sobre la
+    misma base (primario o réplica) que la del informe, para poder ejecutarse en
+    paralelo con los demás tramos de jornadas.
+    """
+    db = Session(bind=bind)
+    try:
+        return db.query(
+            AccessLog.workday_date, AccessLog.site_id, AccessLog.person_type, AccessLog.access_type, func.count()
+        ).filter(
+            # El rango acota la búsqueda en el índice; IN descarta las jornadas intermedias ya resumidas
+            AccessLog.workday_date >= days[0],
+            AccessLog.workday_date <= days[-1],
+            AccessLog.workday_date.in_(days)
+        ).group_by(AccessLog.workday_date, AccessLog.site_id, AccessLog.person_type, AccessLog.access_type).all()
+    finally:
+        db.close()
+
+def _add_count(days: Dict[date, Dict], workday_date: date, site: Optional[str], person_type: str,
+               access_type: str, count: int):
+    by_person = days.setdefault(workday_date, {}).setdefault(site or UNASSIGNED_SITE, {})
+    by_access = by_person.setdefault(person_type, {})
+    by_access[access_type] = by_access.get(access_type, 0) + count
+
+def _count_days(db: Session, days: List[date]) -> Dict[date, Dict]:
+    """
+    Cuenta en vivo los accesos de las jornadas indicadas, con un solo pase por fuente:
+    access_logs se agrega con un GROUP BY por (jornada, sede, tipo de persona, tipo de
+    acceso), repartiendo las jornadas en hasta REPORT_COUNT_WORKERS tramos que se
+    consultan a la vez, y a las jornadas archivadas se suma el conteo del Parquet.
+    access_logs se consulta para todas las jornadas porque los accesos que llegan tarde
+    a una jornada ya archivada quedan en la tabla hasta el siguiente archivado (como en
+    el mapa de calor).
+
+    Returns:
+        {jornada: {sede: {tipo de persona: {tipo de acceso: cantidad}}}}
+    """
+    counts: Dict[date, Dict] = {day: {} for day in days}
+    boundary = archive_boundary()
+    archived = [day for day in days if boundary and day < boundary]
+
+    if archived:
+        for workday_date, site, person_type, access_type, count in archived_daily_counts(archived[0], archived[-1]):
+            if workday_date in counts:
+                _add_count(counts, workday_date, site, person_type, access_type, count)
+
+    if days:
+        ordered = sorted(days)
+        size = -(-len(ordered) // REPORT_COUNT_WORKERS)
+        chunks = [ordered[start:start + size] for start in range(0, len(ordered), size)]
+        bind = db.get_bind()
+        with ThreadPoolExecutor(max_workers=len(chunks)) as executor:
+            for rows in executor.map(lambda chunk: _day_counts(bind, chunk), chunks):
+                for workday_date, site, person_type, access_type, count in rows:
+                    _add_count(counts, workday_date, site, person_type, access_type, count)
+    return counts
+
+def _store_summaries(store: Session, counts: Dict[date, Dict], versions: Dict[date, int]):
+    """
+    Guarda los resúmenes contados solo si la jornada no fue invalidada mientras se
+    contaba: UPDATE condicionado a la versión leída antes de contar, o INSERT ... ON
+    CONFLICT DO NOTHING si la jornada no tenía fila. Una invalidación en curso bloquea
+    la fila, así que la escritura espera a que termine y luego no encuentra la versión.
+    """
+    now = datetime.now(timezone.utc)
+    conflict_insert = _CONFLICT_INSERTS.get(store.get_bind().dialect.name)
+    for day, day_counts in counts.items():
+        if day in versions:
+            store.execute(
+                update(DailyAccessSummary)
+                .where(DailyAccessSummary.workday_date == day, DailyAccessSummary.version == versions[day])
+                .values(counts=day_counts, computed_at=now)
+            )
+        elif conflict_insert is None:
+            # Otros motores: una invalidación concurrente se vería como error de clave
+            store.execute(insert(DailyAccessSummary).values(workday_date=day, counts=day_counts, computed_at=now))
+        else:
+            store.execute(
+                conflict_insert(DailyAccessSummary)
+                .values(workday_date=day, counts=day_counts, computed_at=now, version=0)
+                .on_conflict_do_nothing(index_elements=["workday_date"])
+            )
+    store.commit()
+
+def get_daily_counts(db: Session, first_day: date, last_day: date,
+                     store: Optional[Session] = None) -> Dict[date, Dict]:
+    """
+    Conteos por jornada de un rango. Las jornadas cerradas ya resumidas se leen de
+    daily_access_summaries; las demás (incluida la jornada en curso) se cuentan en vivo.
+
+    Las jornadas cerradas que se van a guardar se cuentan en el primario (store): una
+    réplica atrasada podría no tener todavía un lote tardío cuya invalidación ya se
+    hizo, y el resumen quedaría incompleto para siempre.
+
+    Args:
+        db: Sesión de lectura (primario o réplica)
+        first_day: Primera jornada del rango
+        last_day: Última jornada del rango
+        store: Sesión del primario donde contar y guardar los resúmenes de las jornadas
+            cerradas que faltan (None para contarlas en db sin guardarlas)
+
+    Returns:
+        {jornada: {sede: {tipo de persona: {tipo de acceso: cantidad}}}}
+    """
+    counts = {
+        workday_date: summary_counts
+        for workday_date, summary_counts in db.query(DailyAccessSummary.workday_date, DailyAccessSummary.counts).filter(
+            DailyAccessSummary.workday_date >= first_day,
+            DailyAccessSummary.workday_date <= last_day,
+            DailyAccessSummary.counts.isnot(None)
         )
-    ).all()
-    
-    # Estadísticas generales
-    total_entries = sum(1 for log in access_logs if log.access_type == 'entry')
-    total_exits = sum(1 for log in access_logs if log.access_type == 'exit')
-    
-    # Estadísticas por tipo de persona
-    employee_entries = sum(1 for log in access_logs if log.access_type == 'entry' and log.person_type == 'employee')
-    employee_exits = sum(1 for log in access_logs if log.access_type == 'exit' and log.person_type == 'employee')
-    visitor_entries = sum(1 for log in access_logs if log.access_type == 'entry' and log.person_type == 'visitor')
-    visitor_exits = sum(1 for log in access_logs if log.access_type == 'exit' and log.person_type == 'visitor')
-    
-    # Estadísticas por día
+    }
+    today = _today()
+    missing = [
+        first_day + timedelta(days=offset)
+        for offset in range((min(last_day, today) - first_day).days + 1)
+        if first_day + timedelta(days=offset) not in counts
+    ]
+    closed = [day for day in missing if day < today]
+    if store is None or not closed:
+        if missing:
+            counts.update(_count_days(db, missing))
+        return counts
+
+    # Versión antes de contar: una invalidación posterior hace que el resumen no se guarde
+    versions = dict(store.query(DailyAccessSummary.workday_date, DailyAccessSummary.version).filter(
+        DailyAccessSummary.workday_date.in_(closed)
+    ))
+    closed_counts = _count_days(store, closed)
+    counts.update(closed_counts)
+    if len(closed) < len(missing):
+        counts.update(_count_days(db, [day for day in missing if day >= today]))
+    _store_summaries(store, closed_counts, versions)
+    return counts
+
+def store_daily_summaries(db: Session, days_back: int = REPORT_BACKFILL_DAYS) -> int:
+    """
+    Resume y guarda las jornadas cerradas de los últimos days_back días que aún no
+    tienen resumen (la de ayer y las invalidadas por accesos tardíos).
+
+    Args:
+        db: Sesión del primario
+
+    Returns:
+        Número de jornadas resumidas
+    """
+    last_day = _today() - timedelta(days=1)
+    first_day = last_day - timedelta(days=days_back - 1)
+    stored = {
+        workday_date for (workday_date,) in db.query(DailyAccessSummary.workday_date).filter(
+            DailyAccessSummary.workday_date >= first_day,
+            DailyAccessSummary.counts.isnot(None)
+        )
+    }
+    missing = sum(1 for offset in range(days_back) if first_day + timedelta(days=offset) not in stored)
+    if missing:
+        get_daily_counts(db, first_day, last_day, store=db)
+    return missing
+
+def invalidate_daily_summaries(db: Session, workday_dates: Iterable[date]):
+    """
+    Invalida los resúmenes de las jornadas cerradas que reciben accesos tardíos (lotes
+    de agentes sin conexión, importaciones, correcciones), sin confirmar la
+    transacción: borra los conteos y aumenta la versión, creando la fila si la jornada
+    aún no tenía resumen. Así un conteo que empezó antes de este lote no puede guardarse
+    después. El job diario vuelve a calcular las jornadas invalidadas.
+    """
+    today = _today()
+    # En orden: dos lotes que invalidan las mismas jornadas toman los bloqueos igual
+    closed = sorted({workday_date for workday_date in workday_dates if workday_date < today})
+    if not closed:
+        return
+    conflict_insert = _CONFLICT_INSERTS.get(db.get_bind().dialect.name)
+    if conflict_insert is None:
+        # Otros motores: sin upsert atómico, se borran los resúmenes
+        db.query(DailyAccessSummary).filter(
+            DailyAccessSummary.workday_date.in_(closed)
+        ).delete(synchronize_session=False)
+        return
+    statement = conflict_insert(DailyAccessSummary).values(
+        [{"workday_date": day, "counts": null(), "computed_at": null(), "version": 1} for day in closed]
+    )
+    db.execute(statement.on_conflict_do_update(
+        index_elements=["workday_date"],
+        set_={"counts": null(), "computed_at": null(), "version": DailyAccessSummary.version + 1}
+    ))
+
+def report_period(report_type: str, reference: Optional[date] = None) -> Tuple[date, date]:
+    """
+    Último período cerrado de un tipo de informe: la jornada anterior (daily), los 7
+    días anteriores (weekly; el lunes, la semana de lunes a domingo) o el mes anterior
+    (monthly).
+
+    Args:
+        report_type: daily, weekly o monthly
+        reference: Día desde el que se mira hacia atrás (hoy por defecto)
+
+    Returns:
+        Primera y última jornada del período
+    """
+    reference = reference or _today()
+    if report_type == "daily":
+        return reference - timedelta(days=1), reference - timedelta(days=1)
+    if report_type == "weekly":
+        return reference - timedelta(days=7), reference - timedelta(days=1)
+    if report_type == "monthly":
+        last_day = reference.replace(day=1) - timedelta(days=1)
+        return last_day.replace(day=1), last_day
+    raise ValueError(f"Tipo de informe no válido: {report_type}")
+
+def build_access_report(db: Session, first_day: date, last_day: date, site_id: Optional[str] = None,
+                        report_type: Optional[str] = None, store: Optional[Session] = None) -> Dict[str, Any]:
+    """
+    Informe de accesos de un rango de jornadas, de una sede o de todas, armado sumando
+    los conteos diarios (guardados para las jornadas cerradas, en vivo para el resto).
+    Un informe mensual cuesta lo mismo que uno semanal: leer un resumen por jornada.
+
+    Args:
+        db: Sesión de base de datos
+        first_day: Primera jornada
+        last_day: Última jornada
+        site_id: Sede del informe o None para todas (con el desglose por sede)
+        report_type: daily, weekly o monthly (título del informe)
+        store: Sesión donde guardar los resúmenes que falten (ver get_daily_counts)
+
+    Returns:
+        Diccionario con datos del informe
+    """
+    days = get_daily_counts(db, first_day, last_day, store)
+
+    # Combinar los conteos de las jornadas
+    totals = {"entry": 0, "exit": 0}
+    by_type = {
+        "employee": {"entry": 0, "exit": 0},
+        "visitor": {"entry": 0, "exit": 0}
+    }
+    by_site = {}
     daily_stats = {}
-    for log in access_logs:
-        day = log.access_time.strftime('%Y-%m-%d')
-        if day not in daily_stats:
-            daily_stats[day] = {'entries': 0, 'exits': 0}
-        
-        if log.access_type == 'entry':
-            daily_stats[day]['entries'] += 1
-        else:
-            daily_stats[day]['exits'] += 1
-    
+    for workday_date, sites in days.items():
+        for site, by_person in sites.items():
+            if site_id is not None and site != site_id:
+                continue
+            site_stats = by_site.setdefault(site, {'entries': 0, 'exits': 0, 'total': 0})
+            for person_type, by_access in by_person.items():
+                for access_type, count in by_access.items():
+                    totals[access_type] += count
+                    by_type[person_type][access_type] += count
+                    site_stats['entries' if access_type == 'entry' else 'exits'] += count
+                    site_stats['total'] += count
+                    day = daily_stats.setdefault(workday_date.strftime('%Y-%m-%d'), {'entries': 0, 'exits': 0})
+                    day['entries' if access_type == 'entry' else 'exits'] += count
+
+    # Accesos más recientes para el detalle del correo
+    raw_query = db.query(AccessLog).filter(AccessLog.workday_date >= first_day, AccessLog.workday_date <= last_day)
+    if site_id is not None:
+        raw_query = raw_query.filter(AccessLog.site_id == site_id)
+    recent_logs = raw_query.order_by(AccessLog.access_time.desc()).limit(RAW_DATA_LIMIT).all()
+
     # Formato del informe
     report = {
+        'report_type': report_type,
         'period': {
-            'start': start_date.strftime('%Y-%m-%d'),
-            'end': end_date.strftime('%Y-%m-%d')
+            'start': first_day.strftime('%Y-%m-%d'),
+            'end': last_day.strftime('%Y-%m-%d')
         },
+        'site_id': site_id,
         'total_stats': {
-            'entries': total_entries,
-            'exits': total_exits,
-            'total': len(access_logs)
+            'entries': totals['entry'],
+            'exits': totals['exit'],
+            'total': totals['entry'] + totals['exit']
         },
         'by_type': {
             'employees': {
-                'entries': employee_entries,
-                'exits': employee_exits,
-                'total': employee_entries + employee_exits
+                'entries': by_type['employee']['entry'],
+                'exits': by_type['employee']['exit'],
+                'total': by_type['employee']['entry'] + by_type['employee']['exit']
             },
             'visitors': {
-                'entries': visitor_entries,
-                'exits': visitor_exits,
-                'total': visitor_entries + visitor_exits
+                'entries': by_type['visitor']['entry'],
+                'exits': by_type['visitor']['exit'],
+                'total': by_type['visitor']['entry'] + by_type['visitor']['exit']
             }
         },
-        'daily_stats': daily_stats,
+        'by_site': by_site,
+        'daily_stats': dict(sorted(daily_stats.items())),
         'raw_data': [
             {
                 'id': log.id,
@@ -82,14 +415,89 @@ def get_weekly_access_report(db: Session) -> Dict[str, Any]:
                 'person_id': log.person_id,
                 'access_type': log.access_type,
                 'access_time': log.access_time.strftime('%Y-%m-%d %H:%M:%S'),
-                'workday_date': log.workday_date.strftime('%Y-%m-%d')
+                'workday_date': log.workday_date.strftime('%Y-%m-%d'),
+                'site_id': log.site_id,
+                'gate_id': log.gate_id
             }
-            for log in access_logs
+            for log in recent_logs
         ]
     }
     
     return report
 
+def get_period_report(db: Session, report_type: str, reference: Optional[date] = None,
+                      site_id: Optional[str] = None, store: Optional[Session] = None) -> Dict[str, Any]:
+    """
+    Informe del último período cerrado de un tipo (ver report_period).
+
+    Args:
+        db: Sesión de base de datos
+        report_type: daily, weekly o monthly
+        reference: Día desde el que se mira hacia atrás (hoy por defecto)
+        site_id: Sede del informe o None para todas
+        store: Sesión donde guardar los resúmenes que falten
+
+    Returns:
+        Diccionario con datos del informe
+    """
+    first_day, last_day = report_period(report_type, reference)
+    return build_access_report(db, first_day, last_day, site_id, report_type, store)
+
+def get_weekly_access_report(db: Session, site_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Informe de accesos de las últimas 7 jornadas (incluida la de hoy), de una sede o de
+    todas. Las 6 jornadas cerradas salen de los resúmenes diarios; solo la de hoy se
+    cuenta en vivo.
+
+    Args:
+        db: Sesión de base de datos
+        site_id: Sede del informe o None para todas (con el desglose por sede)
+
+    Returns:
+        Diccionario con datos del informe
+    """
+    today = _today()
+    return build_access_report(db, today - timedelta(days=6), today, site_id, "weekly")
+
+def get_occupancy(db: Session, site_id: Optional[str] = None, hours: float = OCCUPANCY_HOURS) -> Dict[str, Any]:
+    """
+    Personas dentro de cada sede: aquellas cuyo último acceso de las últimas horas fue
+    una entrada en esa sede. Se resuelve con una sola consulta agrupada por sede.
+
+    Args:
+        db: Sesión de base de datos
+        site_id: Sede a consultar o None para todas
+        hours: Ventana de accesos considerada
+
+    Returns:
+        Diccionario con la ocupación por sede (empleados, visitantes y total)
+    """
+    since = datetime.now(timezone.utc) - timedelta(hours=hours)
+    latest = db.query(
+        AccessLog.person_type,
+        AccessLog.person_id,
+        func.max(AccessLog.access_time).label("access_time")
+    ).filter(AccessLog.access_time >= since).group_by(AccessLog.person_type, AccessLog.person_id).subquery()
+    query = db.query(AccessLog.site_id, AccessLog.person_type, func.count()).join(latest, and_(
+        AccessLog.person_type == latest.c.person_type,
+        AccessLog.person_id == latest.c.person_id,
+        AccessLog.access_time == latest.c.access_time
+    )).filter(AccessLog.access_type == "entry").group_by(AccessLog.site_id, AccessLog.person_type)
+    if site_id is not None:
+        query = query.filter(AccessLog.site_id == site_id)
+
+    sites = {}
+    for site, person_type, count in query:
+        site_stats = sites.setdefault(site or UNASSIGNED_SITE, {"employees": 0, "visitors": 0, "total": 0})
+        site_stats["employees" if person_type == "employee" else "visitors"] += count
+        site_stats["total"] += count
+    return {
+        "since": since,
+        "site_id": site_id,
+        "sites": sites,
+        "total": sum(site_stats["total"] for site_stats in sites.values())
+    }
+
 def generate_html_report(report: Dict[str, Any]) -> str:
     """
     Genera un informe HTML a partir de los datos del informe.
@@ -100,13 +508,14 @@ def generate_html_report(report: Dict[str, Any]) -> str:
     Returns:
         Contenido HTML del informe
     """
+    title = REPORT_TITLES.get(report.get('report_type'), REPORT_TITLES['weekly'])
     html = f"""
     <!DOCTYPE html>
     <html>
     <head>
         <meta charset="UTF-8">
         <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>Informe Semanal de Accesos</title>
+        <title>{title}</title>
         <style>
             body {{
                 font-family: Arial, sans-serif;
@@ -173,7 +582,7 @@ def generate_html_report(report: Dict[str, Any]) -> str:
     </head>
     <body>
         <div class="header">
-            <h1>Informe Semanal de Accesos</h1>
+            <h1>{title}</h1>
             <p>Período: {report['period']['start']} al {report['period']['end']}</p>
         </div>
         
@@ -201,6 +610,32 @@ def generate_html_report(report: Dict[str, Any]) -> str:
             </div>
         </div>
         
+        <div class="section">
+            <h2>Accesos por Sede</h2>
+            <table>
+                <tr>
+                    <th>Sede</th>
+                    <th>Entradas</th>
+                    <th>Salidas</th>
+                    <th>Total</th>
+                </tr>
+    """
+
+    # Agregar filas para cada sede
+    for site, stats in sorted(report['by_site'].items()):
+        html += f"""
+                <tr>
+                    <td>{'Sin sede' if site == UNASSIGNED_SITE else site}</td>
+                    <td>{stats['entries']}</td>
+                    <td>{stats['exits']}</td>
+                    <td>{stats['total']}</td>
+                </tr>
+        """
+
+    html += """
+            </table>
+        </div>
+
         <div class="section">
             <h2>Estadísticas Diarias</h2>
             <table>
@@ -1,16 +1,24 @@
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from fastapi import BackgroundTasks
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Tuple
 from pydantic import EmailStr
+import asyncio
 import logging
 import os
 from dotenv import load_dotenv
 
-from app.services.report_service import get_weekly_access_report, generate_html_report
+from app.services.report_service import (
+    get_period_report, generate_html_report, store_daily_summaries, REPORT_TITLES, REPORT_TYPES
+)
 from app.services.email_service import send_access_report_email
-from app.database.connection import get_db
+from app.services.archive_service import archive_access_logs, ACCESS_LOG_ARCHIVE_AFTER_DAYS
+from app.services.qr_maintenance_service import sweep_expired_qr_codes, QR_SWEEP_INTERVAL_MINUTES
+from app.services.qr_token_service import signing_enabled, qr_revocations, QR_REVOCATION_REFRESH_SECONDS
+from app.services.job_lock_service import run_exclusive, run_exclusive_async
+from app.database.connection import get_db, SessionLocal, ReplicaSessionLocal
 from app.models.user import User
 
 # Configurar logging
@@ -20,6 +28,20 @@ logger = logging.getLogger(__name__)
 # Cargar variables de entorno
 load_dotenv()
 
+# Ventana en la que un disparo de una tarea diaria o semanal no se repite en otro worker
+JOB_MIN_INTERVAL_SECONDS = int(os.getenv("JOB_MIN_INTERVAL_SECONDS", 3600))
+# Informes que se envían por correo: daily (cada día), weekly (lunes) y/o monthly (día 1)
+REPORT_EMAIL_TYPES = [
+    report_type.strip() for report_type in os.getenv("REPORT_EMAIL_TYPES", "weekly").split(",")
+    if report_type.strip() in REPORT_TYPES
+]
+# Disparo de cada informe por correo (a las 8:00)
+REPORT_TRIGGERS = {
+    "daily": {},
+    "weekly": {"day_of_week": "mon"},
+    "monthly": {"day": 1},
+}
+
 # Obtener lista de administradores desde la base de datos
 def get_admin_emails() -> List[EmailStr]:
     """
@@ -53,22 +75,46 @@ def get_admin_emails() -> List[EmailStr]:
     finally:
         db.close()
 
-async def send_weekly_report():
-    """
-    Tarea programada para enviar el informe semanal de accesos.
+def build_period_report(report_type: str) -> Tuple[str, str]:
     """
-    logger.info("Iniciando generación del informe semanal de accesos")
+    Arma el informe del último período cerrado y lo renderiza en HTML. Es trabajo
+    síncrono (consultas y agregación), por eso se ejecuta en un hilo y no en el event loop.
     
-    # Obtener la sesión de base de datos
-    db = next(get_db())
+    Args:
+        report_type: daily, weekly o monthly
+    
+    Returns:
+        Asunto del correo y contenido HTML del informe
+    """
+    # El informe lee de la réplica si está configurada. Los resúmenes diarios que
+    # falten se cuentan y se guardan en el primario
+    db = ReplicaSessionLocal()
+    store = SessionLocal()
     
     try:
-        # Generar el informe
-        report_data = get_weekly_access_report(db)
+        report_data = get_period_report(db, report_type, store=store)
         html_content = generate_html_report(report_data)
+        subject = f"{REPORT_TITLES[report_type]} ({report_data['period']['start']} al {report_data['period']['end']})"
+        return subject, html_content
+    finally:
+        db.close()
+        store.close()
+
+async def send_period_report(report_type: str):
+    """
+    Genera y envía un informe de accesos a los administradores.
+    
+    Args:
+        report_type: daily, weekly o monthly
+    """
+    logger.info(f"Iniciando generación del informe de accesos ({report_type})")
+    
+    try:
+        # Generar el informe fuera del event loop
+        subject, html_content = await asyncio.to_thread(build_period_report, report_type)
         
         # Obtener correos de administradores
-        admin_emails = get_admin_emails()
+        admin_emails = await asyncio.to_thread(get_admin_emails)
         
         if not admin_emails:
             logger.error("No hay correos de administradores configurados. No se enviará el informe.")
@@ -78,22 +124,111 @@ async def send_weekly_report():
         background_tasks = BackgroundTasks()
         
         # Enviar el correo
-        subject = f"Informe Semanal de Accesos ({report_data['period']['start']} al {report_data['period']['end']})"
         await send_access_report_email(
             background_tasks=background_tasks,
             subject=subject,
             recipients=admin_emails,
             html_content=html_content
         )
+        # Fuera de una petición nadie ejecuta las tareas: el envío SMTP corre en el threadpool
+        await background_tasks()
         
-        logger.info(f"Informe semanal enviado a {len(admin_emails)} administradores")
+        logger.info(f"Informe de accesos ({report_type}) enviado a {len(admin_emails)} administradores")
+    
+    except Exception as e:
+        logger.error(f"Error al generar o enviar el informe de accesos ({report_type}): {str(e)}")
+        raise
+
+async def send_weekly_report():
+    """
+    Genera y envía el informe semanal de accesos a los administradores.
+    """
+    await send_period_report("weekly")
+
+async def period_report_job(report_type: str):
+    """
+    Tarea programada de un informe por correo: la ejecuta un solo worker por disparo.
+    """
+    await run_exclusive_async(
+        f"{report_type}_access_report", lambda: send_period_report(report_type), JOB_MIN_INTERVAL_SECONDS
+    )
+
+def _store_daily_summaries():
+    db = next(get_db())
+    
+    try:
+        stored = store_daily_summaries(db)
+        if stored:
+            logger.info(f"Resúmenes diarios de accesos guardados: {stored} jornadas")
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error al guardar los resúmenes diarios de accesos: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+def daily_summaries_job():
+    """
+    Tarea programada que resume cada jornada cerrada una sola vez (un solo worker por día).
+    """
+    run_exclusive("daily_access_summaries", _store_daily_summaries, JOB_MIN_INTERVAL_SECONDS)
+
+def refresh_qr_revocations():
+    """
+    Tarea programada que aplica las desactivaciones de códigos QR hechas desde
+    cualquier worker al conjunto de revocaciones en memoria.
+    """
+    db = next(get_db())
     
+    try:
+        qr_revocations.refresh(db)
     except Exception as e:
-        logger.error(f"Error al generar o enviar el informe semanal: {str(e)}")
+        logger.error(f"Error al actualizar las revocaciones de códigos QR: {str(e)}")
+    finally:
+        db.close()
+
+def _sweep_expired_qr_codes():
+    db = next(get_db())
     
+    try:
+        deactivated, archived = sweep_expired_qr_codes(db)
+        if deactivated or archived:
+            logger.info(f"Códigos QR vencidos: {deactivated} desactivados, {archived} archivados")
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error en el barrido de códigos QR vencidos: {str(e)}")
+        raise
     finally:
         db.close()
 
+def sweep_expired_qr_codes_job():
+    """
+    Tarea programada que desactiva y archiva los códigos QR vencidos (un solo worker
+    por intervalo).
+    """
+    run_exclusive("qr_codes_sweep", _sweep_expired_qr_codes, QR_SWEEP_INTERVAL_MINUTES * 60 / 2)
+
+def _archive_access_logs():
+    db = next(get_db())
+    
+    try:
+        archived = archive_access_logs(db)
+        if archived:
+            logger.info(f"Registros de acceso archivados por mes: {archived}")
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error al archivar registros de acceso: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+def archive_access_logs_job():
+    """
+    Tarea programada que mueve a Parquet los meses de access_logs más antiguos
+    que ACCESS_LOG_ARCHIVE_AFTER_DAYS (un solo worker por día).
+    """
+    run_exclusive("access_logs_archive", _archive_access_logs, JOB_MIN_INTERVAL_SECONDS)
+
 def init_scheduler():
     """
     Inicializa el programador de tareas.
@@ -103,12 +238,49 @@ def init_scheduler():
     """
     scheduler = AsyncIOScheduler()
     
-    # Programar el envío del informe semanal (cada lunes a las 8:00 AM)
+    # Resúmenes de las jornadas cerradas (cada día a las 0:15 UTC, la hora de corte de workday_date)
     scheduler.add_job(
-        send_weekly_report,
-        CronTrigger(day_of_week="mon", hour=8, minute=0),
-        id="weekly_access_report",
+        daily_summaries_job,
+        CronTrigger(hour=0, minute=15, timezone="UTC"),
+        id="daily_access_summaries",
         replace_existing=True
     )
     
+    # Informes por correo a las 8:00 AM (por defecto solo el semanal, los lunes)
+    for report_type in REPORT_EMAIL_TYPES:
+        scheduler.add_job(
+            period_report_job,
+            CronTrigger(hour=8, minute=0, **REPORT_TRIGGERS[report_type]),
+            args=[report_type],
+            id=f"{report_type}_access_report",
+            replace_existing=True
+        )
+    
+    # Barrido de códigos QR vencidos
+    scheduler.add_job(
+        sweep_expired_qr_codes_job,
+        IntervalTrigger(minutes=QR_SWEEP_INTERVAL_MINUTES),
+        id="qr_codes_sweep",
+        replace_existing=True
+    )
+    
+    # Archivado de registros de acceso antiguos (cada día a las 3:00 AM, si está activado)
+    if ACCESS_LOG_ARCHIVE_AFTER_DAYS > 0:
+        scheduler.add_job(
+            archive_access_logs_job,
+            CronTrigger(hour=3, minute=0),
+            id="access_logs_archive",
+            replace_existing=True
+        )
+    
+    # Revocaciones de tokens QR firmados (solo si la firma está configurada). Cada worker
+    # mantiene su propio conjunto en memoria, así que esta tarea no lleva bloqueo
+    if signing_enabled():
+        scheduler.add_job(
+            refresh_qr_revocations,
+            IntervalTrigger(seconds=QR_REVOCATION_REFRESH_SECONDS),
+            id="qr_revocations_refresh",
+            replace_existing=True
+        )
+    
     return scheduler
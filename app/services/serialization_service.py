@@ -0,0 +1,107 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, List, Optional, Type
+from fastapi import Request, Response
+from pydantic import BaseModel
+import orjson
+
+# Máximo de ids por petición en las consultas por lotes (?ids=1,2,3)
+MAX_BATCH_IDS = 500
+
+
+def schema_columns(orm_model: Any, schema: Type[BaseModel]) -> List[Any]:
+    """
+    Obtiene las columnas del modelo ORM que corresponden a los campos del esquema.
+
+    Args:
+        orm_model: Modelo SQLAlchemy (p. ej. models.User)
+        schema: Esquema Pydantic de respuesta (p. ej. schemas.User)
+
+    Returns:
+        Lista de columnas en el mismo orden que los campos del esquema
+    """
+    return [getattr(orm_model, name) for name in schema.model_fields]
+
+
+def json_response(content: Any, status_code: int = 200, headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    Serializa el contenido directamente a bytes JSON con orjson.
+
+    Al devolver un Response, FastAPI omite la validación del response_model,
+    por lo que solo debe usarse con datos que ya tienen la forma del esquema.
+
+    Args:
+        content: Datos a serializar (dicts, listas, fechas, etc.)
+        status_code: Código HTTP de la respuesta
+        headers: Cabeceras adicionales (p. ej. ETag)
+
+    Returns:
+        Respuesta HTTP con el cuerpo JSON ya serializado
+    """
+    return Response(
+        content=orjson.dumps(content),
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json"
+    )
+
+
+def validator_headers(etag: str, last_modified: Optional[datetime] = None) -> Dict[str, str]:
+    """
+    Cabeceras de validación HTTP. Cache-Control: no-cache obliga al cliente a
+    revalidar en cada petición, que con If-None-Match se responde con un 304 vacío.
+
+    Args:
+        etag: Validador (p. ej. W/"users-12")
+        last_modified: Fecha del último cambio (sin zona horaria se asume UTC)
+
+    Returns:
+        Diccionario de cabeceras ETag, Last-Modified y Cache-Control
+    """
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified is not None:
+        if last_modified.tzinfo is None:
+            last_modified = last_modified.replace(tzinfo=timezone.utc)
+        headers["Last-Modified"] = format_datetime(last_modified.astimezone(timezone.utc), usegmt=True)
+    return headers
+
+
+def not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """
+    Indica si el cliente ya tiene la versión actual: If-None-Match con el mismo ETag
+    o, si no envía ETag, If-Modified-Since posterior o igual al último cambio.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return if_none_match.strip() == "*" or etag in (tag.strip() for tag in if_none_match.split(","))
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    # Last-Modified solo tiene precisión de segundos
+    return last_modified.replace(microsecond=0) <= since
+
+
+def not_modified_response(etag: str, last_modified: Optional[datetime] = None) -> Response:
+    return Response(status_code=304, headers=validator_headers(etag, last_modified))
+
+
+def parse_id_list(value: str, max_ids: int = MAX_BATCH_IDS) -> List[int]:
+    """
+    Convierte un parámetro "1,2,3" en una lista de ids sin repetidos.
+
+    Raises:
+        ValueError: Si algún elemento no es un entero o la lista está vacía o supera max_ids
+    """
+    ids = list(dict.fromkeys(int(item) for item in value.split(",") if item.strip()))
+    if not ids or len(ids) > max_ids:
+        raise ValueError(f"Se esperaban entre 1 y {max_ids} ids")
+    return ids
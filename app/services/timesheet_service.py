@@ -0,0 +1,289 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import select
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from itertools import groupby
+from typing import Dict, Iterator, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+import csv
+import heapq
+import io
+import os
+import unicodedata
+import zipfile
+from dotenv import load_dotenv
+
+from app.models.access_log import AccessLog
+from app.models.user import User
+from app.services.archive_service import archive_boundary, iter_archived_access_logs
+from app.services.report_service import REPORT_TIMEZONE
+
+load_dotenv()
+
+# Hilos que generan los archivos de las planillas mientras se escribe el ZIP
+TIMESHEET_WORKERS = int(os.getenv("TIMESHEET_WORKERS", 4))
+# Planillas generadas por adelantado (limita la memoria usada por la exportación)
+TIMESHEET_PREFETCH = TIMESHEET_WORKERS * 4
+
+TIMESHEET_FORMATS = ("csv", "pdf")
+TIMESHEET_COLUMNS = ("date", "first_entry", "last_exit", "accesses", "hours", "sites")
+
+# Fuente TrueType de las planillas en PDF (ruta o nombre). La fuente incluida en Pillow
+# no tiene tildes ni eñes: sin una fuente del sistema, los nombres se escriben sin ellas
+TIMESHEET_PDF_FONT = os.getenv("TIMESHEET_PDF_FONT", "DejaVuSans.ttf")
+# Página A4 a 100 ppp para las planillas en PDF
+PDF_PAGE_SIZE = (827, 1169)
+PDF_MARGIN = 60
+PDF_LINE_HEIGHT = 22
+
+# Fila de la pasada ordenada: (person_id, access_type, access_time, workday_date, site_id)
+Row = Tuple[int, str, datetime, date, Optional[str]]
+
+
+def _month_bounds(month: date) -> Tuple[date, date]:
+    next_month = (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return month, next_month - timedelta(days=1)
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite devuelve fechas sin zona horaria
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def _row_key(row: Row) -> Tuple[int, datetime]:
+    return row[0], _as_utc(row[2])
+
+
+def _employee_rows(db: Session, month: date, site_id: Optional[str] = None) -> Iterator[Row]:
+    """
+    Accesos de empleados del mes en una sola pasada ordenada por (person_id,
+    access_time), recorridos con yield_per desde access_logs. En los meses archivados
+    se mezclan con los del Parquet, ordenados en memoria (un mes por vez): los accesos
+    que llegan tarde a un mes archivado siguen en access_logs.
+    """
+    first_day, last_day = _month_bounds(month)
+    query = select(
+        AccessLog.person_id, AccessLog.access_type, AccessLog.access_time, AccessLog.workday_date, AccessLog.site_id
+    ).where(
+        AccessLog.person_type == "employee",
+        AccessLog.workday_date >= first_day,
+        AccessLog.workday_date <= last_day
+    )
+    if site_id:
+        query = query.where(AccessLog.site_id == site_id)
+    query = query.order_by(AccessLog.person_id, AccessLog.access_time).execution_options(yield_per=10000)
+    hot_rows = db.execute(query).tuples()
+
+    boundary = archive_boundary()
+    if not boundary or first_day >= boundary:
+        yield from hot_rows
+        return
+
+    archived_rows = [
+        (row[2], row[3], row[4], row[5], row[6])
+        for row in iter_archived_access_logs(first_day, last_day, person_type="employee", site_id=site_id)
+    ]
+    archived_rows.sort(key=_row_key)
+    yield from heapq.merge(archived_rows, hot_rows, key=_row_key)
+
+
+def summarize_timesheet(rows: List[Row], tz_name: str = REPORT_TIMEZONE) -> List[Dict]:
+    """
+    Resume los accesos de un empleado por jornada: primera entrada, última salida,
+    número de accesos y horas trabajadas (cada entrada con la salida siguiente; una
+    entrada sin salida no suma horas).
+
+    Args:
+        rows: Accesos del empleado en orden cronológico
+        tz_name: Zona horaria de las horas mostradas
+
+    Returns:
+        Una fila por jornada, en orden
+    """
+    tz = ZoneInfo(tz_name)
+    days: Dict[date, Dict] = {}
+    open_entry: Optional[Tuple[date, datetime]] = None
+    for _, access_type, access_time, workday_date, site_id in rows:
+        access_time = _as_utc(access_time)
+        day = days.setdefault(workday_date, {
+            "date": workday_date, "first_entry": None, "last_exit": None,
+            "accesses": 0, "seconds": 0.0, "sites": set()
+        })
+        day["accesses"] += 1
+        if site_id:
+            day["sites"].add(site_id)
+        if access_type == "entry":
+            if day["first_entry"] is None:
+                day["first_entry"] = access_time
+            open_entry = (workday_date, access_time)
+        else:
+            day["last_exit"] = access_time
+            if open_entry is not None:
+                entry_day, entry_time = open_entry
+                days[entry_day]["seconds"] += (access_time - entry_time).total_seconds()
+                open_entry = None
+
+    return [
+        {
+            "date": day["date"].isoformat(),
+            "first_entry": day["first_entry"].astimezone(tz).strftime("%H:%M") if day["first_entry"] else "",
+            "last_exit": day["last_exit"].astimezone(tz).strftime("%H:%M") if day["last_exit"] else "",
+            "accesses": day["accesses"],
+            "hours": round(day["seconds"] / 3600, 2),
+            "sites": " ".join(sorted(day["sites"]))
+        }
+        for day in sorted(days.values(), key=lambda day: day["date"])
+    ]
+
+
+def render_timesheet_csv(employee: Dict, month: date, days: List[Dict]) -> bytes:
+    """Planilla de un empleado en CSV: una fila por jornada y el total de horas."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(("employee_id", employee["id"], "document_number", employee["document_number"]))
+    writer.writerow(("name", employee["name"], "month", month.strftime("%Y-%m")))
+    writer.writerow(TIMESHEET_COLUMNS)
+    for day in days:
+        writer.writerow(tuple(day[column] for column in TIMESHEET_COLUMNS))
+    writer.writerow(("total", "", "", sum(day["accesses"] for day in days), round(sum(day["hours"] for day in days), 2), ""))
+    return buffer.getvalue().encode("utf-8")
+
+
+def _pdf_font(size: int):
+    """Fuente de la planilla y si admite caracteres fuera de ASCII."""
+    from PIL import ImageFont
+
+    try:
+        return ImageFont.truetype(TIMESHEET_PDF_FONT, size), True
+    except OSError:
+        pass
+    try:
+        return ImageFont.load_default(size=size), False
+    except Exception:
+        # Pillow sin FreeType: fuente de mapa de bits de tamaño fijo
+        return ImageFont.load_default(), False
+
+
+def _ascii(text: str) -> str:
+    return unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+
+
+def render_timesheet_pdf(employee: Dict, month: date, days: List[Dict]) -> bytes:
+    """
+    Planilla de un empleado en PDF (páginas A4 rasterizadas con Pillow, sin
+    dependencias adicionales).
+    """
+    from PIL import Image, ImageDraw
+
+    (title_font, _), (font, unicode_font) = _pdf_font(20), _pdf_font(14)
+    name = employee["name"] if unicode_font else _ascii(employee["name"])
+    columns = (("Fecha", 0), ("Entrada", 130), ("Salida", 230), ("Accesos", 330), ("Horas", 430), ("Sedes", 530))
+    lines = [
+        tuple(str(day[column]) for column in TIMESHEET_COLUMNS)
+        for day in days
+    ]
+    lines.append(("Total", "", "", str(sum(day["accesses"] for day in days)),
+                  str(round(sum(day["hours"] for day in days), 2)), ""))
+
+    header_height = 5 * PDF_LINE_HEIGHT
+    per_page = (PDF_PAGE_SIZE[1] - 2 * PDF_MARGIN - header_height) // PDF_LINE_HEIGHT
+    pages = []
+    for start in range(0, len(lines), per_page):
+        # Páginas en blanco y negro: el PDF ocupa varias veces menos que en escala de grises
+        page = Image.new("1", PDF_PAGE_SIZE, 1)
+        draw = ImageDraw.Draw(page)
+        y = PDF_MARGIN
+        draw.text((PDF_MARGIN, y), f"Planilla de asistencia {month.strftime('%Y-%m')}", font=title_font, fill=0)
+        y += int(PDF_LINE_HEIGHT * 1.5)
+        draw.text((PDF_MARGIN, y), f"{name} - Documento {employee['document_number']} (ID {employee['id']})",
+                  font=font, fill=0)
+        y += int(PDF_LINE_HEIGHT * 1.5)
+        for label, x in columns:
+            draw.text((PDF_MARGIN + x, y), label, font=font, fill=0)
+        y += PDF_LINE_HEIGHT
+        draw.line((PDF_MARGIN, y - 4, PDF_PAGE_SIZE[0] - PDF_MARGIN, y - 4), fill=0)
+        for line in lines[start:start + per_page]:
+            for (_, x), value in zip(columns, line):
+                draw.text((PDF_MARGIN + x, y), value, font=font, fill=0)
+            y += PDF_LINE_HEIGHT
+        pages.append(page)
+
+    buffer = io.BytesIO()
+    pages[0].save(buffer, format="PDF", save_all=True, append_images=pages[1:], resolution=100)
+    return buffer.getvalue()
+
+
+RENDERERS = {"csv": render_timesheet_csv, "pdf": render_timesheet_pdf}
+
+
+def _render(employee: Dict, month: date, rows: List[Row], fmt: str) -> Tuple[str, bytes]:
+    name = f"{month.strftime('%Y-%m')}/{employee['document_number']}_{employee['id']}.{fmt}"
+    return name, RENDERERS[fmt](employee, month, summarize_timesheet(rows))
+
+
+class _ZipBuffer:
+    """Destino no posicionable de zipfile: acumula lo escrito hasta que se entrega."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_timesheets_zip(db: Session, month: date, fmt: str = "csv", site_id: Optional[str] = None,
+                          workers: int = TIMESHEET_WORKERS) -> Iterator[bytes]:
+    """
+    Genera un ZIP con una planilla por empleado con accesos en el mes, por partes.
+
+    Los accesos se leen en una sola pasada ordenada por empleado; cada empleado se
+    entrega a un pool de hilos que arma su planilla, y los archivos se agregan al ZIP
+    en el mismo orden a medida que terminan. Como mucho TIMESHEET_PREFETCH planillas
+    están en memoria a la vez, así que el ZIP empieza a enviarse mientras las siguientes
+    se siguen generando.
+
+    Args:
+        db: Sesión de base de datos (abierta durante todo el recorrido)
+        month: Primer día del mes
+        fmt: csv o pdf
+        site_id: Solo los accesos de esta sede
+        workers: Hilos que generan las planillas
+
+    Returns:
+        Iterador de fragmentos del ZIP
+    """
+    employees = {
+        id_: {"id": id_, "name": f"{first_name} {last_name}", "document_number": document_number}
+        for id_, first_name, last_name, document_number in db.execute(
+            select(User.id, User.first_name, User.last_name, User.document_number)
+        )
+    }
+    buffer = _ZipBuffer()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive, \
+            ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+
+        def write_next():
+            name, content = pending.popleft().result()
+            archive.writestr(name, content)
+            return buffer.pop()
+
+        for person_id, rows in groupby(_employee_rows(db, month, site_id), key=lambda row: row[0]):
+            employee = employees.get(person_id, {"id": person_id, "name": "", "document_number": ""})
+            pending.append(executor.submit(_render, employee, month, list(rows), fmt))
+            if len(pending) >= TIMESHEET_PREFETCH:
+                yield write_next()
+        while pending:
+            yield write_next()
+    # Directorio central del ZIP
+    yield buffer.pop()
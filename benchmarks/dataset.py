@@ -0,0 +1,65 @@
+"""
+Dataset sintético para benchmarks y verificación de planes de consulta.
+
+Inserta empleados, visitantes y registros de acceso usando el mismo generador
+que generate_access_logs.py.
+"""
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app import models
+from generate_access_logs import COLUMNS, generate_rows, iter_tasks, workdays
+
+
+def seed_database(
+    db: Session,
+    num_employees: int = 100,
+    num_visitors: int = 100,
+    num_days: int = 30,
+    chunk_size: int = 10000
+) -> int:
+    """
+    Inserta usuarios, visitantes y registros de acceso en lotes.
+
+    Returns:
+        Número de registros de acceso insertados
+    """
+    now = datetime.now(timezone.utc)
+    db.execute(insert(models.User), [
+        {
+            'first_name': f'Empleado{i}',
+            'last_name': f'Apellido{i}',
+            'document_number': f'E{i}',
+            'email': f'empleado{i}@example.com',
+            'user_type': 'employee',
+            'image_hash': 'default',
+            'created_at': now,
+            'updated_at': now,
+        }
+        for i in range(1, num_employees + 1)
+    ])
+    if num_visitors:
+        db.execute(insert(models.Visitor), [
+            {
+                'first_name': f'Visitante{i}',
+                'last_name': f'Apellido{i}',
+                'document_number': f'V{i}',
+                'email': f'visitante{i}@example.com',
+                'reason_for_visit': 'Benchmark',
+                'created_at': now,
+                'updated_at': now,
+            }
+            for i in range(1, num_visitors + 1)
+        ])
+
+    # El período termina hoy para que los informes semanales encuentren datos
+    start = datetime.now(timezone.utc).date() - timedelta(days=num_days - 1)
+    total = 0
+    for task in iter_tasks(num_employees, num_visitors, workdays(start, num_days), chunk_size):
+        rows = [dict(zip(COLUMNS, row)) for row in generate_rows(task)]
+        db.execute(insert(models.AccessLog), rows)
+        total += len(rows)
+    db.commit()
+    return total
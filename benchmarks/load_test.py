@@ -0,0 +1,282 @@
+"""
+Prueba de carga reproducible de los caminos de escaneo e informes.
+
+Crea una base SQLite local sembrada con un dataset sintético, levanta la app con
+uvicorn apuntando a esa base y ejecuta cada escenario con una concurrencia fija:
+
+    scan       POST /qr-codes/scan
+    detailed   GET  /access-logs/detailed
+    qr_image   GET  /qr-codes/image/{id}
+    report     get_weekly_access_report + generate_html_report (en proceso)
+
+Reporta latencias p50/p95/p99 y throughput, y guarda el resultado en JSON para
+comparar entre commits (--baseline muestra la variación contra un resultado previo).
+
+Uso:
+    python -m benchmarks.load_test --employees 200 --days 60 --concurrency 8 --requests 500
+    python -m benchmarks.load_test --baseline benchmarks/results/<anterior>.json
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+
+# No tocar la base configurada en .env
+os.environ["DATABASE_URL"] = "sqlite://"
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app import models
+from app.database.connection import Base
+from app.services.report_service import get_weekly_access_report, generate_html_report
+from benchmarks.dataset import seed_database
+
+SCENARIOS = ["scan", "detailed", "qr_image", "report"]
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def prepare_database(path: str, args) -> List[Dict]:
+    """Crea y siembra la base local. Devuelve los códigos QR creados."""
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    rows = seed_database(db, args.employees, args.visitors, args.days)
+
+    # Un código QR activo por empleado. Sin expires_at: SQLite no conserva la zona
+    # horaria y la comparación con datetime.now(timezone.utc) fallaría
+    codes = [{"code": str(uuid.uuid4()), "user_id": emp_id, "is_active": True}
+             for emp_id in range(1, args.employees + 1)]
+    db.execute(insert(models.QRCode), codes)
+    db.commit()
+    ids = [qr_id for (qr_id,) in db.query(models.QRCode.id).order_by(models.QRCode.id)]
+    db.close()
+    engine.dispose()
+    print(f"Base local: {path} ({rows:,} registros de acceso, {len(ids)} códigos QR)")
+    return [{"id": qr_id, "code": qr["code"]} for qr_id, qr in zip(ids, codes)]
+
+
+def start_server(path: str, port: int) -> subprocess.Popen:
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{path}")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("El servidor no respondió a /health en 30 segundos")
+
+
+class HttpWorker:
+    """Conexión keep-alive por hilo."""
+
+    def __init__(self, port: int):
+        self.port = port
+        self.local = threading.local()
+
+    def request(self, method: str, path: str, body: Optional[dict] = None) -> int:
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = self.local.conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=60)
+        payload = json.dumps(body) if body is not None else None
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        try:
+            conn.request(method, path, body=payload, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            return response.status
+        except (OSError, http.client.HTTPException):
+            self.local.conn = None
+            conn.close()
+            raise
+
+
+def build_scenarios(worker: HttpWorker, codes: List[Dict], db_path: str) -> Dict[str, Callable[[random.Random], bool]]:
+    today = datetime.now(timezone.utc).date()
+    report_engine = create_engine(f"sqlite:///{db_path}")
+    ReportSession = sessionmaker(bind=report_engine)
+
+    def scan(rng):
+        qr = rng.choice(codes)
+        status = worker.request("POST", "/qr-codes/scan", {
+            "code": qr["code"], "access_type": rng.choice(["entry", "exit"])
+        })
+        return status == 200
+
+    def detailed(rng):
+        day = today - timedelta(days=rng.randint(0, 6))
+        params = rng.choice([
+            "limit=100",
+            f"limit=100&workday_date={day}",
+            f"limit=100&date_from={day - timedelta(days=7)}&date_to={day}",
+            f"limit=100&person_type=employee&person_id={rng.randint(1, len(codes))}",
+        ])
+        return worker.request("GET", f"/access-logs/detailed?{params}") == 200
+
+    def qr_image(rng):
+        return worker.request("GET", f"/qr-codes/image/{rng.choice(codes)['id']}") == 200
+
+    def report(rng):
+        db = ReportSession()
+        try:
+            generate_html_report(get_weekly_access_report(db))
+            return True
+        finally:
+            db.close()
+
+    return {"scan": scan, "detailed": detailed, "qr_image": qr_image, "report": report}
+
+
+def run_scenario(fn: Callable[[random.Random], bool], total: int, concurrency: int, seed: int) -> Dict:
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    counter = iter(range(total))
+
+    def loop(worker_index: int):
+        nonlocal errors
+        rng = random.Random(seed + worker_index)
+        local_latencies, local_errors = [], 0
+        while True:
+            with lock:
+                if next(counter, None) is None:
+                    break
+            start = time.perf_counter()
+            try:
+                ok = fn(rng)
+            except Exception:
+                ok = False
+            local_latencies.append(time.perf_counter() - start)
+            local_errors += not ok
+        with lock:
+            latencies.extend(local_latencies)
+            errors += local_errors
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(loop, range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    cuts = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "latency_ms": {
+            "p50": round(cuts[49] * 1000, 3),
+            "p95": round(cuts[94] * 1000, 3),
+            "p99": round(cuts[98] * 1000, 3),
+            "mean": round(statistics.fmean(latencies) * 1000, 3),
+            "max": round(max(latencies) * 1000, 3),
+        },
+    }
+
+
+def print_comparison(results: Dict, baseline_path: str):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nComparación contra {baseline_path} (commit {baseline['meta'].get('commit')})")
+    for name, current in results["scenarios"].items():
+        previous = baseline["scenarios"].get(name)
+        if not previous:
+            continue
+        p95_delta = (current["latency_ms"]["p95"] / previous["latency_ms"]["p95"] - 1) * 100
+        rps_delta = (current["throughput_rps"] / previous["throughput_rps"] - 1) * 100
+        print(f"  {name:<10} p95 {p95_delta:+7.1f}%   throughput {rps_delta:+7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--employees", type=int, default=200)
+    parser.add_argument("--visitors", type=int, default=200)
+    parser.add_argument("--days", type=int, default=60)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=500, help="Peticiones por escenario")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="Ruta del JSON (por defecto benchmarks/results/)")
+    parser.add_argument("--baseline", default=None, help="JSON previo con el que comparar")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="cryptodevs-bench-")
+    db_path = os.path.join(workdir, "bench.db")
+    codes = prepare_database(db_path, args)
+    server = start_server(db_path, args.port)
+    commit = git_commit()
+
+    try:
+        scenarios = build_scenarios(HttpWorker(args.port), codes, db_path)
+        results = {
+            "meta": {
+                "commit": commit,
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "database": "sqlite",
+                "employees": args.employees,
+                "visitors": args.visitors,
+                "days": args.days,
+                "concurrency": args.concurrency,
+                "requests_per_scenario": args.requests,
+                "seed": args.seed,
+            },
+            "scenarios": {},
+        }
+        print(f"\n{'escenario':<10}{'req':>7}{'err':>6}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        for name in args.scenarios:
+            result = run_scenario(scenarios[name], args.requests, args.concurrency, args.seed)
+            results["scenarios"][name] = result
+            latency = result["latency_ms"]
+            print(f"{name:<10}{result['requests']:>7}{result['errors']:>6}{result['throughput_rps']:>10.1f}"
+                  f"{latency['p50']:>10.2f}{latency['p95']:>10.2f}{latency['p99']:>10.2f}")
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"{stamp}-{commit or 'nogit'}.json")
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResultados guardados en {output}")
+
+    if args.baseline:
+        print_comparison(results, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Verificación de planes de consulta sobre access_logs.
+
+Carga un dataset sintético escalado, ejecuta las consultas reales de los endpoints
+de access_logs y de informes (listados, exportación CSV, mapa de calor, ocupación,
+resúmenes y planillas) capturando el SQL emitido, corre EXPLAIN sobre cada una y
+termina con código 1 si alguna recorre access_logs entera: un recorrido secuencial o
+de un índice completo (sin condición sobre el índice), salvo que un LIMIT lo corte
+antes (sin ordenar ni agrupar antes del LIMIT).
+
+Uso:
+    python -m benchmarks.query_plans --employees 500 --days 120
+    python -m benchmarks.query_plans --database-url postgresql://.../scratch_db
+
+Con --database-url se crean las tablas y se insertan datos en esa base: usar
+solo una base de pruebas vacía.
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import date, timedelta
+from typing import Callable, List, Tuple
+
+# No tocar la base configurada en .env
+os.environ["DATABASE_URL"] = "sqlite://"
+# Un tramo de jornadas por vez: las sesiones de los hilos comparten la conexión de SQLite en memoria
+os.environ["REPORT_COUNT_WORKERS"] = "1"
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database.connection import Base
+from app.routers.access_logs import get_access_logs, get_detailed_access_logs, export_query
+from app.services.report_service import get_access_heatmap, get_occupancy, get_period_report, get_weekly_access_report
+from app.services.timesheet_service import stream_timesheets_zip
+from benchmarks.dataset import seed_database
+
+TABLE = "access_logs"
+# Nodos de PostgreSQL que leen toda su entrada antes de devolver filas: un LIMIT por
+# encima de ellos no acota el recorrido
+BLOCKING_NODES = {"Sort", "Incremental Sort", "Aggregate", "Hash", "Materialize", "Unique", "WindowAgg", "SetOp"}
+
+
+def endpoint_queries(today: date) -> List[Tuple[str, Callable]]:
+    """Consultas a verificar: (nombre, función que recibe la sesión)."""
+    week_ago = today - timedelta(days=7)
+    month = today.replace(day=1)
+    return [
+        ("GET /access-logs/", lambda db: get_access_logs(db=db)),
+        ("GET /access-logs/?workday_date", lambda db: get_access_logs(workday_date=today, db=db)),
+        ("GET /access-logs/detailed", lambda db: get_detailed_access_logs(db=db)),
+        ("GET /access-logs/detailed?workday_date", lambda db: get_detailed_access_logs(workday_date=today, db=db)),
+        ("GET /access-logs/detailed?date_from&date_to",
+         lambda db: get_detailed_access_logs(date_from=week_ago, date_to=today, db=db)),
+        ("GET /access-logs/detailed?person_type&person_id",
+         lambda db: get_detailed_access_logs(person_type="employee", person_id=1, db=db)),
+        ("GET /access-logs/detailed?access_type",
+         lambda db: get_detailed_access_logs(access_type="exit", db=db)),
+        ("GET /access-logs/export?date_from&date_to",
+         lambda db: db.execute(export_query(date_from=week_ago, date_to=today)).all()),
+        ("GET /access-logs/export?person_type&person_id",
+         lambda db: db.execute(export_query(person_type="employee", person_id=1)).all()),
+        ("GET /reports/heatmap?from&to", lambda db: get_access_heatmap(db, week_ago, today)),
+        ("GET /reports/occupancy", get_occupancy),
+        ("GET /reports/summary?report_type=monthly", lambda db: get_period_report(db, "monthly")),
+        ("GET /reports/timesheets", lambda db: b"".join(stream_timesheets_zip(db, month))),
+        ("weekly report", get_weekly_access_report),
+    ]
+
+
+def explain(connection, statement: str, parameters) -> Tuple[List[str], bool, bool]:
+    """
+    Devuelve (líneas del plan, recorre access_logs entera, el recorrido lo corta un LIMIT).
+    """
+    if connection.dialect.name == "postgresql":
+        plan = connection.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        lines, full_scan, bounded = [], False, True
+        stack = [(plan[0]["Plan"], 0, False)]
+        while stack:
+            node, depth, under_limit = stack.pop()
+            relation = node.get("Relation Name")
+            lines.append("  " * depth + node["Node Type"] + (f" on {relation}" if relation else ""))
+            scans_table = relation == TABLE and (
+                node["Node Type"] == "Seq Scan"
+                or (node["Node Type"] in ("Index Scan", "Index Only Scan") and "Index Cond" not in node)
+            )
+            if scans_table:
+                full_scan = True
+                bounded &= under_limit
+            if node["Node Type"] == "Limit":
+                under_limit = True
+            elif node["Node Type"] in BLOCKING_NODES:
+                under_limit = False
+            stack.extend((child, depth + 1, under_limit) for child in reversed(node.get("Plans", [])))
+        return lines, full_scan, full_scan and bounded
+
+    rows = connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+    lines = [row[-1] for row in rows]
+    # SQLite: "SCAN access_logs" recorre la tabla o un índice entero (también con
+    # "USING INDEX"); solo "SEARCH" usa una condición sobre el índice
+    full_scan = any(line.startswith(f"SCAN {TABLE}") for line in lines)
+    upper = statement.upper()
+    bounded = (
+        " LIMIT " in upper and "GROUP BY" not in upper and "DISTINCT" not in upper
+        and not any("TEMP B-TREE" in line for line in lines)
+    )
+    return lines, full_scan, full_scan and bounded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None, help="Base de pruebas (por defecto SQLite en memoria)")
+    parser.add_argument("--employees", type=int, default=300)
+    parser.add_argument("--visitors", type=int, default=300)
+    parser.add_argument("--days", type=int, default=120)
+    args = parser.parse_args()
+
+    if args.database_url:
+        engine = create_engine(args.database_url.replace("postgres://", "postgresql://"))
+    else:
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+
+    rows = seed_database(db, args.employees, args.visitors, args.days)
+    db.execute(text("ANALYZE"))
+    db.commit()
+    print(f"Dataset: {rows:,} registros de acceso ({engine.dialect.name})")
+
+    captured = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and TABLE in statement:
+            captured.append((statement, parameters))
+
+    failures = 0
+    for name, run in endpoint_queries(date.today()):
+        captured.clear()
+        run(db)
+        statements = list(captured)
+        for statement, parameters in statements:
+            lines, full_scan, bounded = explain(db.connection(), statement, parameters)
+            if bounded:
+                status = "LIMIT"
+            else:
+                status = "FAIL" if full_scan else " OK "
+                failures += full_scan
+            print(f"\n[{status}] {name}")
+            for line in lines:
+                print(f"       {line}")
+        if not statements:
+            print(f"\n[WARN] {name}: no se capturó ninguna consulta sobre {TABLE}")
+
+    db.close()
+    if failures:
+        print(f"\n{failures} consulta(s) que recorren {TABLE} entera")
+        sys.exit(1)
+    print(f"\nNinguna consulta recorre {TABLE} entera")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Microbenchmark de serialización para los endpoints de listado.
+
+Compara filas por segundo entre el camino anterior (objetos ORM validados por
+el response_model de FastAPI) y el camino rápido (columnas planas + orjson).
+
+Uso:
+    python -m benchmarks.serialization_benchmark --rows 20000 --repeat 5
+"""
+import argparse
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+# Base de datos en memoria: no tocar la base configurada en .env
+os.environ["DATABASE_URL"] = "sqlite://"
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import models, schemas
+from app.database.connection import Base
+from app.routers.access_logs import get_access_logs, get_detailed_access_logs
+from app.routers.users import get_users
+
+
+def seed(db, num_rows: int, num_users: int = 200):
+    """Inserta usuarios y registros de acceso sintéticos."""
+    now = datetime.now(timezone.utc)
+    db.bulk_insert_mappings(models.User, [
+        {
+            "first_name": f"Nombre{i}",
+            "last_name": f"Apellido{i}",
+            "document_number": str(1000000 + i),
+            "email": f"user{i}@example.com",
+            "user_type": "employee",
+            "image_hash": "default",
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(1, num_users + 1)
+    ])
+    db.bulk_insert_mappings(models.AccessLog, [
+        {
+            "person_type": "employee",
+            "person_id": (i % num_users) + 1,
+            "access_type": "entry" if i % 2 == 0 else "exit",
+            "access_time": now - timedelta(minutes=i),
+            "workday_date": (now - timedelta(minutes=i)).date(),
+        }
+        for i in range(num_rows)
+    ])
+    db.commit()
+
+
+async def validate_and_render(response_model, content) -> bytes:
+    """Reproduce lo que FastAPI hace con un response_model=List[...]."""
+    field = create_response_field(name="Response", type_=response_model)
+    serialized = await serialize_response(field=field, response_content=content)
+    return JSONResponse(serialized).body
+
+
+def legacy_detailed(db, limit: int) -> List[dict]:
+    """Construcción de diccionarios fila a fila del endpoint anterior."""
+    result = db.execute(text(f"""
+        SELECT acl.id, acl.person_type, acl.person_id, acl.access_type as action_type,
+               acl.access_time as timestamp, acl.workday_date,
+               COALESCE(us.first_name, vis.first_name) AS first_name,
+               COALESCE(us.last_name, vis.last_name) AS last_name,
+               COALESCE(us.document_number, vis.document_number) AS document_number,
+               COALESCE(us.email, vis.email) AS email
+        FROM access_logs acl
+        LEFT JOIN users us ON acl.person_type = 'employee' AND acl.person_id = us.id
+        LEFT JOIN visitors vis ON acl.person_type = 'visitor' AND acl.person_id = vis.id
+        ORDER BY acl.access_time DESC LIMIT {limit} OFFSET 0
+    """))
+    return [
+        {
+            "id": row.id,
+            "person_type": row.person_type,
+            "person_id": row.person_id,
+            "action_type": row.action_type,
+            "timestamp": row.timestamp,
+            "workday_date": row.workday_date,
+            "person_details": {
+                "first_name": row.first_name,
+                "last_name": row.last_name,
+                "document_number": row.document_number,
+                "email": row.email,
+            },
+        }
+        for row in result
+    ]
+
+
+def measure(fn, rows: int, repeat: int) -> float:
+    """Devuelve la mejor tasa de filas por segundo de `repeat` ejecuciones."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return rows / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000, help="Filas por respuesta")
+    parser.add_argument("--repeat", type=int, default=5, help="Repeticiones por caso")
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    seed(db, args.rows)
+    num_users = db.query(models.User).count()
+    loop = asyncio.new_event_loop()
+
+    cases = {
+        "access_logs": (
+            lambda: loop.run_until_complete(validate_and_render(
+                List[schemas.AccessLog], db.query(models.AccessLog).limit(args.rows).all())),
+            lambda: get_access_logs(skip=0, limit=args.rows, workday_date=None, db=db).body,
+            args.rows,
+        ),
+        "users": (
+            lambda: loop.run_until_complete(validate_and_render(
+                List[schemas.User], db.query(models.User).limit(num_users).all())),
+            lambda: get_users(skip=0, limit=num_users, db=db).body,
+            num_users,
+        ),
+        "access_logs_detailed": (
+            lambda: loop.run_until_complete(validate_and_render(
+                List[schemas.AccessLogDetailed], legacy_detailed(db, args.rows))),
+            lambda: get_detailed_access_logs(skip=0, limit=args.rows, workday_date=None, db=db).body,
+            args.rows,
+        ),
+    }
+
+    print(f"{'endpoint':<24}{'antes (filas/s)':>18}{'después (filas/s)':>20}{'mejora':>10}")
+    for name, (before, after, rows) in cases.items():
+        # Vaciar el identity map para que el camino ORM no reutilice objetos
+        db.expunge_all()
+        before_rate = measure(lambda: (before(), db.expunge_all()), rows, args.repeat)
+        after_rate = measure(after, rows, args.repeat)
+        print(f"{name:<24}{before_rate:>18,.0f}{after_rate:>20,.0f}{after_rate / before_rate:>9.1f}x")
+
+    loop.close()
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,9 @@ DROP TABLE IF EXISTS users CASCADE;
 DROP TABLE IF EXISTS visitors CASCADE;
 DROP TABLE IF EXISTS access_logs CASCADE;
 DROP TABLE IF EXISTS incidents CASCADE;
+DROP TABLE IF EXISTS import_jobs CASCADE;
+DROP TABLE IF EXISTS scheduled_job_runs CASCADE;
+DROP TABLE IF EXISTS daily_access_summaries CASCADE;
 
 CREATE TABLE users (
     id SERIAL PRIMARY KEY,
@@ -36,22 +39,90 @@ CREATE TABLE access_logs (
     person_id INT NOT NULL,
     access_type VARCHAR(10) NOT NULL CHECK (access_type IN ('entry', 'exit')),
     access_time TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP NOT NULL,
-    workday_date DATE NOT NULL
+    workday_date DATE NOT NULL,
+    site_id VARCHAR(50),
+    gate_id VARCHAR(50),
+    event_id VARCHAR(64)
 );
 
+-- Índices de access_logs según los patrones de consulta de los routers e informes
+CREATE INDEX ix_access_logs_person_access_time ON access_logs (person_type, person_id, access_time);
+CREATE INDEX ix_access_logs_workday_date_access_time ON access_logs (workday_date, access_time);
+CREATE INDEX ix_access_logs_access_time ON access_logs (access_time);
+CREATE INDEX ix_access_logs_site_workday_date_access_time ON access_logs (site_id, workday_date, access_time);
+CREATE UNIQUE INDEX ux_access_logs_event_id ON access_logs (event_id);
+CREATE INDEX ix_access_logs_access_time_brin ON access_logs USING BRIN (access_time);
+
 CREATE TABLE incidents (
     id SERIAL PRIMARY KEY,
-    person_type VARCHAR(10) NOT NULL CHECK (person_type IN ('employee', 'visitor')),
+    -- NULL (junto con person_id) cuando no hay persona identificada, p. ej. un código QR desconocido
+    person_type VARCHAR(10) CHECK (person_type IS NULL OR person_type IN ('employee', 'visitor')),
     person_id INT,
     incident_type VARCHAR(50) NOT NULL CHECK (incident_type IN ('denied_access', 'invalid_qr', 'security_alert')),
     description TEXT NOT NULL,
     reported_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Filtro por rango de fechas de GET /incidents/
+CREATE INDEX ix_incidents_reported_at ON incidents (reported_at);
+
+-- Progreso de las importaciones masivas de access_logs (reanudables)
+CREATE TABLE import_jobs (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(255) NOT NULL UNIQUE,
+    status VARCHAR(20) NOT NULL DEFAULT 'running' CHECK (status IN ('running', 'completed', 'failed')),
+    total_rows INT NOT NULL DEFAULT 0,
+    rows_processed INT NOT NULL DEFAULT 0,
+    rows_loaded INT NOT NULL DEFAULT 0,
+    rows_skipped INT NOT NULL DEFAULT 0,
+    error TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Versión de users y visitors (ETag/Last-Modified de los listados), incrementada por la aplicación
+CREATE TABLE table_versions (
+    table_name VARCHAR(50) PRIMARY KEY,
+    version INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP NOT NULL
+);
+
+-- Filas iniciales: el primer alta de cada tabla solo actualiza su fila
+INSERT INTO table_versions (table_name, version) VALUES ('users', 0), ('visitors', 0);
+
+-- Última ejecución de cada tarea programada (una sola ejecución por disparo entre workers)
+CREATE TABLE scheduled_job_runs (
+    job_id VARCHAR(100) PRIMARY KEY,
+    started_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    finished_at TIMESTAMP WITH TIME ZONE,
+    duration_seconds DOUBLE PRECISION,
+    status VARCHAR(20) NOT NULL,
+    worker VARCHAR(100)
+);
+
+-- Conteos de cada jornada cerrada ({sede: {tipo de persona: {tipo de acceso: n}}}) para los informes
+CREATE TABLE daily_access_summaries (
+    workday_date DATE PRIMARY KEY,
+    -- NULL cuando la jornada fue invalidada por accesos tardíos y falta volver a contarla
+    counts JSON,
+    computed_at TIMESTAMP WITH TIME ZONE,
+    -- Aumenta con cada invalidación: un resumen solo se guarda si no cambió mientras se contaba
+    version INT NOT NULL DEFAULT 0
+);
+
 -- Función para validar que el person_id exista en la tabla correspondiente según el person_type
 CREATE OR REPLACE FUNCTION validate_person_id()
 RETURNS TRIGGER AS $$
 BEGIN
+    -- Las importaciones masivas validan los ids por conjuntos antes de cargar y lo indican
+    -- con SET LOCAL app.skip_person_check = 'on' (solo dentro de su transacción)
+    IF current_setting('app.skip_person_check', true) = 'on' THEN
+        RETURN NEW;
+    END IF;
+    -- Los incidentes sin persona identificada (p. ej. alertas de seguridad) no tienen person_id
+    IF NEW.person_id IS NULL THEN
+        RETURN NEW;
+    END IF;
     IF NEW.person_type = 'employee' THEN
         IF NOT EXISTS (SELECT 1 FROM users WHERE id = NEW.person_id) THEN
             RAISE EXCEPTION 'El empleado con ID % no existe', NEW.person_id;
@@ -0,0 +1,354 @@
+"""
+Agente de portería con réplica local de códigos QR.
+
+Mantiene en una base SQLite local los códigos QR válidos, sincronizados por deltas
+con GET /qr-codes/changes, y valida los escaneos sin consultar la API. Los accesos
+se guardan en un buffer local y se suben en lotes a POST /access-logs/batch cuando
+hay conexión, así que la portería sigue funcionando aunque la API no responda.
+
+Con QR_SIGNING_KEY configurada en la API, las imágenes QR llevan tokens firmados
+(v1.<tipo>.<persona>.<qr_id>.<expira>.<firma>). El agente los verifica con la misma
+clave (--signing-key o la variable QR_SIGNING_KEY) y comprueba que el qr_id siga
+activo en la réplica local.
+
+Solo usa la biblioteca estándar para poder instalarse en los equipos de portería.
+
+Uso:
+    python gate_agent.py --api http://servidor:8000 --db porteria.db --site sede-norte --gate p1
+    (cada línea de la entrada estándar es "<código> <entry|exit>")
+"""
+import argparse
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import urllib.error
+import urllib.request
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger("gate_agent")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS qr_codes (
+    code TEXT PRIMARY KEY,
+    qr_code_id INTEGER NOT NULL,
+    person_type TEXT NOT NULL,
+    person_id INTEGER NOT NULL,
+    expires_at REAL
+);
+CREATE TABLE IF NOT EXISTS pending_access_logs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    person_type TEXT NOT NULL,
+    person_id INTEGER NOT NULL,
+    access_type TEXT NOT NULL,
+    access_time TEXT NOT NULL,
+    workday_date TEXT NOT NULL,
+    event_id TEXT
+);
+CREATE TABLE IF NOT EXISTS rejected_access_logs (
+    id INTEGER PRIMARY KEY,
+    person_type TEXT NOT NULL,
+    person_id INTEGER NOT NULL,
+    access_type TEXT NOT NULL,
+    access_time TEXT NOT NULL,
+    workday_date TEXT NOT NULL,
+    event_id TEXT,
+    status INTEGER NOT NULL,
+    error TEXT,
+    rejected_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+# Mismo formato que app/services/qr_token_service.py
+TOKEN_PREFIX = "v1"
+SIGNATURE_BYTES = 16
+PERSON_TYPES = {"e": "employee", "v": "visitor"}
+
+
+def _timestamp(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _is_client_error(error: urllib.error.HTTPError) -> bool:
+    # 408 y 429 son transitorios: se reintenta el lote completo más tarde
+    return 400 <= error.code < 500 and error.code not in (408, 429)
+
+
+class GateAgent:
+    """
+    Réplica local de los códigos QR activos y buffer de accesos pendientes.
+
+    Los códigos válidos se mantienen además en un diccionario en memoria, de modo
+    que scan() no toca el disco para validar (solo para guardar el acceso).
+    """
+
+    def __init__(self, api_url: str, db_path: str, batch_size: int = 500, timeout: float = 3.0,
+                 site_id: Optional[str] = None, gate_id: Optional[str] = None, signing_key: Optional[str] = None):
+        self.api_url = api_url.rstrip("/")
+        # Clave compartida con la API para verificar los tokens QR firmados
+        self.signing_key = signing_key
+        # Sede y portería del equipo: se envían con cada acceso subido
+        self.site_id = site_id
+        self.gate_id = gate_id
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(db_path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        # Bases locales creadas antes de los event_id
+        columns = {row[1] for row in self.db.execute("PRAGMA table_info(pending_access_logs)")}
+        if "event_id" not in columns:
+            self.db.execute("ALTER TABLE pending_access_logs ADD COLUMN event_id TEXT")
+        self.codes: Dict[str, Tuple[str, int, Optional[float], int]] = {
+            code: (person_type, person_id, expires_at, qr_code_id)
+            for code, person_type, person_id, expires_at, qr_code_id in self.db.execute(
+                "SELECT code, person_type, person_id, expires_at, qr_code_id FROM qr_codes"
+            )
+        }
+        # Códigos activos por id, para validar los tokens firmados
+        self.codes_by_id: Dict[int, str] = {entry[3]: code for code, entry in self.codes.items()}
+
+    @property
+    def version(self) -> int:
+        row = self.db.execute("SELECT value FROM sync_state WHERE key = 'version'").fetchone()
+        return int(row[0]) if row else 0
+
+    def _request(self, method: str, path: str, body=None):
+        data = json.dumps(body).encode() if body is not None else None
+        request = urllib.request.Request(
+            f"{self.api_url}{path}", data=data, method=method,
+            headers={"Content-Type": "application/json"} if data else {},
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read())
+
+    def _resolve_token(self, token: str):
+        """
+        Código activo de un token firmado, o None si la firma no coincide, el token
+        está mal formado o su qr_id ya no está activo en la réplica local.
+        """
+        if not self.signing_key:
+            return None
+        payload, _, signature = token.rpartition(".")
+        digest = hmac.new(self.signing_key.encode(), payload.encode(), hashlib.sha256).digest()[:SIGNATURE_BYTES]
+        if not hmac.compare_digest(signature, base64.urlsafe_b64encode(digest).rstrip(b"=").decode()):
+            return None
+        try:
+            _, person_type, person_id, qr_id, _ = payload.split(".")
+            person = (PERSON_TYPES[person_type], int(person_id))
+            code = self.codes_by_id.get(int(qr_id))
+        except (KeyError, ValueError):
+            return None
+        # El token debe corresponder a la misma persona que el código replicado
+        if code is None or self.codes[code][:2] != person:
+            return None
+        return code
+
+    def scan(self, code: str, access_type: str, now: Optional[datetime] = None) -> dict:
+        """Valida un escaneo contra la réplica local y guarda el acceso en el buffer."""
+        if access_type not in ("entry", "exit"):
+            return {"accepted": False, "reason": "invalid_access_type"}
+        if code.startswith(TOKEN_PREFIX + "."):
+            code = self._resolve_token(code)
+        entry = self.codes.get(code) if code else None
+        if entry is None:
+            return {"accepted": False, "reason": "unknown"}
+        person_type, person_id, expires_at, _ = entry
+        now = now or datetime.now(timezone.utc)
+        if expires_at is not None and expires_at < now.timestamp():
+            return {"accepted": False, "reason": "expired"}
+
+        with self._lock:
+            # El event_id hace idempotente la subida: si un lote se reenvía, la API lo ignora
+            self.db.execute(
+                "INSERT INTO pending_access_logs (person_type, person_id, access_type, access_time, workday_date, event_id) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (person_type, person_id, access_type, now.isoformat(), now.date().isoformat(), uuid.uuid4().hex),
+            )
+            self.db.commit()
+        return {"accepted": True, "person_type": person_type, "person_id": person_id}
+
+    def sync(self) -> int:
+        """
+        Descarga los cambios desde la última versión aplicada.
+
+        Returns:
+            Número de cambios aplicados
+        """
+        applied = 0
+        while True:
+            feed = self._request("GET", f"/qr-codes/changes?since={self.version}")
+            with self._lock:
+                for change in feed["changes"]:
+                    code = change["code"]
+                    if change["is_active"]:
+                        expires_at = _timestamp(change["expires_at"])
+                        self.db.execute(
+                            "INSERT OR REPLACE INTO qr_codes (code, qr_code_id, person_type, person_id, expires_at) "
+                            "VALUES (?, ?, ?, ?, ?)",
+                            (code, change["qr_code_id"], change["person_type"], change["person_id"], expires_at),
+                        )
+                        self.codes[code] = (change["person_type"], change["person_id"], expires_at, change["qr_code_id"])
+                        self.codes_by_id[change["qr_code_id"]] = code
+                    else:
+                        self._remove_code(code)
+                for code in feed["expired"]:
+                    self._remove_code(code)
+                self.db.execute(
+                    "INSERT OR REPLACE INTO sync_state (key, value) VALUES ('version', ?)", (str(feed["version"]),)
+                )
+                self.db.commit()
+            applied += len(feed["changes"])
+            if not feed["has_more"]:
+                return applied
+
+    def _remove_code(self, code: str):
+        self.db.execute("DELETE FROM qr_codes WHERE code = ?", (code,))
+        entry = self.codes.pop(code, None)
+        if entry is not None:
+            self.codes_by_id.pop(entry[3], None)
+
+    def upload(self) -> int:
+        """
+        Sube los accesos pendientes en lotes. Un lote se borra del buffer solo
+        después de que la API lo confirma.
+
+        Returns:
+            Número de accesos subidos
+        """
+        uploaded = 0
+        while True:
+            rows = self.db.execute(
+                "SELECT id, person_type, person_id, access_type, access_time, workday_date, event_id "
+                "FROM pending_access_logs ORDER BY id LIMIT ?", (self.batch_size,)
+            ).fetchall()
+            if not rows:
+                return uploaded
+            try:
+                self._upload_rows(rows)
+            except urllib.error.HTTPError as e:
+                if not _is_client_error(e):
+                    raise
+                # Un acceso inválido no debe bloquear el buffer: se sube de a uno y los
+                # rechazados se apartan en rejected_access_logs
+                uploaded -= self._upload_one_by_one(rows)
+            with self._lock:
+                self.db.execute("DELETE FROM pending_access_logs WHERE id <= ?", (rows[-1][0],))
+                self.db.commit()
+            uploaded += len(rows)
+
+    def _upload_rows(self, rows):
+        result = self._request("POST", "/access-logs/batch", [
+            {
+                "person_type": person_type,
+                "person_id": person_id,
+                "access_type": access_type,
+                "access_time": access_time,
+                "workday_date": workday_date,
+                "site_id": self.site_id,
+                "gate_id": self.gate_id,
+                "event_id": event_id,
+            }
+            for _, person_type, person_id, access_type, access_time, workday_date, event_id in rows
+        ])
+        if result["rejected"]:
+            logger.warning(f"La API rechazó {len(result['rejected'])} accesos de personas inexistentes")
+
+    def _upload_one_by_one(self, rows) -> int:
+        """
+        Sube un lote rechazado con un error 4xx acceso por acceso. Los que la API vuelve
+        a rechazar se mueven a rejected_access_logs.
+
+        Returns:
+            Número de accesos apartados
+        """
+        quarantined = 0
+        for row in rows:
+            try:
+                self._upload_rows([row])
+            except urllib.error.HTTPError as e:
+                if not _is_client_error(e):
+                    raise
+                error = e.read().decode(errors="replace")[:1000]
+                with self._lock:
+                    self.db.execute(
+                        "INSERT OR REPLACE INTO rejected_access_logs (id, person_type, person_id, access_type, "
+                        "access_time, workday_date, event_id, status, error, rejected_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (*row, e.code, error, datetime.now(timezone.utc).isoformat()),
+                    )
+                    self.db.execute("DELETE FROM pending_access_logs WHERE id = ?", (row[0],))
+                    self.db.commit()
+                quarantined += 1
+                logger.error(f"Acceso {row[0]} rechazado por la API ({e.code}), apartado en rejected_access_logs: {error}")
+            else:
+                with self._lock:
+                    self.db.execute("DELETE FROM pending_access_logs WHERE id = ?", (row[0],))
+                    self.db.commit()
+        return quarantined
+
+    def run_forever(self, interval: float = 30.0, stop: Optional[threading.Event] = None):
+        """Sincroniza y sube accesos periódicamente; si la API no responde, reintenta."""
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            try:
+                changes = self.sync()
+                uploaded = self.upload()
+                if changes or uploaded:
+                    logger.info(f"Sincronización: {changes} cambios de QR, {uploaded} accesos subidos")
+            except (urllib.error.URLError, OSError, ValueError) as e:
+                logger.warning(f"API no disponible, trabajando sin conexión: {e}")
+            stop.wait(interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--api", required=True, help="URL base de la API")
+    parser.add_argument("--db", default="gate_agent.db", help="Base SQLite local")
+    parser.add_argument("--interval", type=float, default=30.0, help="Segundos entre sincronizaciones")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--site", help="Sede donde está la portería")
+    parser.add_argument("--gate", help="Identificador de la portería")
+    parser.add_argument("--signing-key", default=os.getenv("QR_SIGNING_KEY"),
+                        help="Clave de firma de los QR (la misma QR_SIGNING_KEY de la API)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    agent = GateAgent(args.api, args.db, args.batch_size, site_id=args.site, gate_id=args.gate,
+                      signing_key=args.signing_key)
+    stop = threading.Event()
+    threading.Thread(target=agent.run_forever, args=(args.interval, stop), daemon=True).start()
+
+    try:
+        for line in sys.stdin:
+            parts = line.split()
+            if len(parts) != 2:
+                continue
+            print(json.dumps(agent.scan(parts[0], parts[1])), flush=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,47 +1,190 @@
-import random
-from datetime import datetime, timedelta
+"""
+Generador de registros de acceso sintéticos.
+
+Genera N empleados y V visitantes durante M días (sin fines de semana por defecto)
+con llegadas y salidas tempranas, a tiempo o tardías (20% / 60% / 20%). La salida
+se escribe por bloques en formato COPY de PostgreSQL o CSV y los bloques se generan
+en varios procesos, así que la memoria usada no depende del tamaño del dataset.
+
+Ejemplos:
+    # 10 empleados, enero a abril de 2025, script COPY listo para psql
+    python generate_access_logs.py --employees 10 --start-date 2025-01-01 --days 120 \\
+        --output database/ACCESS_LOGS.copy.sql
+
+    # Dataset de capacidad (~100M filas) directo a PostgreSQL
+    python generate_access_logs.py --employees 200000 --visitors 500000 --days 365 \\
+        --output - | psql "$DATABASE_URL"
+
+    # CSV para \\copy access_logs (...) FROM 'access_logs.csv' CSV HEADER
+    python generate_access_logs.py --format csv --output access_logs.csv
+"""
+import argparse
 import os
+import random
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterator, List, NamedTuple, Tuple
+
+COLUMNS = ("person_type", "person_id", "access_type", "access_time", "workday_date")
+STATUSES = ['early', 'on_time', 'late']
+STATUS_WEIGHTS = [0.2, 0.6, 0.2]
+
+
+class Task(NamedTuple):
+    """Bloque de trabajo: un día laboral y un rango de personas."""
+    index: int
+    day: date
+    person_type: str
+    first_id: int
+    last_id: int
+    step: int
+    seed: int
+    utc_offset: int
+
+
+def entry_variation(rng: random.Random) -> int:
+    """Minutos de diferencia respecto a las 8:00 según el estado de llegada."""
+    status = rng.choices(STATUSES, weights=STATUS_WEIGHTS, k=1)[0]
+    if status == 'early':
+        # 15-30 minutos antes
+        return rng.randint(-30, -15)
+    if status == 'late':
+        # 5-20 minutos tarde
+        return rng.randint(5, 20)
+    # A tiempo (±5 minutos)
+    return rng.randint(-5, 5)
+
+
+def exit_variation(rng: random.Random) -> int:
+    """Minutos de diferencia respecto a las 17:00 según el estado de salida."""
+    status = rng.choices(STATUSES, weights=STATUS_WEIGHTS, k=1)[0]
+    if status == 'early':
+        # 10-30 minutos antes
+        return rng.randint(-30, -10)
+    if status == 'late':
+        # 10-40 minutos tarde
+        return rng.randint(10, 40)
+    # A tiempo (±10 minutos)
+    return rng.randint(-10, 10)
+
+
+def workdays(start_date: date, num_days: int, include_weekends: bool = False) -> List[date]:
+    days = [start_date + timedelta(days=offset) for offset in range(num_days)]
+    return [day for day in days if include_weekends or day.weekday() < 5]
+
+
+def iter_tasks(
+    num_employees: int,
+    num_visitors: int,
+    days: List[date],
+    chunk_size: int = 50000,
+    seed: int = 42,
+    utc_offset: int = -5
+) -> Iterator[Task]:
+    """
+    Divide el trabajo en bloques de hasta chunk_size personas por día.
+
+    Cada empleado registra entrada y salida todos los días laborales. Cada visitante
+    visita un único día: el visitante v va el día v % len(days).
+    """
+    index = 0
+    for day_index, day in enumerate(days):
+        for first in range(1, num_employees + 1, chunk_size):
+            last = min(first + chunk_size - 1, num_employees)
+            yield Task(index, day, 'employee', first, last, 1, seed, utc_offset)
+            index += 1
+        first_visitor = day_index or len(days)
+        step = len(days)
+        span = chunk_size * step
+        for first in range(first_visitor, num_visitors + 1, span):
+            last = min(first + span - 1, num_visitors)
+            yield Task(index, day, 'visitor', first, last, step, seed, utc_offset)
+            index += 1
+
+
+def generate_rows(task: Task) -> Iterator[Tuple[str, int, str, datetime, date]]:
+    """Genera las filas de un bloque. Determinista para una misma semilla y bloque."""
+    rng = random.Random(f"{task.seed}:{task.index}")
+    # Las horas se generan en hora local y se guardan en UTC
+    base = datetime(task.day.year, task.day.month, task.day.day, tzinfo=timezone.utc) - timedelta(hours=task.utc_offset)
+    entry_base = base + timedelta(hours=8)
+    exit_base = base + timedelta(hours=17)
+    for person_id in range(task.first_id, task.last_id + 1, task.step):
+        entry_time = entry_base + timedelta(minutes=entry_variation(rng))
+        exit_time = exit_base + timedelta(minutes=exit_variation(rng))
+        yield (task.person_type, person_id, 'entry', entry_time, task.day)
+        yield (task.person_type, person_id, 'exit', exit_time, task.day)
+
+
+def render_task(args: Tuple[Task, str]) -> Tuple[bytes, int]:
+    """Renderiza un bloque completo en el formato pedido (se ejecuta en un worker)."""
+    task, fmt = args
+    sep = "\t" if fmt == "copy" else ","
+    lines = [
+        f"{person_type}{sep}{person_id}{sep}{access_type}{sep}"
+        f"{access_time:%Y-%m-%d %H:%M:%S}+00{sep}{workday_date:%Y-%m-%d}\n"
+        for person_type, person_id, access_type, access_time, workday_date in generate_rows(task)
+    ]
+    return "".join(lines).encode(), len(lines)
+
+
+def write_dataset(out, tasks: Iterator[Task], fmt: str, workers: int) -> int:
+    """
+    Escribe los bloques en orden. Como mucho 2 * workers bloques están en vuelo,
+    de modo que la memoria se mantiene constante sin importar el total de filas.
+    """
+    if fmt == "copy":
+        out.write(f"COPY access_logs ({', '.join(COLUMNS)}) FROM stdin;\n".encode())
+    else:
+        out.write((",".join(COLUMNS) + "\n").encode())
+
+    total = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for task in tasks:
+            pending.append(pool.submit(render_task, (task, fmt)))
+            if len(pending) >= workers * 2:
+                block, rows = pending.popleft().result()
+                out.write(block)
+                total += rows
+        while pending:
+            block, rows = pending.popleft().result()
+            out.write(block)
+            total += rows
+
+    if fmt == "copy":
+        out.write(b"\\.\n")
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--employees", type=int, default=10, help="Número de empleados (ids 1..N)")
+    parser.add_argument("--visitors", type=int, default=0, help="Número de visitantes (ids 1..V), una visita cada uno")
+    parser.add_argument("--days", type=int, default=30, help="Días del período")
+    parser.add_argument("--start-date", type=date.fromisoformat, default=date(2025, 1, 1))
+    parser.add_argument("--include-weekends", action="store_true", help="Generar también sábados y domingos")
+    parser.add_argument("--format", choices=["copy", "csv"], default="copy")
+    parser.add_argument("--output", default="database/ACCESS_LOGS.copy.sql", help="Archivo de salida o - para stdout")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=50000, help="Personas por bloque")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--utc-offset", type=int, default=-5, help="Desfase horario local (Colombia: -5)")
+    args = parser.parse_args()
+
+    days = workdays(args.start_date, args.days, args.include_weekends)
+    tasks = iter_tasks(args.employees, args.visitors, days, args.chunk_size, args.seed, args.utc_offset)
+
+    if args.output == "-":
+        total = write_dataset(sys.stdout.buffer, tasks, args.format, args.workers)
+    else:
+        with open(args.output, "wb") as f:
+            total = write_dataset(f, tasks, args.format, args.workers)
+
+    print(f"Generados {total:,} registros de acceso ({args.format})", file=sys.stderr)
+
 
-# Start date for the records
-start_date = datetime(2025, 4, 5)
-# Number of employees
-num_employees = 10
-# Number of days to generate records for
-num_days = 18  # This will generate 180 records (10 employees * 18 days)
-
-# Open the file for writing
-with open('database/ACCESS_LOGS.sql', 'a') as f:
-    f.write('\n\n-- Additional 180 records with time variations\n')
-    f.write('INSERT INTO access_logs (person_type, person_id, access_type, access_time, workday_date)\nVALUES\n')
-    
-    records = []
-    
-    for day in range(num_days):
-        current_date = start_date + timedelta(days=day)
-        date_str = current_date.strftime('%Y-%m-%d')
-        
-        for emp_id in range(1, num_employees + 1):
-            # Generate entry time around 8:00 AM with ±15 minutes variation
-            entry_minutes_variation = random.randint(-15, 15)
-            entry_time = current_date.replace(hour=8, minute=0) + timedelta(minutes=entry_minutes_variation)
-            entry_time_str = entry_time.strftime('%Y-%m-%d %H:%M:%S')
-            
-            # Generate exit time around 5:00 PM with ±20 minutes variation
-            exit_minutes_variation = random.randint(-20, 20)
-            exit_time = current_date.replace(hour=17, minute=0) + timedelta(minutes=exit_minutes_variation)
-            exit_time_str = exit_time.strftime('%Y-%m-%d %H:%M:%S')
-            
-            # Add entry record
-            entry_record = f"    ('employee', {emp_id}, 'entry', '{entry_time_str}', '{date_str}')"
-            records.append(entry_record)
-            
-            # Add exit record
-            exit_record = f"    ('employee', {emp_id}, 'exit', '{exit_time_str}', '{date_str}')"
-            records.append(exit_record)
-    
-    # Join all records with commas
-    sql_values = ',\n'.join(records)
-    f.write(sql_values)
-    f.write(';')
-
-print("Generated 180 access log records successfully!")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Importación masiva de registros de acceso históricos.
+
+Carga un archivo CSV (con encabezado person_type,person_id,access_type,access_time,
+workday_date) o NDJSON en access_logs mediante COPY, validando antes los ids de
+persona contra users/visitors. Si la importación falla, volver a ejecutar el mismo
+comando la reanuda desde el último lote confirmado.
+
+Ejemplos:
+    python import_access_logs.py historico_2024.csv
+    python import_access_logs.py historico.ndjson --job-name migracion-2024 --skip-invalid
+"""
+import argparse
+import os
+import sys
+
+from app.database.connection import SessionLocal
+from app.services.bulk_import_service import import_access_logs, BATCH_SIZE
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="Archivo CSV o NDJSON")
+    parser.add_argument("--format", choices=["csv", "ndjson"], default=None,
+                        help="Por defecto se deduce de la extensión")
+    parser.add_argument("--job-name", default=None, help="Nombre de la importación (por defecto el nombre del archivo)")
+    parser.add_argument("--skip-invalid", action="store_true", help="Omitir filas de personas inexistentes")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    fmt = args.format or ("ndjson" if args.path.endswith((".ndjson", ".jsonl")) else "csv")
+    job_name = args.job_name or os.path.basename(args.path)
+
+    def report(job):
+        percent = job.rows_processed * 100 / job.total_rows if job.total_rows else 100
+        print(f"\r{job.rows_processed:,}/{job.total_rows:,} filas ({percent:.1f}%)", end="", file=sys.stderr)
+
+    db = SessionLocal()
+    try:
+        with open(args.path, "rb") as f:
+            job = import_access_logs(db, f, fmt, job_name, args.skip_invalid, args.batch_size, on_progress=report)
+        print(f"\nImportación '{job.name}': {job.rows_loaded:,} filas cargadas, {job.rows_skipped:,} omitidas",
+              file=sys.stderr)
+    except ValueError as e:
+        print(f"\nError: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()